@@ -0,0 +1,209 @@
+"""
+Command line entry point: ``python -m scraper`` from the repository root.
+
+    python -m scraper all [--concurrency 4 ...]       full crawl (scrape_huddle.py's options)
+    python -m scraper subset                          the quick-test subset -> output/playbooks_subset.json
+    python -m scraper playbook eagles-off chiefs-def  named playbooks, in one process
+    python -m scraper playbook --targets ids.txt      ... or ids from a file, one per line
+    python -m scraper export dedup output/playbooks.json
+    python -m scraper performance export.json         play analytics from the app's export (performance.py)
+
+Every target of one run shares the process and its HTTP session, so later
+targets reuse warm keep-alive connections. Modules are imported inside the
+subcommand that needs them: export, performance and --help never load
+requests or lxml, and no subcommand loads bs4.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+SCRAPER_DIR = Path(__file__).parent
+# The scraper's modules import each other as top-level modules
+if str(SCRAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRAPER_DIR))
+
+OUTPUT_DIR = SCRAPER_DIR / "output"
+
+# Representative playbooks for quick testing
+SUBSET = [
+    "eagles-off", "chiefs-off", "49ers-off", "bills-off", "ravens-off",
+    "air-raid-off", "west-coast-off",
+    "eagles-def", "49ers-def",
+    "multiple-d-def",
+]
+
+EXPORT_FORMATS = ("columnar", "dedup", "search-index", "shards", "db", "similarity")
+
+
+def read_targets(path: Path) -> list[str]:
+    """Playbook ids from a file: one per line, blank lines and # comments ignored."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def scrape_targets(playbook_ids: list[str], output: Path, args: argparse.Namespace) -> int:
+    """Scrape playbooks by id in this process and write them as one playbooks document."""
+    import scrape_huddle
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import nullcontext
+    from fileutil import StreamingJsonWriter
+    from shards import playbook_counts
+
+    playbooks = []
+    for playbook_id in playbook_ids:
+        stub = scrape_huddle.playbook_stub(playbook_id)
+        if stub is None:
+            print(f"ERROR: {playbook_id} is not a playbook id (expected e.g. eagles-off or eagles-def)")
+            return 2
+        playbooks.append(stub)
+
+    if args.cache != "off":
+        scrape_huddle.enable_cache(args.cache, args.cache_dir)
+    scrape_huddle.configure_transport(args.concurrency)
+    if args.rate is not None:
+        scrape_huddle.rate_controller.configure(args.rate, max(args.rate, scrape_huddle.MAX_RATE))
+
+    header = {
+        "version": scrape_huddle.MADDEN_VERSION,
+        "scrapedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "source": "huddle.gg",
+    }
+    totals = Counter()
+    pool = ThreadPoolExecutor(max_workers=args.concurrency) if args.concurrency > 1 else nullcontext()
+    # Each playbook is written out as soon as it is scraped
+    with pool as executor, StreamingJsonWriter(output, header, "playbooks") as writer:
+        for i, playbook in enumerate(playbooks):
+            print(f"\n[{i+1}/{len(playbooks)}]", end="")
+            result = scrape_huddle.scrape_playbook(playbook, executor)
+            counts = playbook_counts(result)
+            print(f"  -> {counts['formationGroups']} formation groups, {counts['plays']} plays")
+            totals.update(counts)
+            writer.write(result)
+
+    print("\n" + "=" * 60)
+    print(f"Output: {output}")
+    print(f"Playbooks: {writer.count}")
+    print(f"Formations: {totals['formations']}")
+    print(f"Plays: {totals['plays']}")
+    if scrape_huddle.failed_urls:
+        print(f"WARNING: {len(scrape_huddle.failed_urls)} page(s) could not be fetched, output is incomplete")
+        return 1
+    return 0
+
+
+def export(fmt: str, input_path: Path, output: Optional[Path]) -> int:
+    import json
+
+    with open(input_path) as f:
+        data = json.load(f)
+
+    if fmt == "columnar":
+        from export_columnar import write_columnar
+        output = output or input_path.with_suffix(".columnar.json")
+        write_columnar(data, output)
+    elif fmt == "dedup":
+        from export_dedup import write_dedup
+        output = output or input_path.with_suffix(".dedup.json")
+        write_dedup(data, output)
+    elif fmt == "search-index":
+        from search_index import write_index
+        output = output or input_path.with_name("search_index.json")
+        write_index(data, output)
+    elif fmt == "shards":
+        from shards import MANIFEST_NAME, write_shards
+        output = output or input_path.parent
+        write_shards(data, output)
+        output = output / MANIFEST_NAME
+    elif fmt == "db":
+        from store import DEFAULT_DB, PlaybookStore
+        output = output or DEFAULT_DB
+        with PlaybookStore(output) as store:
+            store.upsert_playbooks(data["playbooks"], data)
+    elif fmt == "similarity":
+        from similarity import write_similarity
+        output = output or input_path.with_suffix(".similarity.json")
+        write_similarity(data, output)
+    print(f"Wrote {output}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from http_cache import DEFAULT_CACHE_DIR, MODES as CACHE_MODES
+
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Huddle.gg playbook scraper")
+    parser.add_argument("--base-url", help="site root, e.g. a local fixture server (default: https://huddle.gg)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "all", add_help=False,
+        help="full crawl to output/playbooks.json; other options are scrape_huddle.py's (see all --help)"
+    )
+
+    targets = argparse.ArgumentParser(add_help=False)
+    targets.add_argument(
+        "--concurrency", type=int, default=1,
+        help="number of formation pages to fetch in parallel (default: 1)"
+    )
+    targets.add_argument("--rate", type=float, help="requests per second (default: the scraper's)")
+    targets.add_argument("--cache", choices=("off",) + CACHE_MODES, default="revalidate")
+    targets.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+
+    subset = commands.add_parser("subset", parents=[targets], help="scrape the quick-test subset")
+    subset.add_argument("-o", "--output", type=Path, default=OUTPUT_DIR / "playbooks_subset.json")
+
+    playbook = commands.add_parser("playbook", parents=[targets], help="scrape playbooks by id")
+    playbook.add_argument("ids", nargs="*", metavar="ID", help="playbook ids, e.g. eagles-off")
+    playbook.add_argument("--targets", type=Path, help="file of playbook ids, one per line")
+    playbook.add_argument("-o", "--output", type=Path, help="default: output/<id>.json for one id, "
+                                                            "output/playbooks_targets.json for several")
+
+    commands.add_parser(
+        "performance", add_help=False,
+        help="success rates and yards per call from a playsheet export (see performance --help)"
+    )
+
+    exporter = commands.add_parser("export", help="write another format from a playbooks JSON file")
+    exporter.add_argument("format", choices=EXPORT_FORMATS)
+    exporter.add_argument("input", type=Path, nargs="?", default=OUTPUT_DIR / "playbooks.json")
+    exporter.add_argument("-o", "--output", type=Path)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in ("all", "performance"):
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    if args.base_url and args.command not in ("export", "performance"):
+        import scrape_huddle
+        scrape_huddle.BASE_URL = args.base_url.rstrip("/")
+
+    if args.command == "all":
+        import scrape_huddle
+        return scrape_huddle.main(rest) or 0
+    if args.command == "performance":
+        import performance
+        return performance.main(rest) or 0
+    if args.command == "subset":
+        return scrape_targets(SUBSET, args.output, args)
+    if args.command == "playbook":
+        ids = list(args.ids)
+        if args.targets:
+            ids += read_targets(args.targets)
+        if not ids:
+            parser.error("give playbook ids or --targets")
+        output = args.output or OUTPUT_DIR / (f"{ids[0]}.json" if len(ids) == 1 else "playbooks_targets.json")
+        return scrape_targets(ids, output, args)
+    return export(args.format, args.input, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
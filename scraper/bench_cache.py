@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark the response cache modes against the local fixture server."""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import scrape_huddle
+from fixture_server import FixtureServer
+
+
+def crawl(playbooks: list[dict]) -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [scrape_huddle.scrape_playbook(pb) for pb in playbooks]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated server latency in seconds")
+    parser.add_argument("--rate", type=float, default=20.0, help="rate limit in requests/sec")
+    parser.add_argument("--playbooks", type=int, default=2, help="number of fixture playbooks to crawl")
+    args = parser.parse_args()
+
+    cache_dir = Path(tempfile.mkdtemp(prefix="huddle-cache-"))
+    try:
+        with FixtureServer(latency=args.latency) as server:
+            scrape_huddle.BASE_URL = server.url
+            scrape_huddle.rate_limiter.rate = args.rate
+            with contextlib.redirect_stdout(io.StringIO()):
+                playbooks = scrape_huddle.get_playbook_list()[:args.playbooks]
+
+            print(f"Fixture: {server.url}  latency={args.latency}s  rate={args.rate}/s  playbooks={len(playbooks)}")
+            print(f"{'run':<22}  {'requests':>8}  {'seconds':>8}  identical")
+
+            runs = [
+                ("no cache", None),
+                ("cold (revalidate)", "revalidate"),
+                ("warm revalidate", "revalidate"),
+                ("warm ttl", "ttl"),
+                ("warm replay (offline)", "replay"),
+            ]
+            baseline = None
+            for label, mode in runs:
+                scrape_huddle.cache = None
+                if mode:
+                    scrape_huddle.enable_cache(mode, cache_dir, ttl=3600)
+                server.reset_count()
+                results, elapsed = crawl(playbooks)
+                encoded = json.dumps(results)
+                baseline = baseline or encoded
+                print(f"{label:<22}  {server.request_count:>8}  {elapsed:>8.2f}  {encoded == baseline}")
+                assert encoded == baseline, f"{label}: output differs from the uncached crawl"
+                if mode in ("ttl", "replay"):
+                    assert server.request_count == 0, f"{label}: {server.request_count} requests from a warm cache"
+
+        size = sum(p.stat().st_size for p in cache_dir.rglob("*") if p.is_file())
+        print(f"\nCache size on disk: {size / 1024:.0f} KB")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
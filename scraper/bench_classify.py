@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare the compiled classifier with the original per-indicator loops on a scrape's full play list."""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from classify import formation_group, play_type, play_types
+from fixture_server import DEFAULT_SOURCE
+
+
+# Reference implementations, as they were in scrape_huddle.py
+def determine_play_type(play_name: str) -> str:
+    name_lower = play_name.lower()
+    run_indicators = [
+        "hb ", "fb ", "dive", "draw", "sweep", "toss", "counter", "iso",
+        "blast", "slam", "inside zone", "outside zone", "stretch", "power",
+        "trap", "lead", "pitch", "option", "qb run", "qb sneak", "scramble",
+        "wildcat", "jet sweep", "end around", "reverse"
+    ]
+    pass_indicators = [
+        "pa ", "pass", "screen", "slant", "post", "corner", "out", "curl",
+        "hitch", "fade", "streak", "seam", "cross", "drag", "wheel",
+        "comeback", "dig", "sail", "flood", "mesh", "spot", "stick",
+        "smash", "dagger", "bench", "levels", "y-", "te ", "wr "
+    ]
+    for indicator in run_indicators:
+        if indicator in name_lower:
+            return "run"
+    for indicator in pass_indicators:
+        if indicator in name_lower:
+            return "pass"
+    return "pass"
+
+
+def determine_formation_group(formation_name: str, formation_slug: str) -> str:
+    name_lower = formation_name.lower()
+    slug_lower = formation_slug.lower()
+    group_mappings = [
+        ("gun", "Gun"), ("shotgun", "Gun"), ("pistol", "Pistol"), ("singleback", "Singleback"),
+        ("i-form", "I Form"), ("i form", "I Form"), ("iform", "I Form"), ("strong", "Strong"),
+        ("weak", "Weak"), ("goal line", "Goal Line"), ("goalline", "Goal Line"),
+        ("hail mary", "Hail Mary"), ("wildcat", "Wildcat"), ("jumbo", "Jumbo"),
+        ("full house", "Full House"), ("empty", "Empty"), ("trips", "Gun"), ("bunch", "Gun"),
+        ("spread", "Gun"), ("ace", "Singleback"), ("3-4", "3-4"), ("4-3", "4-3"),
+        ("nickel", "Nickel"), ("dime", "Dime"), ("quarter", "Quarter"), ("dollar", "Dollar"),
+        ("big nickel", "Big Nickel"), ("46", "46"),
+    ]
+    for pattern, group in group_mappings:
+        if pattern in name_lower or pattern in slug_lower:
+            return group
+    return formation_name.split()[0] if formation_name else "Other"
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", type=Path, nargs="?", default=DEFAULT_SOURCE, help="nested playbooks JSON")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    formations = [
+        formation for pb in data["playbooks"]
+        for group in pb["formationGroups"] for formation in group["formations"]
+    ]
+    names = [play["name"] for formation in formations for play in formation["plays"]]
+    print(f"{len(names)} plays ({len(set(names))} distinct names), {len(formations)} formations\n")
+
+    expected = [determine_play_type(name) for name in names]
+    assert [play_type(name) for name in names] == expected
+    assert play_types(names) == expected
+    expected_groups = [determine_formation_group(f["name"], f["slug"]) for f in formations]
+    assert [formation_group(f["name"], f["slug"]) for f in formations] == expected_groups
+    print("Results identical to the original functions\n")
+
+    rows = [
+        ("play type, original loops", lambda: [determine_play_type(n) for n in names], len(names)),
+        ("play type, compiled per call", lambda: (play_type.cache_clear(), [play_type(n) for n in names]),
+         len(names)),
+        ("play type, memoized (warm)", lambda: [play_type(n) for n in names], len(names)),
+        ("play type, compiled batch", lambda: play_types(names), len(names)),
+        ("formation group, original", lambda: [determine_formation_group(f["name"], f["slug"]) for f in formations],
+         len(formations)),
+        ("formation group, compiled", lambda: (
+            formation_group.cache_clear(), [formation_group(f["name"], f["slug"]) for f in formations]
+        ), len(formations)),
+        ("formation group, memoized", lambda: [formation_group(f["name"], f["slug"]) for f in formations],
+         len(formations)),
+    ]
+    baseline = {}
+    for label, fn, count in rows:
+        seconds = best_of(fn, args.repeat)
+        kind = label.split(",")[0]
+        baseline.setdefault(kind, seconds)
+        print(f"  {label:<32} {seconds * 1000:8.2f} ms  {seconds / count * 1e6:6.2f} us/item  "
+              f"{baseline[kind] / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
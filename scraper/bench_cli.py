@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Startup and per-target cost of ``python -m scraper``.
+
+1. Cold start: wall time of fresh processes for --help, an export, and the
+   scraper's import, against the import set of the old drivers (which
+   pulled in bs4 through scrape_huddle).
+2. Per-target overhead: the subset's playbooks scraped from the fixture
+   server as one process per playbook (one driver run per target, as
+   before) against one `playbook` run with every target.
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+
+SCRAPER_DIR = Path(__file__).parent
+REPO_ROOT = SCRAPER_DIR.parent
+SUBSET = ["eagles-off", "chiefs-off", "49ers-off", "bills-off", "ravens-off",
+          "air-raid-off", "west-coast-off", "eagles-def", "49ers-def", "multiple-d-def"]
+
+
+def run(cmd: list[str], cwd: Path = REPO_ROOT) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def best(cmd: list[str], repeat: int, cwd: Path = REPO_ROOT) -> float:
+    return min(run(cmd, cwd) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="fixture server response delay")
+    args = parser.parse_args()
+
+    py = sys.executable
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-cli-"))
+    try:
+        print("Cold start (best of {}):".format(args.repeat))
+        cases = [
+            ("python (empty)", [py, "-c", "pass"], REPO_ROOT),
+            ("python -m scraper --help", [py, "-m", "scraper", "--help"], REPO_ROOT),
+            ("export columnar (subset)", [py, "-m", "scraper", "export", "columnar", str(DEFAULT_SOURCE),
+                                          "-o", str(workdir / "c.json")], REPO_ROOT),
+            ("import scrape_huddle", [py, "-c", "import scrape_huddle"], SCRAPER_DIR),
+            ("  + bs4, as the old drivers", [py, "-c", "import bs4, scrape_huddle"], SCRAPER_DIR),
+        ]
+        for label, cmd, cwd in cases:
+            print(f"  {label:<30} {best(cmd, args.repeat, cwd) * 1000:6.0f} ms")
+
+        with FixtureServer(latency=args.latency) as server:
+            common = ["--cache", "off", "--rate", "0"]
+            server.reset_count()
+            separate = []
+            for playbook_id in SUBSET:
+                separate.append(run([py, "-m", "scraper", "--base-url", server.url, "playbook", playbook_id,
+                                     *common, "-o", str(workdir / f"{playbook_id}.json")]))
+            separate_connections, requests = server.connection_count, server.request_count
+
+            server.reset_count()
+            together = run([py, "-m", "scraper", "--base-url", server.url, "playbook", *SUBSET,
+                            *common, "-o", str(workdir / "all.json")])
+            together_connections = server.connection_count
+            assert server.request_count == requests
+
+        n = len(SUBSET)
+        print(f"\n{n} playbooks, {requests} pages, {args.latency * 1000:.0f} ms server latency:")
+        print(f"  {'':<26} {'seconds':>8} {'connections':>12}")
+        print(f"  {'one process per target':<26} {sum(separate):>8.2f} {separate_connections:>12d}"
+              f"   (median {statistics.median(separate):.2f} s/target)")
+        print(f"  {'one process, all targets':<26} {together:>8.2f} {together_connections:>12d}")
+        print(f"  per-target overhead saved: {(sum(separate) - together) / n * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
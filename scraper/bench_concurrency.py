@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark sequential vs concurrent playbook scraping against the local fixture server."""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scrape_huddle
+from fixture_server import FixtureServer
+
+
+def crawl(playbooks: list[dict], concurrency: int) -> tuple[list[dict], float]:
+    """Scrape the given playbooks and return (results, elapsed seconds)."""
+    pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else contextlib.nullcontext()
+    start = time.perf_counter()
+    with pool as executor, contextlib.redirect_stdout(io.StringIO()):
+        results = [scrape_huddle.scrape_playbook(pb, executor) for pb in playbooks]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated server latency in seconds")
+    parser.add_argument("--rate", type=float, default=50.0, help="rate limit in requests/sec (0 = none)")
+    parser.add_argument("--playbooks", type=int, default=2, help="number of fixture playbooks to crawl")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with FixtureServer(latency=args.latency) as server:
+        scrape_huddle.BASE_URL = server.url
+        scrape_huddle.rate_limiter.rate = args.rate
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            playbooks = scrape_huddle.get_playbook_list()[:args.playbooks]
+
+        print(f"Fixture: {server.url}  latency={args.latency}s  rate={args.rate}/s  playbooks={len(playbooks)}")
+        print(f"{'concurrency':>11}  {'requests':>8}  {'seconds':>8}  {'req/s':>7}  {'speedup':>7}  identical")
+
+        baseline = None
+        baseline_time = None
+        for concurrency in args.concurrency:
+            server.reset_count()
+            results, elapsed = crawl(playbooks, concurrency)
+            requests_made = server.request_count
+            encoded = json.dumps(results, sort_keys=False)
+            if baseline is None:
+                baseline, baseline_time = encoded, elapsed
+            print(
+                f"{concurrency:>11}  {requests_made:>8}  {elapsed:>8.2f}  "
+                f"{requests_made / elapsed:>7.1f}  {baseline_time / elapsed:>6.1f}x  {encoded == baseline}"
+            )
+            assert encoded == baseline, f"output at concurrency {concurrency} differs from {args.concurrency[0]}"
+
+
+if __name__ == "__main__":
+    main()
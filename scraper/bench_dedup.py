@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Show how the deduplicated export grows as playbooks are added, against the nested JSON."""
+
+import argparse
+import gzip
+import json
+from pathlib import Path
+
+from export_dedup import dedup_stats, expand, to_dedup
+
+DEFAULT_INPUT = Path(__file__).parent / "output" / "playbooks_subset.json"
+
+
+def size(doc: dict) -> tuple[int, int]:
+    raw = json.dumps(doc, separators=(",", ":")).encode()
+    return len(raw), len(gzip.compress(raw, compresslevel=9))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", type=Path, nargs="?", default=DEFAULT_INPUT)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    dedup = to_dedup(data)
+    assert expand(dedup) == data, "dedup round trip does not match input"
+
+    stats = dedup_stats(data, dedup)
+    nested_raw, nested_gz = size(data)
+    dedup_raw, dedup_gz = size(dedup)
+    print(f"{args.input.name}: {len(data['playbooks'])} playbooks")
+    print(f"  plays      {stats['plays']:6d} -> {stats['uniquePlays']:6d} unique  "
+          f"({stats['plays'] / stats['uniquePlays']:.1f}x)")
+    print(f"  formations {stats['formations']:6d} -> {stats['uniqueFormations']:6d} unique  "
+          f"({stats['formations'] / stats['uniqueFormations']:.1f}x)")
+    print(f"  bytes      {nested_raw / 1024:6.0f} -> {dedup_raw / 1024:6.0f} KB  "
+          f"(saves {1 - dedup_raw / nested_raw:.0%}; gzip {nested_gz / 1024:.0f} -> {dedup_gz / 1024:.0f} KB)\n")
+
+    # Offense and defense books share nothing, so grow each side separately
+    for side in ("offense", "defense"):
+        books = [pb for pb in data["playbooks"] if pb["type"] == side]
+        print(f"{side}: size as playbooks are added (minified KB)")
+        print(f"  {'books':>5}  {'nested':>8}  {'dedup':>8}  {'dedup added':>11}")
+        previous = 0
+        for n in range(1, len(books) + 1):
+            subset = {**data, "playbooks": books[:n]}
+            nested, _ = size(subset)
+            deduped, _ = size(to_dedup(subset))
+            print(f"  {n:>5}  {nested / 1024:>8.0f}  {deduped / 1024:>8.0f}  {(deduped - previous) / 1024:>+11.0f}")
+            previous = deduped
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Distributed crawl with local worker processes against the fixture server.
+
+Runs the whole crawl through the work queue twice: with one worker, then
+with --workers workers, one of which is killed with SIGKILL while it holds
+a lease. Both runs share a --rate budget. For each run it reports wall
+time, the request rate the server saw, and the items that were leased more
+than once. The merged playbooks.json has to match the fixture's source
+data, the server must not see more than the budget, and the item the
+killed worker held must end up done.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import distributed
+import scrape_huddle
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+from workqueue import WorkQueue
+
+SCRIPT = Path(__file__).parent / "distributed.py"
+
+
+def leased_by(queue: WorkQueue, owner: str) -> list[str]:
+    with queue._lock:
+        return [key for key, in queue.conn.execute(
+            "SELECT key FROM item WHERE state = 'leased' AND owner = ?", (owner,)
+        )]
+
+
+def crawl(server: FixtureServer, queue_path: Path, workers: int, args, kill: bool) -> dict:
+    queue = WorkQueue(queue_path, args.lease)
+    with contextlib.redirect_stdout(io.StringIO()):
+        distributed.seed(queue, args.rate)
+    server.reset_count()
+    start = time.perf_counter()
+    procs = [
+        subprocess.Popen(
+            [sys.executable, str(SCRIPT), "--queue", str(queue_path), "--lease", str(args.lease),
+             "work", "--id", f"w{i}"],
+            stdout=subprocess.DEVNULL,
+        )
+        for i in range(workers)
+    ]
+
+    killed = None
+    if kill:
+        # Wait until w0 is well into the crawl and holding a lease, then kill it
+        while server.request_count < 40 or not leased_by(queue, "w0"):
+            time.sleep(0.01)
+        killed = leased_by(queue, "w0")[0]
+        procs[0].kill()
+    for proc in procs:
+        proc.wait()
+    seconds = time.perf_counter() - start
+
+    data, incomplete = distributed.merge(queue)
+    with queue._lock:
+        releases = queue.conn.execute("SELECT key, attempts FROM item WHERE attempts > 1").fetchall()
+        state = queue.conn.execute("SELECT state FROM item WHERE key = ?", (killed,)).fetchone() if killed else None
+    queue.close()
+    return {
+        "seconds": seconds, "requests": server.request_count, "data": data, "incomplete": incomplete,
+        "releases": releases, "killed": killed, "killed_state": state and state[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=40.0, help="global requests/sec budget")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server response delay")
+    parser.add_argument("--lease", type=float, default=2.0, help="lease seconds, short so the kill recovers quickly")
+    args = parser.parse_args()
+
+    with open(DEFAULT_SOURCE) as f:
+        expected = json.load(f)["playbooks"]
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-distributed-"))
+    try:
+        with FixtureServer(latency=args.latency) as server:
+            scrape_huddle.BASE_URL = server.url
+            runs = {
+                "1 worker": crawl(server, workdir / "one.db", 1, args, kill=False),
+                f"{args.workers} workers, 1 killed": crawl(server, workdir / "many.db", args.workers, args, kill=True),
+            }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"Fixture site, {args.latency * 1000:.0f} ms latency, {args.rate:.0f} req/s budget, "
+          f"{args.lease:.0f} s leases\n")
+    print(f"{'run':<24} {'seconds':>8} {'requests':>9} {'req/s':>7} {'re-leased':>10}  output")
+    for label, run in runs.items():
+        ok = run["data"]["playbooks"] == expected and not run["incomplete"]
+        print(f"{label:<24} {run['seconds']:>8.1f} {run['requests']:>9d} {run['requests'] / run['seconds']:>7.1f} "
+              f"{len(run['releases']):>10d}  {'matches source' if ok else 'MISMATCH'}")
+        if run["killed"]:
+            print(f"  killed w0 holding {run['killed']}")
+            print(f"  that item ended up {run['killed_state']}, after {dict(run['releases']).get(run['killed'])} leases")
+            assert run["killed_state"] == "done", f"{label}: the killed worker's item ended up {run['killed_state']}"
+        assert ok, f"{label}: merged output differs from the source"
+        assert run["requests"] / run["seconds"] <= args.rate, f"{label}: over the {args.rate:.0f} req/s budget"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Compare size and load time of the nested JSON output against the columnar export."""
+
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+
+from export_columnar import expand, to_columnar
+
+try:
+    import brotli
+except ImportError:  # optional, only used for reporting
+    brotli = None
+
+DEFAULT_INPUT = Path(__file__).parent / "output" / "playbooks_subset.json"
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", type=Path, nargs="?", default=DEFAULT_INPUT)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+
+    columnar = to_columnar(data)
+    assert expand(columnar) == data, "columnar round trip does not match input"
+
+    variants = {
+        "nested, indent=2": (json.dumps(data, indent=2), False),
+        "nested, minified": (json.dumps(data, separators=(",", ":")), False),
+        "columnar": (json.dumps(columnar, separators=(",", ":")), True),
+    }
+
+    plays = len(columnar["plays"]["name"])
+    print(f"{args.input.name}: {len(data['playbooks'])} playbooks, {plays} plays\n")
+    print(f"{'format':<18}  {'raw KB':>8}  {'gzip KB':>8}  {'brotli KB':>9}  {'parse ms':>8}  {'+expand ms':>10}")
+    for label, (text, is_columnar) in variants.items():
+        raw = text.encode()
+        gz = len(gzip.compress(raw, compresslevel=9))
+        br = f"{len(brotli.compress(raw)) / 1024:>9.0f}" if brotli else f"{'n/a':>9}"
+        parse = best_of(lambda: json.loads(text))
+        expanded = f"{best_of(lambda: expand(json.loads(text))) * 1000:>10.1f}" if is_columnar else f"{'-':>10}"
+        print(f"{label:<18}  {len(raw) / 1024:>8.0f}  {gz / 1024:>8.0f}  {br}  {parse * 1000:>8.1f}  {expanded}")
+
+    print("\nparse = json.loads; +expand = json.loads plus expand() back to the nested schema")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Grow a snapshot history over simulated patches and compare its size with
+archiving a full copy of playbooks.json per scrape.
+
+Each simulated patch reclassifies a few plays, renames one, adds a play
+and drops a formation. Every snapshot is checked to rebuild exactly, and
+the change listing between the first and last snapshot is checked against
+a direct comparison of the two documents.
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchutil import DEFAULT_INPUT, scale, timeit
+from history import History, describe, diff, to_snapshot
+from search_index import iter_plays
+
+
+def patch(data: dict, n: int, rng: random.Random) -> dict:
+    data = copy.deepcopy(data)
+    data["scrapedAt"] = f"2026-01-{n + 1:02d}T00:00:00Z"
+    plays = [play for _, _, _, play in iter_plays(data)]
+    for play in rng.sample(plays, 5):
+        play["type"] = "pass" if play["type"] == "run" else "run"
+    rng.choice(plays)["name"] += " 2"
+    formations = [f for pb in data["playbooks"] for g in pb["formationGroups"] for f in g["formations"] if f["plays"]]
+    formation = rng.choice(formations)
+    formation["plays"].append({**formation["plays"][0], "id": f"{formation['plays'][0]['id']}-patch{n}",
+                               "name": f"NEW PLAY {n}"})
+    group = rng.choice([g for pb in data["playbooks"] for g in pb["formationGroups"] if len(g["formations"]) > 1])
+    group["formations"].pop(rng.randrange(len(group["formations"])))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--copies", type=int, default=10, help="repeat the input this many times")
+    parser.add_argument("--snapshots", type=int, default=30)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = scale(json.load(f), args.copies)
+    rng = random.Random(0)
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-history-"))
+    try:
+        history = History(workdir)
+        documents, archive_bytes = [], 0
+        start = time.perf_counter()
+        for n in range(args.snapshots):
+            data = patch(data, n, rng) if n else data
+            documents.append(data)
+            history.record(data)
+            archive_bytes += len(gzip.compress(json.dumps(data, separators=(",", ":")).encode()))
+        record_seconds = (time.perf_counter() - start) / args.snapshots
+
+        for n, document in enumerate(documents):
+            assert history.document(n) == document, f"snapshot {n} does not rebuild"
+
+        last = len(documents) - 1
+        from_deltas = describe(history.changes(0, last))
+        direct = describe(diff(to_snapshot(documents[0]), to_snapshot(documents[-1])))
+        assert from_deltas == direct, "change listing from deltas differs from a direct comparison"
+
+        bases = sum(1 for s in history.snapshots if s["baseBytes"])
+        print(f"{args.snapshots} snapshots of {len(data['playbooks'])} playbooks")
+        print(f"  full gzip copies   {archive_bytes / 1024:8.0f} KB")
+        print(f"  history            {history.size() / 1024:8.0f} KB  ({bases} bases, "
+              f"mean delta {sum(s['deltaBytes'] for s in history.snapshots) / last / 1024:.1f} KB)")
+        print(f"  record             {record_seconds * 1000:8.0f} ms per snapshot")
+        print(f"  rebuild latest     {timeit(lambda: history.document(last), 3) * 1000:8.0f} ms")
+        print(f"  changes 0 -> {last:<5} {timeit(lambda: history.changes(0, last), 3) * 1000:8.0f} ms "
+              f"(deltas only)")
+        print(f"  same, loading both {timeit(lambda: diff(history.load(0), history.load(last)), 3) * 1000:8.0f} ms")
+        print("\nChanges across the whole history:")
+        for section, kinds in from_deltas.items():
+            print(f"  {section:<11} " + ", ".join(f"{len(items)} {kind}" for kind, items in kinds.items()))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare a full crawl with incremental ones after a few simulated site edits.
+
+The previous run crawls the original site with the response cache on;
+the edited site is then served at the same address, so conditional GETs
+find the cached pages' validators. Runs on the edited site:
+
+    full          every page downloaded
+    incremental   --incremental: the index and playbook pages (304s when
+                  unchanged), plus formations new or changed on them
+    revalidate    --incremental --revalidate: every formation page
+                  requested too, conditionally
+
+Reported: the requests each crawl made, how many got a 304, the body
+bytes the server sent, and the change report. Asserted: --revalidate's
+output matches the full crawl; --incremental's does too except for the
+play renamed inside an unchanged formation, which its playbook page
+doesn't show, in under a tenth of the full crawl's requests. Each change
+report matches the diff of the original site against that output.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import scrape_huddle
+from benchutil import edit_site, use_output_dir
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+from incremental import diff_plays
+
+
+def run(server_url: str, out_dir: Path, argv: list[str]) -> dict:
+    scrape_huddle.BASE_URL = server_url
+    use_output_dir(out_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scrape_huddle.main(argv)
+    with open(scrape_huddle.OUTPUT_FILE) as f:
+        return json.load(f)
+
+
+def main():
+    with open(DEFAULT_SOURCE) as f:
+        original = json.load(f)
+    edited = edit_site(original)
+
+    tmp = Path(tempfile.mkdtemp(prefix="huddle-incremental-"))
+    try:
+        edited_source = tmp / "edited.json"
+        with open(edited_source, "w") as f:
+            json.dump(edited, f)
+
+        argv = ["--rate", "0", "--concurrency", "8"]
+        with FixtureServer(edited_source) as server:
+            full_dir = tmp / "full"
+            full_dir.mkdir()
+            full = run(server.url, full_dir, argv)
+            full_requests, full_bytes = server.request_count, server.bytes_sent
+        print(f"Full crawl:  {full_requests} requests, {full_bytes / 1024:.0f} KB of bodies")
+
+        # The previous run: the original site, with the response cache on
+        previous_dir = tmp / "previous"
+        previous_dir.mkdir()
+        with FixtureServer() as server:
+            run(server.url, previous_dir, argv + ["--cache", "revalidate"])
+            port = server._server.server_address[1]
+
+        # The 49ers play renamed inside a formation whose playbook page entry is unchanged
+        patched = copy.deepcopy(edited)
+        patched["playbooks"][2] = original["playbooks"][2]
+        for mode, extra, expected in (("incremental", [], patched), ("revalidate", ["--revalidate"], edited)):
+            out_dir = tmp / mode
+            shutil.copytree(previous_dir, out_dir)
+            with FixtureServer(edited_source, port=port) as server:
+                result = run(server.url, out_dir, argv + ["--incremental", *extra])
+                requests, sent = server.request_count, server.bytes_sent
+            not_modified = scrape_huddle.metrics.counter("cache_total", result="revalidated")
+            with open(out_dir / "diff_report.json") as f:
+                report = json.load(f)
+
+            print(f"\n{mode}: {requests} requests ({requests / full_requests:.1%} of full), "
+                  f"{not_modified:.0f} of them 304 Not Modified, "
+                  f"{sent / 1024:.0f} KB of bodies ({sent / full_bytes:.1%} of full)")
+            print(f"  diff report: {len(report['added'])} added, "
+                  f"{len(report['removed'])} removed, {len(report['renamed'])} renamed")
+            assert result["playbooks"] == expected["playbooks"], f"{mode} output differs from the expected site"
+            diff = json.loads(json.dumps(diff_plays(original["playbooks"], expected["playbooks"])))
+            assert report == diff, f"{mode} change report differs from the edits"
+            assert not_modified, f"{mode} revalidated nothing"
+            if mode == "incremental":
+                assert requests < full_requests / 10, f"incremental made {requests} of {full_requests} requests"
+            print(f"  output matches {'the full crawl' if expected is edited else 'the full crawl but the 49ers rename'}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
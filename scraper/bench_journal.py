@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark checkpointing: the old rewrite-everything progress.json versus the
+append-only journal, then simulate a crash mid-crawl and resume from the journal.
+Then a crash that tears the journal's final line, a resume that crashes
+again, and a second resume: formations journaled after the torn line must
+not be fetched a third time. Last, a final record that parses but lacks
+its newline must count as torn, so the next record doesn't share its line.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import scrape_huddle
+from benchutil import use_output_dir
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+from journal import Journal
+
+
+def rewrite_checkpoints(playbooks: list[dict], path: Path) -> tuple[float, int]:
+    """The previous scheme: dump every finished playbook every 5 playbooks."""
+    written = 0
+    start = time.perf_counter()
+    for i in range(len(playbooks)):
+        if (i + 1) % 5 == 0:
+            with open(path, "w") as f:
+                text = json.dumps({"completed_playbooks": [], "partial_data": {"playbooks": playbooks[:i + 1]}}, indent=2)
+                f.write(text)
+            written += len(text)
+    return time.perf_counter() - start, written
+
+
+def journal_checkpoints(playbooks: list[dict], path: Path) -> tuple[float, int]:
+    journal = Journal(path)
+    start = time.perf_counter()
+    for pb in playbooks:
+        for group in pb["formationGroups"]:
+            for formation in group["formations"]:
+                journal.record_formation(pb["id"], formation["slug"], formation["plays"])
+        journal.record_playbook(pb)
+    journal.close()
+    return time.perf_counter() - start, path.stat().st_size
+
+
+class Crash(Exception):
+    pass
+
+
+def main():
+    with open(DEFAULT_SOURCE) as f:
+        source = json.load(f)
+
+    tmp = Path(tempfile.mkdtemp(prefix="huddle-journal-"))
+    try:
+        # 1. Checkpoint cost as the crawl grows (subset repeated to ~100 playbooks)
+        playbooks = [
+            {**pb, "id": f"{pb['id']}-{n}"} for n in range(10) for pb in source["playbooks"]
+        ]
+        old_time, old_bytes = rewrite_checkpoints(playbooks, tmp / "progress.json")
+        new_time, new_bytes = journal_checkpoints(playbooks, tmp / "progress.jsonl")
+        print(f"Checkpointing {len(playbooks)} playbooks")
+        print(f"  progress.json rewrite every 5:  {old_time:6.2f}s  {old_bytes / 1e6:7.1f} MB written, "
+              f"lose up to 4 playbooks on crash")
+        print(f"  journal, fsync per formation:   {new_time:6.2f}s  {new_bytes / 1e6:7.1f} MB written, "
+              f"lose at most 1 formation")
+        assert new_bytes < old_bytes, "the journal wrote more than the rewrites"
+
+        # 2. Crash part-way through a crawl, then resume
+        use_output_dir(tmp)
+        argv = ["--rate", "0"]
+
+        original = scrape_huddle.scrape_formation_plays
+        calls = 0
+        crash_after = 100
+        fetched = []
+
+        def crashing(*args):
+            nonlocal calls
+            calls += 1
+            if calls > crash_after:
+                raise Crash()
+            fetched.append(args[0])
+            return original(*args)
+
+        with FixtureServer() as server, contextlib.redirect_stdout(io.StringIO()):
+            scrape_huddle.BASE_URL = server.url
+            scrape_huddle.scrape_formation_plays = crashing
+            try:
+                scrape_huddle.main(argv)
+            except Crash:
+                pass
+            scrape_huddle.scrape_formation_plays = original
+            before_crash = server.request_count
+
+            server.reset_count()
+            scrape_huddle.main(argv)
+            after_resume = server.request_count
+
+        with open(scrape_huddle.OUTPUT_FILE) as f:
+            result = json.load(f)
+        total = 1 + len(source["playbooks"]) + sum(
+            len(g["formations"]) for pb in source["playbooks"] for g in pb["formationGroups"]
+        )
+        print(f"\nCrash after 100 formations, then resume")
+        print(f"  requests before crash: {before_crash}, after resume: {after_resume}, full crawl: {total}")
+        print(f"  resumed output matches source: {result['playbooks'] == source['playbooks']}")
+        assert result["playbooks"] == source["playbooks"], "resumed output differs from the source"
+        # Only the index and the interrupted playbook's page are fetched twice
+        assert before_crash + after_resume <= total + 2, f"{before_crash} + {after_resume} requests for {total} pages"
+
+        # 3. Torn line, crash, resume that crashes too, resume to the end
+        scrape_huddle.OUTPUT_FILE.unlink()
+        fetched.clear()
+        with FixtureServer() as server, contextlib.redirect_stdout(io.StringIO()):
+            scrape_huddle.BASE_URL = server.url
+            scrape_huddle.scrape_formation_plays = crashing
+            for limit in (60, 60):
+                calls, crash_after = 0, limit
+                try:
+                    scrape_huddle.main(argv)
+                except Crash:
+                    pass
+                # The crash also cut the journal mid-record
+                with open(scrape_huddle.JOURNAL_FILE, "ab") as f:
+                    f.write(b'{"kind":"formation","playbook":"eagl')
+            crash_after = float("inf")
+            scrape_huddle.main(argv)
+            scrape_huddle.scrape_formation_plays = original
+
+        with open(scrape_huddle.OUTPUT_FILE) as f:
+            result = json.load(f)
+        refetched = len(fetched) - len(set(fetched))
+        print(f"\nTorn journal line, crash, resume, crash, resume")
+        print(f"  formations fetched over the three runs: {len(fetched)} of {total - 1 - len(source['playbooks'])}, "
+              f"fetched twice: {refetched}")
+        print(f"  resumed output matches source: {result['playbooks'] == source['playbooks']}")
+        assert result["playbooks"] == source["playbooks"], "resumed output differs from the source"
+        assert len(fetched) == total - 1 - len(source["playbooks"]), f"{refetched} formation(s) fetched twice"
+
+        # 4. A torn last record that still parses: only its newline missed the disk
+        path = tmp / "tail.jsonl"
+        journal = Journal(path)
+        for url in ("a", "b"):
+            journal.record_formation("eagles-off", url, [{"id": url}])
+        journal.close()
+        os.truncate(path, path.stat().st_size - 1)
+        journal = Journal(path)
+        assert set(journal.load().formations) == {"a"}, "a record without its newline counted as intact"
+        journal.record_formation("eagles-off", "c", [{"id": "c"}])
+        journal.close()
+        formations = Journal(path).load().formations
+        print(f"\nTorn last record that parses, then one more record")
+        print(f"  formations after reload: {sorted(formations)} (b is fetched again)")
+        assert set(formations) == {"a", "c"}, "records after a torn line were lost"
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
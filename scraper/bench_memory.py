@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Peak memory of a full crawl against its size, replayed from cached HTML.
+
+The fixture site is scaled to each of --copies multiples of the subset
+(every copy under its own playbook ids) and crawled once into a temporary
+response cache. Each measurement then replays that cache with no network,
+in a fresh process under tracemalloc:
+
+    collect   the old shape of main(): every scraped playbook kept in a
+              list, then one json.dumps of the whole document
+    main      scrape_huddle.main(): playbooks go to the journal as they
+              finish and are streamed from there into playbooks.json and
+              the search index
+    rerun     main() again with --history, over main's playbooks.json and
+              a history already holding it: the change report and the
+              history snapshot are computed against the previous output
+
+Reported per run: peak Python allocations (tracemalloc) and the process's
+peak RSS, which also covers lxml's C heap and the interpreter itself.
+main's playbooks.json is checked against the collected document, and
+rerun's change report and history delta against an unchanged site.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import scrape_huddle
+from benchutil import peak_rss, scale_site, use_output_dir
+from fileutil import write_json_atomic
+from history import History
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+
+CACHE_MAX_BYTES = 1 << 30
+MODES = ("collect", "main", "rerun")
+
+
+def collect(threads: int) -> dict:
+    """Crawl the way main() used to: everything in memory, written at the end."""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        playbooks = scrape_huddle.get_playbook_list()
+        return {"version": scrape_huddle.MADDEN_VERSION, "source": "huddle.gg",
+                "playbooks": [scrape_huddle.scrape_playbook(pb, executor) for pb in playbooks]}
+
+
+def measure(mode: str, cache_dir: Path, output_dir: Path, threads: int) -> dict:
+    """Runs in a child process; returns peak traced and resident memory in MB."""
+    use_output_dir(output_dir)
+    tracemalloc.start()
+    # Not a StringIO: the crawl's log would count as memory the crawl holds
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if mode == "collect":
+            scrape_huddle.rate_limiter.rate = 0
+            scrape_huddle.enable_cache("replay", cache_dir, max_bytes=CACHE_MAX_BYTES)
+            write_json_atomic(output_dir / "collected.json", collect(threads))
+        else:
+            scrape_huddle.main(["--cache", "replay", "--cache-dir", str(cache_dir), "--rate", "0",
+                                "--concurrency", str(threads), "--cache-max-mb", str(CACHE_MAX_BYTES >> 20)]
+                               + (["--history"] if mode == "rerun" else []))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"traced": peak / 1e6, "rss": peak_rss() / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=4, help="fetch threads")
+    parser.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        scrape_huddle.BASE_URL = args.base_url
+        print(json.dumps(measure(args.measure, args.cache_dir, args.output_dir, args.threads)))
+        return
+
+    with open(DEFAULT_SOURCE) as f:
+        subset = json.load(f)
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-memory-"))
+    try:
+        print(f"{'copies':>6} {'playbooks':>9} {'pages':>6} {'output MB':>9}   "
+              f"{'collect: traced':>15} {'rss':>7}   {'main: traced':>12} {'rss':>7}   "
+              f"{'rerun: traced':>13} {'rss':>7}")
+        for copies in args.copies:
+            source, cache_dir = workdir / f"site-{copies}.json", workdir / f"cache-{copies}"
+            write_json_atomic(source, scale_site(subset, copies), indent=None)
+
+            # Record the scaled site once
+            scrape_huddle.rate_limiter.rate = 0
+            with FixtureServer(source) as server, contextlib.redirect_stdout(io.StringIO()):
+                scrape_huddle.BASE_URL = server.url
+                scrape_huddle.enable_cache("revalidate", cache_dir, max_bytes=CACHE_MAX_BYTES)
+                collect(args.threads)
+                pages = server.request_count
+
+            results = {}
+            for mode in MODES:
+                output_dir = workdir / f"out-{copies}-{mode}"
+                output_dir.mkdir()
+                if mode == "rerun":
+                    # The previous run's output, already recorded in the history
+                    shutil.copy(workdir / f"out-{copies}-main" / "playbooks.json", output_dir)
+                    with open(output_dir / "playbooks.json") as f:
+                        History(output_dir / "history").record(json.load(f))
+                # BASE_URL has to match the recorded pages' URLs
+                out = subprocess.run(
+                    [sys.executable, __file__, "--measure", mode, "--base-url", server.url,
+                     "--cache-dir", str(cache_dir), "--output-dir", str(output_dir), "--threads", str(args.threads)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                results[mode] = json.loads(out.splitlines()[-1])
+
+            with open(workdir / f"out-{copies}-collect" / "collected.json") as f:
+                expected = json.load(f)["playbooks"]
+            output = workdir / f"out-{copies}-main" / "playbooks.json"
+            with open(output) as f:
+                assert json.load(f)["playbooks"] == expected, f"main's output differs at {copies} copies"
+            rerun = workdir / f"out-{copies}-rerun"
+            with open(rerun / "diff_report.json") as f:
+                assert not any(json.load(f).values()), f"rerun reports changes at {copies} copies"
+            history = History(rerun / "history")
+            assert not history.changes(0, 1)["changes"], f"rerun's history delta has changes at {copies} copies"
+
+            print(f"{copies:>6} {len(expected):>9} {pages:>6} {output.stat().st_size / 1e6:>9.1f}   "
+                  f"{results['collect']['traced']:>12.1f} MB {results['collect']['rss']:>4.0f} MB   "
+                  f"{results['main']['traced']:>9.1f} MB {results['main']['rss']:>4.0f} MB   "
+                  f"{results['rerun']['traced']:>10.1f} MB {results['rerun']['rss']:>4.0f} MB")
+            shutil.rmtree(cache_dir)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Parser micro-benchmark: the original BeautifulSoup extraction versus the
+lxml path in parsing.py, over the fixture site's HTML plus a few edge-case
+pages (fallback layouts, nested lists, repeated groups).
+
+Each path runs in its own subprocess so peak RSS is measured independently.
+"""
+
+import argparse
+import json
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+import scrape_huddle
+from fixture_server import DEFAULT_SOURCE, MADDEN_VERSION, render_site
+from scrape_huddle import determine_formation_group, determine_play_type, slugify
+
+EDGE_CASES = {
+    # Playbook page without <h3> groups: formation group comes from the name
+    "/26/playbooks/edge-off/": """<html><body>
+        <a href="/26/playbooks/edge-off/gun-trips-te/">Gun Trips TE</a>
+        <a href="/26/playbooks/edge-off/i-form-pro/">I-Form Pro</a>
+        <a href="/26/playbooks/edge-off/gun-trips-te/">Gun Trips TE</a>
+        <a href="/26/playbooks/other-off/x/">Other</a>
+        <a>no href</a></body></html>""",
+    # Repeated group header replaces the earlier group; h3 without a ul is skipped
+    "/26/playbooks/edge-def/": """<html><body>
+        <h3>Nickel</h3><p>intro</p><ul><li><a href="/26/playbooks/edge-def/nickel-33/">3-3</a></li></ul>
+        <h3></h3><ul><li><a href="/26/playbooks/edge-def/nope/">skip</a></li></ul>
+        <h3>Dime <!-- note --> <b>Normal</b></h3><ul><li><a href="/26/playbooks/edge-def/dime-normal/">Normal &amp; Co</a></li></ul>
+        <h3>Nickel</h3><ul><li><a href="/26/playbooks/edge-def/nickel-wide/">Wide</a></li></ul>
+        <h3>Orphan</h3></body></html>""",
+    # Formation page without play links: nested ul/li fallback
+    "/26/playbooks/edge-off/gun-trips-te/": """<html><body>
+        <ul><li><a href="/">Home</a></li><li><a href="/26/playbooks/">Playbooks</a></li></ul>
+        <ul><li>PA Boot Over<ul><li>HB Dive</li><li><a href="#">Mesh Spot</a></li></ul></li>
+        <li>  Slot   Cross </li><li>HB Dive</li></ul>
+        <ol><li>Not in a ul</li></ol></body></html>""",
+}
+
+
+def soup_formations(html: str, playbook_slug: str) -> dict:
+    """The original BeautifulSoup formation extraction (without fetching plays)."""
+    soup = BeautifulSoup(html, "lxml")
+    formation_groups = {}
+    for h3 in soup.find_all("h3"):
+        group_name = h3.get_text(strip=True)
+        if not group_name:
+            continue
+        ul = h3.find_next_sibling("ul")
+        if not ul:
+            continue
+        formation_groups[group_name] = []
+        formation_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/([\w-]+)/$"
+        for link in ul.find_all("a", href=re.compile(formation_pattern)):
+            href = link.get("href", "")
+            match = re.search(formation_pattern, href)
+            if match:
+                formation_groups[group_name].append((link.get_text(strip=True), match.group(1)))
+
+    if not formation_groups:
+        formation_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/([\w-]+)/$"
+        for link in soup.find_all("a", href=re.compile(formation_pattern)):
+            href = link.get("href", "")
+            name = link.get_text(strip=True)
+            match = re.search(formation_pattern, href)
+            if match:
+                group_name = determine_formation_group(name, match.group(1))
+                formation_groups.setdefault(group_name, []).append((name, match.group(1)))
+    return formation_groups
+
+
+def soup_plays(html: str, playbook_slug: str, formation_slug: str) -> list[dict]:
+    """The original BeautifulSoup play extraction."""
+    soup = BeautifulSoup(html, "lxml")
+    plays = []
+    play_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/{re.escape(formation_slug)}/([\w-]+)/$"
+    for link in soup.find_all("a", href=re.compile(play_pattern)):
+        play_name = link.get_text(strip=True)
+        match = re.search(play_pattern, link.get("href", ""))
+        if match:
+            plays.append({
+                "id": f"{playbook_slug}-{formation_slug}-{match.group(1)}",
+                "name": play_name,
+                "slug": match.group(1),
+                "type": determine_play_type(play_name),
+            })
+    if not plays:
+        for ul in soup.find_all("ul"):
+            for li in ul.find_all("li"):
+                link = li.find("a")
+                play_name = link.get_text(strip=True) if link else li.get_text(strip=True)
+                if play_name and len(play_name) < 100 and play_name not in ["Home", "Playbooks"]:
+                    play_slug = slugify(play_name)
+                    plays.append({
+                        "id": f"{playbook_slug}-{formation_slug}-{play_slug}",
+                        "name": play_name,
+                        "slug": play_slug,
+                        "type": determine_play_type(play_name),
+                    })
+    seen = set()
+    unique = []
+    for play in plays:
+        if play["id"] not in seen:
+            seen.add(play["id"])
+            unique.append(play)
+    return unique
+
+
+def lxml_formations(html: str, playbook_slug: str) -> dict:
+    groups = scrape_huddle.find_formations(html, {"slug": playbook_slug})
+    return {name: [(f["name"], f["slug"]) for f, _ in entries] for name, entries in groups.items()}
+
+
+def lxml_plays(html: str, playbook_slug: str, formation_slug: str) -> list[dict]:
+    return scrape_huddle.parse_formation_plays(html, playbook_slug, formation_slug)
+
+
+PATHS = {
+    "bs4": (soup_formations, soup_plays),
+    "lxml": (lxml_formations, lxml_plays),
+}
+
+
+def load_pages() -> list[tuple[str, str, str]]:
+    """(kind, path, html) for every fixture page plus the edge cases."""
+    with open(DEFAULT_SOURCE) as f:
+        site = render_site(json.load(f))
+    pages = [(path, body.decode("utf-8")) for path, body in site.items()]
+    pages += list(EDGE_CASES.items())
+
+    result = []
+    for path, html in pages:
+        parts = path.strip("/").split("/")
+        if len(parts) == 3:
+            result.append(("playbook", path, html))
+        elif len(parts) == 4:
+            result.append(("formation", path, html))
+    return result
+
+
+def extract(path_name: str, pages) -> list:
+    formations, plays = PATHS[path_name]
+    out = []
+    for kind, path, html in pages:
+        parts = path.strip("/").split("/")
+        if kind == "playbook":
+            out.append(formations(html, parts[2]))
+        else:
+            out.append(plays(html, parts[2], parts[3]))
+    return out
+
+
+def child(path_name: str, repeat: int):
+    """Time one path and report stats as JSON on stdout."""
+    pages = load_pages()
+    extract(path_name, pages)  # warm up imports and caches
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract(path_name, pages)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    extract(path_name, pages)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "pages": len(pages) * repeat,
+        "seconds": elapsed,
+        "py_peak": peak,
+        "rss_growth": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss) * 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.repeat)
+        return
+
+    pages = load_pages()
+    reference = extract("bs4", pages)
+    fast = extract("lxml", pages)
+    print(f"{len(pages)} pages ({sum(len(h) for _, _, h in pages) / 1e6:.1f} MB of HTML)")
+    print(f"Identical output: {reference == fast}")
+    if reference != fast:
+        for (kind, path, _), a, b in zip(pages, reference, fast):
+            if a != b:
+                print(f"  MISMATCH {path}\n    bs4:  {a}\n    lxml: {b}")
+
+    print(f"\n{'path':<6}  {'pages/s':>9}  {'py heap peak':>12}  {'rss growth':>10}")
+    results = {}
+    for name in PATHS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--repeat", str(args.repeat)],
+            check=True, capture_output=True, text=True
+        )
+        stats = results[name] = json.loads(out.stdout)
+        print(f"{name:<6}  {stats['pages'] / stats['seconds']:>9.0f}  "
+              f"{stats['py_peak'] / 1e6:>10.1f}MB  {stats['rss_growth'] / 1e6:>8.1f}MB")
+
+    speedup = (results["lxml"]["pages"] / results["lxml"]["seconds"]) / (
+        results["bs4"]["pages"] / results["bs4"]["seconds"])
+    print(f"\nlxml path: {speedup:.1f}x pages/s")
+
+
+if __name__ == "__main__":
+    main()
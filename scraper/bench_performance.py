@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Season analytics (performance.py) on a synthetic performance log, against per-row dicts.
+
+A playsheet export is generated in dexie-export-import's format: --sessions
+game sessions and --rows playPerformance rows, whose play ids are drawn
+from the fixture subset's plays with a skewed popularity (a playsheet
+leans on a few dozen calls), plus 1% ids no playbook has. Each row's
+calls, successes and yards come from a per-play success rate and yards
+mean, so the statistics have something to find.
+
+Each mode runs in a fresh process, reporting ingest and aggregation time
+and peak RSS (benchutil.peak_rss):
+
+    dicts   json.load of the whole export, then per row, dict updates of
+            seven running sums for its play, formation group and type
+    numpy   performance.py: rows streamed (iter_batches) into columns, then
+            np.bincount group-bys
+
+Both reports are checked to agree, group by group.
+"""
+
+import argparse
+import json
+import math
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchutil import peak_rss
+from fixture_server import DEFAULT_SOURCE
+from performance import SUMS, Z, PerformanceLog, PlayIndex, analyze, iter_batches
+
+UNKNOWN_SHARE = 0.01
+
+
+def write_export(path: Path, index: PlayIndex, sessions: int, rows: int, seed: int = 0):
+    """A Dexie export of ``sessions`` game sessions and ``rows`` playPerformance rows."""
+    rng = np.random.default_rng(seed)
+    plays = len(index.ids)
+    # Zipf-like popularity over a shuffled play order
+    weights = 1 / np.arange(1, plays + 1) ** 0.8
+    popularity = rng.permutation(weights / weights.sum())
+    rate = rng.uniform(0.3, 0.7, plays)
+    gain = rng.uniform(2, 9, plays)
+
+    play = rng.choice(plays, size=rows, p=popularity)
+    calls = rng.integers(1, 7, size=rows)
+    successes = rng.binomial(calls, rate[play])
+    yards = np.round(rng.normal(gain[play] * calls, 4 * np.sqrt(calls))).astype(np.int64)
+    session = np.sort(rng.integers(1, sessions + 1, size=rows))
+    unknown = rng.random(rows) < UNKNOWN_SHARE
+
+    opponents = ["Cowboys", "Giants", "Commanders", "Bears", "Packers", "Lions", "Vikings", "Rams"]
+    random.seed(seed)
+    with open(path, "w") as f:
+        f.write('{"formatName":"dexie","formatVersion":1,"data":{"databaseName":"GamedayPlaysheet",'
+                '"databaseVersion":3,"tables":[{"name":"gameSessions","schema":"++id,opponent,date,result,notes",'
+                f'"rowCount":{sessions}}},{{"name":"playPerformance","schema":"++id,sessionId,playId,callCount,'
+                f'successCount,yardsGained,notes","rowCount":{rows}}}],"data":[')
+        f.write('{"tableName":"gameSessions","inbound":true,"rows":[')
+        f.write(",".join(
+            json.dumps({"id": i, "opponent": random.choice(opponents),
+                        "date": f"2026-{9 + i * 4 // (sessions + 1):02d}-{1 + i % 28:02d}",
+                        "result": random.choice(["W", "L"]), "notes": ""})
+            for i in range(1, sessions + 1)
+        ))
+        f.write(']},{"tableName":"playPerformance","inbound":true,"rows":[\n')
+        # Python ints format several times faster than NumPy scalars
+        play, calls, successes, yards, session, unknown = (
+            column.tolist() for column in (play, calls, successes, yards, session, unknown))
+        for i in range(rows):
+            play_id = f"custom-play-{play[i]}" if unknown[i] else index.ids[play[i]]
+            f.write(f'{"," if i else ""}{{"id":{i + 1},"sessionId":{session[i]},"playId":"{play_id}",'
+                    f'"callCount":{calls[i]},"successCount":{successes[i]},"yardsGained":{yards[i]},"notes":""}}\n')
+        f.write("]}]}}\n")
+
+
+def dict_analyze(rows: list[dict], index: PlayIndex) -> dict:
+    """The report by per-row dict updates: the loop the bincount group-bys replace."""
+    plays, groups, types = {}, {}, {}
+    sessions = set()
+    unmatched = 0
+    for row in rows:
+        sessions.add(row.get("sessionId") or 0)
+        i = index.rows.get(row.get("playId"))
+        if i is None:
+            unmatched += 1
+            continue
+        c, s, y = row.get("callCount") or 0, row.get("successCount") or 0, row.get("yardsGained") or 0
+        for table, key in ((plays, index.ids[i]), (groups, index.group_names[index.group[i]]),
+                           (types, index.type_names[index.type[i]])):
+            sums = table.get(key)
+            if sums is None:
+                sums = table[key] = dict.fromkeys(SUMS, 0.0)
+            sums["rows"] += 1
+            sums["calls"] += c
+            sums["successes"] += s
+            sums["yards"] += y
+            sums["yards2"] += y * y
+            sums["calls2"] += c * c
+            sums["yardsCalls"] += y * c
+    return {
+        "rows": len(rows), "unmatchedRows": unmatched, "sessions": len(sessions),
+        "plays": {key: dict_statistics(sums) for key, sums in plays.items() if sums["calls"] > 0},
+        "formationGroups": {key: dict_statistics(sums) for key, sums in groups.items() if sums["calls"] > 0},
+        "types": {key: dict_statistics(sums) for key, sums in types.items() if sums["calls"] > 0},
+    }
+
+
+def dict_statistics(sums: dict) -> dict:
+    n, calls = sums["rows"], sums["calls"]
+    rate = min(max(sums["successes"] / calls, 0), 1)
+    z2 = Z * Z / calls
+    center = (rate + z2 / 2) / (1 + z2)
+    half = Z * math.sqrt(rate * (1 - rate) / calls + z2 / (4 * calls)) / (1 + z2)
+    per_call = sums["yards"] / calls
+    residual = sums["yards2"] - 2 * per_call * sums["yardsCalls"] + per_call * per_call * sums["calls2"]
+    se = math.sqrt(max(residual, 0) * n / (n - 1)) / calls if n > 1 else None
+    return {
+        "calls": int(calls), "successRate": rate, "successLow": center - half, "successHigh": center + half,
+        "yardsPerCall": per_call,
+        "yardsLow": None if se is None else per_call - Z * se, "yardsHigh": None if se is None else per_call + Z * se,
+    }
+
+
+def keyed(report: dict) -> dict:
+    """A performance.analyze() report in dict_analyze()'s shape."""
+    fields = ("calls", "successRate", "successLow", "successHigh", "yardsPerCall", "yardsLow", "yardsHigh")
+    return {
+        **{key: report[key] for key in ("rows", "unmatchedRows", "sessions")},
+        "plays": {r["playId"]: {f: r[f] for f in fields} for r in report["plays"]},
+        "formationGroups": {r["name"]: {f: r[f] for f in fields} for r in report["formationGroups"]},
+        "types": {r["name"]: {f: r[f] for f in fields} for r in report["types"]},
+    }
+
+
+def agree(a: dict, b: dict) -> bool:
+    """Same groups and counts; statistics within the report's 4-decimal rounding."""
+    if any(a[key] != b[key] for key in ("rows", "unmatchedRows", "sessions")):
+        return False
+    for level in ("plays", "formationGroups", "types"):
+        if a[level].keys() != b[level].keys():
+            return False
+        for key, stats in a[level].items():
+            for name, value in stats.items():
+                other = b[level][key][name]
+                if (value is None) != (other is None) or (value is not None and abs(value - other) > 1e-4):
+                    return False
+    return True
+
+
+def measure(mode: str, export: Path, index: PlayIndex, report_path: Path) -> dict:
+    """Runs in a child process: ingest and aggregation seconds, peak RSS in MB."""
+    start = time.perf_counter()
+    if mode == "dicts":
+        with open(export) as f:
+            rows = json.load(f)["data"]["data"][1]["rows"]
+        ingested = time.perf_counter()
+        report = dict_analyze(rows, index)
+    else:
+        log = PerformanceLog.read(iter_batches(export, "playPerformance"), index)
+        ingested = time.perf_counter()
+        report = keyed(analyze(log, index))
+    done = time.perf_counter()
+    with open(report_path, "w") as f:
+        json.dump(report, f)
+    return {"ingest": ingested - start, "aggregate": done - ingested, "rss": peak_rss() / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--measure", choices=("dicts", "numpy"), help=argparse.SUPPRESS)
+    parser.add_argument("--export", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--report", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    with open(DEFAULT_SOURCE) as f:
+        start = time.perf_counter()
+        index = PlayIndex.build(json.load(f))
+        build = time.perf_counter() - start
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.export, index, args.report)))
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-performance-"))
+    try:
+        export = workdir / "export.json"
+        write_export(export, index, args.sessions, args.rows)
+        print(f"{args.rows} performance rows over {args.sessions} sessions, {len(index.ids)} plays indexed "
+              f"in {build * 1000:.0f} ms; export {export.stat().st_size / 1e6:.0f} MB\n")
+        print(f"  {'mode':<6} {'ingest':>9} {'aggregate':>10} {'total':>9} {'peak RSS':>9}")
+        results, reports = {}, {}
+        for mode in ("dicts", "numpy"):
+            report = workdir / f"{mode}.json"
+            out = subprocess.run(
+                [sys.executable, __file__, "--measure", mode, "--export", str(export), "--report", str(report)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = r = json.loads(out.splitlines()[-1])
+            with open(report) as f:
+                reports[mode] = json.load(f)
+            print(f"  {mode:<6} {r['ingest']:>7.2f} s {r['aggregate'] * 1000:>7.0f} ms "
+                  f"{r['ingest'] + r['aggregate']:>7.2f} s {r['rss']:>6.0f} MB")
+        assert agree(reports["dicts"], reports["numpy"]), "dicts and numpy reports differ"
+        dicts, fast = results["dicts"], results["numpy"]
+        print(f"\n  aggregation {dicts['aggregate'] / fast['aggregate']:.0f}x faster, "
+              f"end to end {(dicts['ingest'] + dicts['aggregate']) / (fast['ingest'] + fast['aggregate']):.1f}x, "
+              f"peak RSS {dicts['rss'] / fast['rss']:.1f}x lower; reports agree")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Core scaling of the fetch/parse pipeline on a crawl replayed from cached HTML.
+
+The fixture site is crawled once into a temporary response cache; every
+measured run then replays it with no network, so the time is fetching from
+the cache plus parsing. Runs with --parse-workers 0 (parsing on the fetch
+threads) and with growing process pools, checking each produces the same
+playbooks.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import scrape_huddle
+from fixture_server import FixtureServer
+from pipeline import create_parse_pool
+
+
+def crawl(playbooks: list[dict], threads: int) -> list[dict]:
+    with ThreadPoolExecutor(max_workers=threads) as executor, contextlib.redirect_stdout(io.StringIO()):
+        return [scrape_huddle.scrape_playbook(pb, executor) for pb in playbooks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4, help="fetch threads")
+    parser.add_argument("--workers", type=int, nargs="+", help="parse pool sizes (default: 1, 2, 4 .. cpu count)")
+    parser.add_argument("--rounds", type=int, default=3, help="replays per configuration, best is reported")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    sizes = args.workers or sorted({1, 2, *range(4, cpus + 1, 4), cpus})
+    cache_dir = Path(tempfile.mkdtemp(prefix="huddle-pipeline-"))
+    scrape_huddle.rate_limiter.rate = 0
+    try:
+        # Record the site once
+        with FixtureServer() as server:
+            scrape_huddle.BASE_URL = server.url
+            scrape_huddle.enable_cache("revalidate", cache_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                playbooks = scrape_huddle.get_playbook_list()
+            expected = crawl(playbooks, args.threads)
+            pages = server.request_count
+
+        scrape_huddle.enable_cache("replay", cache_dir)
+        print(f"Replaying {pages} cached pages, {args.threads} fetch threads, {cpus} CPU(s)\n")
+        print(f"{'parse workers':<14} {'seconds':>8} {'pages/s':>8} {'speedup':>8}")
+
+        baseline = None
+        for workers in [0] + sizes:
+            scrape_huddle.parse_pool = create_parse_pool(workers) if workers else None
+            try:
+                best = float("inf")
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    result = crawl(playbooks, args.threads)
+                    best = min(best, time.perf_counter() - start)
+                    assert result == expected, f"output differs with {workers} parse workers"
+            finally:
+                if scrape_huddle.parse_pool:
+                    scrape_huddle.parse_pool.shutdown()
+                scrape_huddle.parse_pool = None
+            baseline = baseline or best
+            label = "inline" if workers == 0 else str(workers)
+            print(f"{label:<14} {best:>8.2f} {pages / best:>8.0f} {baseline / best:>7.2f}x")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
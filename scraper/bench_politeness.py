@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare the old fixed-rate, no-retry fetching with the adaptive politeness controller.
+
+Three scenarios against the local fixture server, each crawled both ways:
+
+    healthy   steady latency, no errors: adaptive should finish sooner
+    flaky     a share of requests get 429 with Retry-After
+    outage    every request fails with 503 for a few seconds mid-crawl
+
+Rates are scaled up from the real defaults (0.67 req/s start, 2 req/s
+ceiling) so the benchmark takes seconds rather than minutes. Asserted:
+the adaptive crawls all complete, and a fixed one that doesn't says so.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import politeness
+import scrape_huddle
+from benchutil import use_output_dir
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+
+
+def crawl(server: FixtureServer, out_dir: Path, ids: list[str], adaptive: bool, args) -> dict:
+    """Run main() once; returns timing, request counts and the playbooks written."""
+    scrape_huddle.BASE_URL = server.url
+    use_output_dir(out_dir)
+    scrape_huddle.failed_urls.clear()
+    scrape_huddle.rate_limiter.pause(0)
+    # Old behaviour: one attempt, no breaker
+    scrape_huddle.MAX_RETRIES = politeness.MAX_RETRIES if adaptive else 0
+    scrape_huddle.breaker = politeness.CircuitBreaker(
+        threshold=5 if adaptive else 10 ** 9, cooldown=args.cooldown
+    )
+
+    argv = ["--rate", str(args.rate), "--max-rate", str(args.rate * 3),
+            "--concurrency", str(args.concurrency), "--only", *ids]
+    if not adaptive:
+        argv.append("--fixed-rate")
+
+    server.reset_count()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        status = scrape_huddle.main(argv)
+    elapsed = time.perf_counter() - start
+
+    with open(scrape_huddle.OUTPUT_FILE) as f:
+        playbooks = json.load(f)["playbooks"]
+    shutil.rmtree(out_dir)
+    return {
+        "seconds": elapsed,
+        "requests": server.request_count,
+        "errors": server.error_count,
+        "retries": scrape_huddle.metrics.total("http_retries_total"),
+        "incomplete": status == 1,
+        "playbooks": playbooks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playbooks", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=10.0, help="starting (and fixed) requests/sec")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1, help="429 share in the flaky scenario")
+    parser.add_argument("--outage", type=float, default=3.0, help="outage length in seconds")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="circuit breaker cooldown")
+    args = parser.parse_args()
+
+    with open(DEFAULT_SOURCE) as f:
+        source = json.load(f)["playbooks"][:args.playbooks]
+    ids = [pb["id"] for pb in source]
+
+    scenarios = {
+        "healthy": {},
+        "flaky": {"error_rate": args.error_rate, "error_status": 429, "retry_after": 1},
+        "outage": {},
+    }
+
+    print(f"{len(ids)} playbooks, rate {args.rate}/s (adaptive ceiling {args.rate * 3}/s), "
+          f"concurrency {args.concurrency}, latency {args.latency}s\n")
+    print(f"{'scenario':<9} {'mode':<9} {'seconds':>8} {'requests':>9} {'errors':>7} "
+          f"{'retries':>8} {'plays':>6}  complete")
+
+    total_plays = sum(len(f["plays"]) for pb in source for g in pb["formationGroups"] for f in g["formations"])
+    for name, settings in scenarios.items():
+        for adaptive in (False, True):
+            with FixtureServer(latency=args.latency, **settings) as server:
+                if name == "outage":
+                    # Start failing shortly into the crawl, recover after args.outage seconds
+                    def outage(server=server):
+                        time.sleep(1.0)
+                        server.configure(error_rate=1.0, error_status=503)
+                        time.sleep(args.outage)
+                        server.configure(error_rate=0.0)
+                    threading.Thread(target=outage, daemon=True).start()
+                result = crawl(server, Path(tempfile.mkdtemp(prefix="huddle-polite-")), ids, adaptive, args)
+
+            plays = sum(
+                len(f["plays"]) for pb in result["playbooks"]
+                for g in pb["formationGroups"] for f in g["formations"]
+            )
+            complete = result["playbooks"] == source
+            flag = "yes" if complete else ("no, reported" if result["incomplete"] else "no, SILENT")
+            print(f"{name:<9} {'adaptive' if adaptive else 'fixed':<9} {result['seconds']:8.2f} "
+                  f"{result['requests']:9d} {result['errors']:7d} {result['retries']:8.0f} "
+                  f"{plays:>3}/{total_plays}  {flag}")
+            assert complete or result["incomplete"], f"{name}: an incomplete crawl went unreported"
+            assert complete or not adaptive, f"{name}: the adaptive crawl is incomplete"
+
+
+if __name__ == "__main__":
+    main()
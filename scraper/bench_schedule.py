@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+What a time-budgeted crawl gets done, in priority order against site order.
+
+The fixture subset is served with per-response latency and crawled once in
+full, which gives every playbook a duration in schedule.json and a previous
+output to fall back on. The schedule is then seeded with made-up history
+(ages of 0.5-20 days, change counts) and one --hot playbook near the end of
+the site, and the crawl is rerun under --time-budget:
+
+    priority   scrape_huddle.main() as is, highest score first
+    site       the same with Schedule.order() left out, i.e. site order
+
+and once more with no durations in schedule.json, no hot list and a budget
+of half an average playbook, so with no duration to go on the deadline
+stops the first playbook partway. That schedule holds only made-up
+per-formation churn, and the formations finished before the deadline have
+to be the first ones by Schedule.formation_score(), not by page order.
+
+Value is the sum of the seeded scores, less the hot bonus (reported on its
+own), of the playbooks refreshed within the budget. Each partial
+playbooks.json is checked: every playbook in site order, each one either
+freshly scraped or its previous version unchanged. Finally each run is
+resumed with no budget, which has to give the full crawl back and fetch
+none of the formations that a playbook cut off by the deadline had
+already finished.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import scrape_huddle
+from benchutil import use_output_dir
+from fixture_server import FixtureServer
+from schedule import DAY, HOT_BONUS, FormationHistory, PlaybookHistory, Schedule, formations_of
+
+MARKER = "previousRun"
+
+
+def run(output_dir: Path, base_url: str, site_order: bool, rest: list[str]) -> float:
+    """Runs in a child process; returns main()'s wall time."""
+    use_output_dir(output_dir)
+    scrape_huddle.BASE_URL = base_url
+    if site_order:
+        import schedule
+        schedule.Schedule.order = lambda self, playbooks: list(playbooks)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        scrape_huddle.main(["--cache", "off", "--rate", "0", *rest])
+    return time.perf_counter() - start
+
+
+def crawl(server: FixtureServer, output_dir: Path, *args: str, site_order: bool = False) -> float:
+    cmd = [sys.executable, __file__, "--run", "--base-url", server.url, "--output-dir", str(output_dir)]
+    out = subprocess.run(cmd + (["--site-order"] if site_order else []) + ["--", *args],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def seed(schedule: Schedule, site: list[str], now: float) -> str:
+    """Give the schedule varied history; returns the playbook made hot."""
+    rng = random.Random(0)
+    for pb_id in site:
+        entry = schedule.playbooks[pb_id]
+        entry.last_scraped = now - rng.uniform(0.5, 20) * DAY
+        entry.scrapes = rng.randint(2, 20)
+        entry.changes = rng.randint(0, entry.scrapes)
+    hot = site[-2]
+    schedule.hot = {hot}
+    schedule.save()
+    return hot
+
+
+def seed_formations(schedule: Schedule, full: list[dict]):
+    """Replace the schedule's history with per-formation churn alone: no durations, never scraped."""
+    rng = random.Random(1)
+    for pb in full:
+        formations = {}
+        for formation in formations_of(pb):
+            scrapes = rng.randint(2, 20)
+            formations[formation["slug"]] = FormationHistory(scrapes, rng.randint(0, scrapes))
+        schedule.playbooks[pb["id"]] = PlaybookHistory(formations=formations)
+    schedule.save()
+
+
+def check_formation_order(journal: Path, schedule: Schedule, full: list[dict]) -> int:
+    """The journaled formations of the playbook cut off must lead its priority order; returns how many."""
+    with open(journal) as f:
+        records = [json.loads(line) for line in f]
+    (pb_id,) = {r["playbook"] for r in records}
+    pb = next(pb for pb in full if pb["id"] == pb_id)
+    ranked = sorted((f["slug"] for f in formations_of(pb)), key=lambda slug: -schedule.formation_score(pb_id, slug))
+    journaled = [r["url"].rstrip("/").rsplit("/", 1)[1] for r in records]
+    assert journaled == ranked[:len(journaled)], f"{pb_id}: formations not fetched in priority order"
+    assert ranked[:len(journaled)] != [f["slug"] for f in formations_of(pb)][:len(journaled)], "page order too"
+    return len(journaled)
+
+
+def read_playbooks(path: Path) -> list[dict]:
+    with open(path) as f:
+        return json.load(f)["playbooks"]
+
+
+def check_partial(out_dir: Path, seeded: Schedule, full: list[dict]) -> list[str]:
+    """Check a budgeted run's output; returns the ids it refreshed, in site order."""
+    after = Schedule(out_dir / "schedule.json").playbooks
+    refreshed = [pb["id"] for pb in full
+                 if pb["id"] in after and after[pb["id"]].last_scraped > seeded.playbooks[pb["id"]].last_scraped]
+    partial = read_playbooks(out_dir / "playbooks.json")
+    assert [pb["id"] for pb in partial] == [pb["id"] for pb in full], f"{out_dir.name}: playbooks missing"
+    for pb, expected in zip(partial, full):
+        if pb["id"] not in refreshed:
+            expected = {**expected, MARKER: True}
+        assert pb == expected, f"{out_dir.name}: {pb['id']} is neither fresh nor its previous version"
+    return refreshed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="fixture server response delay")
+    parser.add_argument("--budget", type=float, default=0.4, help="time budget as a fraction of a full crawl")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--site-order", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", type=Path, help=argparse.SUPPRESS)
+    args, rest = parser.parse_known_args()
+
+    if args.run:
+        print(json.dumps(run(args.output_dir, args.base_url, args.site_order, rest[1:])))
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-schedule-"))
+    try:
+        with FixtureServer(latency=args.latency) as server:
+            full_dir = workdir / "full"
+            full_dir.mkdir()
+            full_seconds = crawl(server, full_dir)
+            full_pages = server.request_count
+            full = read_playbooks(full_dir / "playbooks.json")
+            site = [pb["id"] for pb in full]
+
+            now = time.time()
+            seeded = Schedule(full_dir / "schedule.json", now=now)
+            hot = seed(seeded, site, now)
+            scores = {pb_id: seeded.score(pb_id) - (pb_id == hot) * HOT_BONUS for pb_id in site}
+            budget = full_seconds * args.budget
+            print(f"{len(site)} playbooks, {full_pages} pages, {args.latency * 1000:.0f} ms latency: "
+                  f"full crawl {full_seconds:.2f} s, budget {budget:.2f} s, hot {hot}")
+            print(f"{'order':<9} {'seconds':>7} {'refreshed':>9} {'hot':>4} {'value':>7} {'of total':>8}   ids")
+
+            dirs = {}
+            for mode in ("priority", "site", "cold"):
+                out_dir = dirs[mode] = workdir / mode
+                shutil.copytree(full_dir, out_dir)
+                # Previous versions are marked so the check can tell them from fresh ones
+                with open(out_dir / "playbooks.json", "w") as f:
+                    json.dump({"playbooks": [{**pb, MARKER: True} for pb in full]}, f)
+                if mode == "cold":
+                    seed_formations(Schedule(out_dir / "schedule.json"), full)
+                    mode_budget = full_seconds / len(site) / 2
+                else:
+                    mode_budget = budget
+
+                hot_args = [] if mode == "cold" else ["--hot", hot]
+                seconds = crawl(server, out_dir, *hot_args, "--time-budget", str(mode_budget / 60),
+                                site_order=mode == "site")
+                refreshed = check_partial(out_dir, seeded, full)
+                if mode == "cold":
+                    ranked = check_formation_order(out_dir / scrape_huddle.JOURNAL_FILE.name,
+                                                   Schedule(out_dir / "schedule.json"), full)
+                    print(f"\ncold, {mode_budget:.2f} s budget: {seconds:.2f} s, {len(refreshed)} refreshed, "
+                          f"{ranked} formation(s) finished, highest churn first")
+                    continue
+                value = sum(scores[pb_id] for pb_id in refreshed)
+                print(f"{mode:<9} {seconds:>7.2f} {len(refreshed):>9} {'yes' if hot in refreshed else 'no':>4} "
+                      f"{value:>7.1f} {value / sum(scores.values()):>8.0%}   {' '.join(refreshed)}")
+
+            # Resume: each journal holds just the formations of a playbook cut off by the deadline
+            for mode, out_dir in dirs.items():
+                journal = out_dir / scrape_huddle.JOURNAL_FILE.name
+                kept = 0
+                if journal.exists():
+                    with open(journal) as f:
+                        records = [json.loads(line) for line in f]
+                    assert all(r["kind"] == "formation" for r in records)
+                    kept = len(records)
+                server.reset_count()
+                crawl(server, out_dir)
+                assert read_playbooks(out_dir / "playbooks.json") == full, f"{mode}: resumed output differs"
+                assert server.request_count == full_pages - kept, (mode, server.request_count, full_pages, kept)
+                print(f"{mode} resumed without a budget: full output, "
+                      f"{kept} journaled formation(s) not fetched again")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
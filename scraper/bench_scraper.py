@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Offline scraper benchmark suite.
+
+Serves a rendered or recorded site from the local fixture server and times
+three stages, each in a fresh subprocess so peak RSS is measured separately:
+
+    playbook_list    get_playbook_list()
+    scrape_playbook  scrape_playbook() over the first --playbooks playbooks
+    pipeline         the full main() run (restricted to the same playbooks)
+
+For each stage it reports wall time, requests/sec, parse CPU per page,
+peak RSS and output bytes. Results can be saved as a baseline and later
+runs compared against it:
+
+    python bench_scraper.py --save-baseline output/bench_baseline.json
+    python bench_scraper.py --compare output/bench_baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fixture_server import DEFAULT_SOURCE, FixtureServer
+
+STAGES = ("playbook_list", "scrape_playbook", "pipeline")
+
+
+class ParseTimer:
+    """Accumulate per-thread CPU time spent in the scraper's parse functions."""
+
+    def __init__(self):
+        self.cpu = 0.0
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def timed(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - start
+                with self._lock:
+                    self.cpu += elapsed
+                    self.pages += 1
+        return timed
+
+
+def run_stage(stage: str, base_url: str, args) -> dict:
+    """Run one stage in this process and return its measurements."""
+    import scrape_huddle
+    from benchutil import use_output_dir
+
+    out_dir = Path(tempfile.mkdtemp(prefix="huddle-bench-"))
+    scrape_huddle.BASE_URL = base_url
+    use_output_dir(out_dir)
+    scrape_huddle.rate_limiter.rate = args.rate
+
+    timer = ParseTimer()
+    for name in ("parse_playbook_list", "find_formations", "parse_formation_plays"):
+        setattr(scrape_huddle, name, timer.wrap(getattr(scrape_huddle, name)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        playbooks = scrape_huddle.get_playbook_list()[:args.playbooks]
+    # Only count the stage itself
+    timer.cpu, timer.pages = 0.0, 0
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage == "playbook_list":
+            output = json.dumps(scrape_huddle.get_playbook_list(), indent=2).encode()
+            output_bytes = len(output)
+        elif stage == "scrape_playbook":
+            results = [scrape_huddle.scrape_playbook(pb) for pb in playbooks]
+            output_bytes = len(json.dumps(results, indent=2).encode())
+        else:
+            scrape_huddle.main([
+                "--rate", str(args.rate), "--concurrency", str(args.concurrency),
+                "--only", *[pb["id"] for pb in playbooks],
+            ])
+            output_bytes = sum(p.stat().st_size for p in out_dir.rglob("*") if p.is_file())
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    result = {
+        "seconds": elapsed,
+        "cpu_seconds": cpu,
+        "parse_cpu": timer.cpu,
+        "pages_parsed": timer.pages,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "output_bytes": output_bytes,
+    }
+    if stage == "pipeline":
+        with open(scrape_huddle.OUTPUT_FILE) as f:
+            result["playbooks"] = json.load(f)["playbooks"]
+    shutil.rmtree(out_dir)
+    return result
+
+
+def format_row(stage: str, r: dict) -> str:
+    per_page = r["parse_cpu"] / r["pages_parsed"] * 1000 if r["pages_parsed"] else 0.0
+    return (
+        f"{stage:<16} {r['requests']:>8} {r['seconds']:>8.2f} {r['requests'] / r['seconds']:>8.1f} "
+        f"{per_page:>10.2f} {r['peak_rss'] / 1e6:>9.1f} {r['output_bytes'] / 1024:>9.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE, help="scrape JSON or recorded *.json.gz")
+    parser.add_argument("--playbooks", type=int, default=10, help="playbooks to scrape in the later stages")
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int)
+    parser.add_argument("--rate", type=float, default=0, help="scraper rate limit, 0 for none")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrency for the pipeline stage")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--save-baseline", type=Path, help="write results to this file")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_stage(args.child, args.base_url, args)))
+        return
+
+    server = FixtureServer(
+        args.source, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, retry_after=args.retry_after
+    )
+    print(f"Site: {args.source.name} ({server.page_count} pages), latency={args.latency}s "
+          f"jitter={args.jitter}s error_rate={args.error_rate} rate={args.rate or 'unlimited'}")
+    print(f"\n{'stage':<16} {'requests':>8} {'seconds':>8} {'req/s':>8} "
+          f"{'parse ms/pg':>10} {'RSS MB':>9} {'output KB':>9}")
+
+    results = {}
+    with server:
+        for stage in args.stages:
+            server.reset_count()
+            server.configure(seed=0)
+            child_args = [
+                sys.executable, __file__, "--child", stage, "--base-url", server.url,
+                "--playbooks", str(args.playbooks), "--rate", str(args.rate),
+                "--concurrency", str(args.concurrency),
+            ]
+            out = subprocess.run(child_args, check=True, capture_output=True, text=True)
+            result = json.loads(out.stdout)
+            result["requests"] = server.request_count
+            result["errors_injected"] = server.error_count
+            results[stage] = result
+            print(format_row(stage, result))
+
+    if "pipeline" in results and not args.source.name.endswith(".json.gz"):
+        with open(args.source) as f:
+            expected = json.load(f)["playbooks"]
+        wanted = {pb["id"] for pb in results["pipeline"]["playbooks"]}
+        expected = [pb for pb in expected if pb["id"] in wanted]
+        complete = results["pipeline"]["playbooks"] == expected
+        print(f"\nPipeline output matches source: {complete} "
+              f"({results['pipeline']['errors_injected']} errors injected)")
+    for result in results.values():
+        result.pop("playbooks", None)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange vs {args.compare.name} (time, requests, RSS):")
+        for stage, r in results.items():
+            b = baseline.get(stage)
+            if b:
+                print(f"  {stage:<16} {r['seconds'] / b['seconds'] - 1:+7.1%} "
+                      f"{r['requests'] - b['requests']:+6d} {r['peak_rss'] / b['peak_rss'] - 1:+7.1%}")
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Compare search index query latency with the linear scan searchPlays() does today."""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from benchutil import DEFAULT_INPUT, scale, timeit
+from search_index import SearchIndex, build_index, iter_plays
+
+QUERIES = ["pa", "hb", "boot", "hb dive", "mesh", "cover 3", "stretch", "four verticals", "qb", "zzz"]
+
+
+def linear_search(data: dict, query: str, type=None, playbook_id=None, limit=50) -> list[int]:
+    """Port of searchPlays(): scan every play, returning ordinals instead of objects."""
+    query = query.lower()
+    results = []
+    for ordinal, (pb, _, _, play) in enumerate(iter_plays(data)):
+        if type and pb["type"] != type:
+            continue
+        if playbook_id and pb["id"] != playbook_id:
+            continue
+        if query in play["name"].lower():
+            results.append(ordinal)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--copies", type=int, default=10, help="repeat the input this many times")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = scale(json.load(f), args.copies)
+
+    start = time.perf_counter()
+    raw = build_index(data)
+    build_time = time.perf_counter() - start
+    encoded = json.dumps(raw, separators=(",", ":"))
+    index = SearchIndex(json.loads(encoded))
+    plays = sum(1 for _ in iter_plays(data))
+    print(f"{len(data['playbooks'])} playbooks, {plays} plays, {len(index.names)} distinct names")
+    print(f"Index: built in {build_time * 1000:.0f} ms, {len(encoded) / 1024:.0f} KB\n")
+
+    print(f"{'query':<16} {'filter':<11} {'hits':>5}  {'scan ms':>8}  {'index ms':>8}  {'speedup':>7}")
+    for query in QUERIES:
+        for type in (None, "defense"):
+            for limit in (50, None):
+                expected = linear_search(data, query, type, limit=limit or len(encoded))
+                got = index.search(query, type=type, limit=limit)
+                assert got == expected, f"mismatch for {query!r} type={type} limit={limit}"
+                scan = timeit(lambda: linear_search(data, query, type, limit=limit or len(encoded)), args.repeat)
+                indexed = timeit(lambda: index.search(query, type=type, limit=limit), args.repeat)
+                label = (type or "all") + ("" if limit else ",all")
+                print(f"{query!r:<16} {label:<11} {len(got):>5}  {scan * 1000:>8.3f}  "
+                      f"{indexed * 1000:>8.3f}  {scan / indexed:>6.0f}x")
+
+    print("\nAll index results match the linear scan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Set queries with NumPy bitsets (similarity.PlaybookSets) against Python loops.
+
+The site has about 80 playbooks; the fixture subset has 10. It is scaled
+to --copies times its size (benchutil.scale_site), every copy after
+the first with a seeded --drop share of its plays removed, so the books
+are alike without being identical. Timed, best of --repeat:
+
+    all-pairs Jaccard   naive: per pair, walk both books' trees into key
+                        sets (the nested loops this replaces); sets: the
+                        key sets built once, then per-pair set operations;
+                        numpy: PlaybookSets.jaccard()
+    containing          books with all of three plays in Gun
+    top-k               the 5 books most like one book
+
+The NumPy build (PlaybookSets()) is timed on its own; every answer is
+checked against the naive one.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from benchutil import scale_site
+from fixture_server import DEFAULT_SOURCE
+from similarity import PlaybookSets, normalize
+
+QUERY = ["INSIDE ZONE", "HB SLIP SCREEN", "READ OPTION"]
+QUERY_GROUP = "Gun"
+
+
+def keys(pb: dict) -> set[tuple[str, str, str]]:
+    return {
+        (normalize(group["name"]), normalize(formation["name"]), normalize(play["name"]))
+        for group in pb["formationGroups"]
+        for formation in group["formations"]
+        for play in formation["plays"]
+    }
+
+
+def jaccard(a: set, b: set) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def naive_jaccard(playbooks: list[dict]) -> list[list[float]]:
+    return [[jaccard(keys(a), keys(b)) for b in playbooks] for a in playbooks]
+
+
+def sets_jaccard(playbooks: list[dict]) -> list[list[float]]:
+    key_sets = [keys(pb) for pb in playbooks]
+    return [[jaccard(a, b) for b in key_sets] for a in key_sets]
+
+
+def naive_containing(playbooks: list[dict], plays: list[str], group_name: str) -> list[str]:
+    found = []
+    for pb in playbooks:
+        have = set()
+        for group in pb["formationGroups"]:
+            if normalize(group["name"]) == normalize(group_name):
+                for formation in group["formations"]:
+                    for play in formation["plays"]:
+                        have.add(normalize(play["name"]))
+        if all(normalize(play) in have for play in plays):
+            found.append(pb["id"])
+    return found
+
+
+def naive_similar(playbooks: list[dict], playbook_id: str, k: int) -> list[tuple[str, float]]:
+    target = next(pb for pb in playbooks if pb["id"] == playbook_id)
+    scores = [
+        (pb["id"], jaccard(keys(target), keys(pb)))
+        for pb in playbooks
+        if pb["id"] != playbook_id and pb["type"] == target["type"]
+    ]
+    return sorted(scores, key=lambda item: -item[1])[:k]
+
+
+def best(fn, repeat: int) -> tuple[float, object]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=8)
+    parser.add_argument("--drop", type=float, default=0.2, help="share of plays dropped from each copy")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(DEFAULT_SOURCE) as f:
+        subset = json.load(f)
+    data = scale_site(subset, args.copies)
+    rng = random.Random(0)
+    for pb in data["playbooks"][len(subset["playbooks"]):]:
+        for group in pb["formationGroups"]:
+            for formation in group["formations"]:
+                formation["plays"] = [play for play in formation["plays"] if rng.random() >= args.drop]
+    playbooks = data["playbooks"]
+    target = playbooks[len(subset["playbooks"]) + 5]["id"]
+
+    build, sets = best(lambda: PlaybookSets(data), args.repeat)
+    plays = sum(len(f["plays"]) for pb in playbooks for g in pb["formationGroups"] for f in g["formations"])
+    print(f"{len(playbooks)} playbooks, {plays} plays, {len(sets.keys)} distinct keys, "
+          f"{sets.bits.nbytes / 1024:.0f} KB of bitsets; build {build * 1000:.1f} ms\n")
+    print(f"  {'query':<20} {'naive':>10} {'sets':>10} {'numpy':>10} {'speedup':>8}")
+
+    naive, expected = best(lambda: naive_jaccard(playbooks), 1)
+    by_sets, from_sets = best(lambda: sets_jaccard(playbooks), args.repeat)
+    fast, matrix = best(sets.jaccard, args.repeat)
+    assert np.allclose(matrix, expected) and np.allclose(matrix, from_sets)
+    print(f"  {'all-pairs Jaccard':<20} {naive * 1000:>8.0f} ms {by_sets * 1000:>7.0f} ms {fast * 1000:>7.1f} ms "
+          f"{naive / fast:>7.0f}x")
+
+    naive, expected = best(lambda: naive_containing(playbooks, QUERY, QUERY_GROUP), args.repeat)
+    fast, found = best(lambda: sets.containing(QUERY, "all", QUERY_GROUP), args.repeat)
+    assert found == expected, (found, expected)
+    print(f"  {'containing (all 3)':<20} {naive * 1000:>8.1f} ms {'':>10} {fast * 1000:>7.2f} ms "
+          f"{naive / fast:>7.0f}x   {len(found)} books")
+
+    naive, expected = best(lambda: naive_similar(playbooks, target, 5), args.repeat)
+    fast, found = best(lambda: sets.similar(target, 5), args.repeat)
+    assert [pb_id for pb_id, _ in found] == [pb_id for pb_id, _ in expected], (found, expected)
+    print(f"  {'top-5 similar':<20} {naive * 1000:>8.1f} ms {'':>10} {fast * 1000:>7.2f} ms "
+          f"{naive / fast:>7.0f}x   {target}: {found[0][0]} {found[0][1]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Requests spent on discovery: following links against a sitemap with <lastmod>.
+
+1. Parsing: a synthetic sitemap at the 50,000-URL limit, read with
+   sitemap.iter_sitemap (incremental) and as a whole tree, <lastmod>s
+   parsed either way; best time of 3, then peak Python memory in a
+   separate traced run.
+2. Crawling: the fixture subset is crawled once in full. The site is then
+   edited (bench_incremental's edits, plus a play added to a formation,
+   which touches that formation's page only) and served with a sitemap
+   whose <lastmod> moves for exactly the pages that changed. The first
+   crawl is dated two hours back and the edits one hour back, clear of
+   sitemap.LASTMOD_SLACK. From the first crawl's state, one re-crawl per
+   mode:
+
+       links         a plain full crawl, the reference output
+       incremental   --incremental: fetches formations new or changed on
+                     their playbook page, so it misses plays edited inside
+                     an unchanged formation
+       revalidate    --incremental --revalidate: requests every page (its
+                     cache is empty here, so every page is downloaded)
+       sitemap       --sitemap
+       no sitemap    --sitemap against the site without one: falls back
+       unchanged     --sitemap again after the sitemap run, no edits
+
+   Requests are counted at the server and every output is compared with
+   the reference; all but incremental's must match it. The sitemap runs
+   may fetch no page but the index, the sitemap files and changed pages.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import scrape_huddle
+from benchutil import edit_site, use_output_dir
+from fixture_server import DEFAULT_SOURCE, FixtureServer, SITEMAP_NS, render_site
+from schedule import Schedule
+from sitemap import iter_sitemap, parse_lastmod
+
+SITEMAP_URLS = 50_000
+
+
+def synthetic_sitemap(count: int) -> bytes:
+    urls = "".join(
+        f"<url><loc>https://huddle.gg/26/playbooks/pb-{i // 5000}-off/formation-{i // 50}/play-{i}/</loc>"
+        f"<lastmod>2026-09-{1 + i % 28:02d}T12:00:00+00:00</lastmod></url>\n"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n{urls}</urlset>\n'.encode()
+
+
+def measure_parse(label: str, parse, data: bytes):
+    seconds = []
+    for _ in range(3):
+        start = time.perf_counter()
+        count = parse(data)
+        seconds.append(time.perf_counter() - start)
+    seconds = min(seconds)
+    # Traced separately: tracemalloc slows allocation-heavy code several times over
+    tracemalloc.start()
+    parse(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} {count:>7} urls {seconds * 1000:>7.0f} ms {peak / 1e6:>7.1f} MB peak")
+    return count
+
+
+def parse_tree(data: bytes) -> int:
+    ns = f"{{{SITEMAP_NS}}}"
+    root = ET.fromstring(data)
+    return sum(1 for url in root.iter(f"{ns}url") if parse_lastmod(url.findtext(f"{ns}lastmod")) is not None)
+
+
+def edit_formation(data: dict) -> dict:
+    """A play added to one of Bills' formations: its page changes, the playbook page doesn't."""
+    data = copy.deepcopy(data)
+    bills = next(pb for pb in data["playbooks"] if pb["id"] == "bills-off")
+    formation = bills["formationGroups"][0]["formations"][0]
+    formation["plays"].append({
+        "id": f"bills-off-{formation['slug']}-pa-boot-over", "name": "PA BOOT OVER",
+        "slug": "pa-boot-over", "type": "pass",
+    })
+    return data
+
+
+def crawl(server: FixtureServer, out_dir: Path, argv: list[str]) -> tuple[int, list[dict]]:
+    """Requests made and playbooks written by one run of main()."""
+    scrape_huddle.BASE_URL = server.url
+    use_output_dir(out_dir)
+    server.reset_count()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        scrape_huddle.main(["--rate", "0", *argv])
+    with open(out_dir / "playbooks.json") as f:
+        return server.request_count, json.load(f)["playbooks"]
+
+
+def main():
+    data = synthetic_sitemap(SITEMAP_URLS)
+    print(f"Parsing a {len(data) / 1e6:.1f} MB sitemap:")
+    streamed = measure_parse("iter_sitemap", lambda d: sum(1 for _ in iter_sitemap(d)), data)
+    assert streamed == measure_parse("ElementTree.fromstring", parse_tree, data) == SITEMAP_URLS
+
+    with open(DEFAULT_SOURCE) as f:
+        original = json.load(f)
+    edited = edit_formation(edit_site(original))
+
+    tmp = Path(tempfile.mkdtemp(prefix="huddle-sitemap-"))
+    try:
+        edited_source = tmp / "edited.json"
+        with open(edited_source, "w") as f:
+            json.dump(edited, f)
+        # Every page last modified a day ago, except the ones the edits changed an hour ago
+        before, after = render_site(original), render_site(edited)
+        now = time.time()
+        lastmod = {path: now - (24 if before.get(path) == body else 1) * 3600 for path, body in after.items()}
+        changed = sum(1 for path, body in after.items() if before.get(path) != body)
+
+        first = tmp / "first"
+        first.mkdir()
+        with FixtureServer(sitemap=True, lastmod={path: now - 24 * 3600 for path in before}) as server:
+            crawl(server, first, [])
+        schedule = Schedule(first / "schedule.json")
+        for entry in schedule.playbooks.values():
+            entry.last_scraped -= 2 * 3600
+            entry.fresh_as_of -= 2 * 3600
+        schedule.save()
+
+        results = {}
+        with FixtureServer(edited_source, sitemap=True, lastmod=lastmod) as server, \
+                FixtureServer(edited_source) as bare:
+            for mode, target, argv in [
+                ("links", server, []),
+                ("incremental", server, ["--incremental"]),
+                ("revalidate", server, ["--incremental", "--revalidate"]),
+                ("sitemap", server, ["--sitemap"]),
+                ("no sitemap", bare, ["--sitemap"]),
+            ]:
+                out_dir = tmp / mode
+                shutil.copytree(first, out_dir)
+                results[mode] = crawl(target, out_dir, argv)
+            results["unchanged"] = crawl(server, tmp / "sitemap", ["--sitemap"])
+            sitemap_files = sum(1 for path in server._server.pages if path.endswith(".xml"))
+
+        reference = results["links"][1]
+        print(f"\n{len(after)} pages, {changed} changed by the edits, {sitemap_files} sitemap files")
+        print(f"  {'mode':<12} {'requests':>8} {'saved':>6} {'at 1.5 s/req':>12}   output")
+        for mode, (requests, playbooks) in results.items():
+            saved = results["links"][0] - requests
+            same = "same as links" if playbooks == reference else "DIFFERS from links"
+            print(f"  {mode:<12} {requests:>8} {saved:>6} {saved * scrape_huddle.DELAY_BETWEEN_REQUESTS:>10.0f} s"
+                  f"   {same}")
+            assert mode == "incremental" or playbooks == reference, f"{mode}: output differs from links"
+        # The sitemap run fetches the index, its sitemap files and the changed pages
+        assert results["sitemap"][0] <= 1 + sitemap_files + changed, f"sitemap made {results['sitemap'][0]} requests"
+        assert results["unchanged"][0] <= 1 + sitemap_files, f"unchanged made {results['unchanged'][0]} requests"
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compare answering questions and merging a re-scraped playbook with the
+SQLite store against doing the same on playbooks.json.
+
+The JSON side pays for loading the document, as any script asking a
+question of playbooks.json does today; the store side opens the database
+and runs one query.
+"""
+
+import argparse
+import itertools
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchutil import DEFAULT_INPUT, scale, timeit
+from fileutil import write_json_atomic
+from search_index import iter_plays
+from store import PlaybookStore
+
+
+def json_playbooks_with(path: Path, query: str) -> list[str]:
+    with open(path) as f:
+        data = json.load(f)
+    query = query.lower()
+    found = []
+    for pb, _, _, play in iter_plays(data):
+        if query in play["name"].lower() and (not found or found[-1] != pb["id"]):
+            found.append(pb["id"])
+    return found
+
+
+def json_count(path: Path, play_type: str, group: str) -> int:
+    with open(path) as f:
+        data = json.load(f)
+    return sum(1 for _, g, _, play in iter_plays(data) if play["type"] == play_type and g["name"] == group)
+
+
+def json_merge(path: Path, playbook: dict):
+    with open(path) as f:
+        data = json.load(f)
+    data["playbooks"] = [playbook if pb["id"] == playbook["id"] else pb for pb in data["playbooks"]]
+    write_json_atomic(path, data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--copies", type=int, default=10, help="repeat the input this many times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = scale(json.load(f), args.copies)
+    plays = sum(1 for _ in iter_plays(data))
+
+    workdir = Path(tempfile.mkdtemp(prefix="huddle-store-"))
+    try:
+        json_path, db_path = workdir / "playbooks.json", workdir / "playbooks.db"
+        write_json_atomic(json_path, data)
+
+        start = time.perf_counter()
+        with PlaybookStore(db_path) as store:
+            store.upsert_playbooks(data["playbooks"], data)
+        import_seconds = time.perf_counter() - start
+        with PlaybookStore(db_path) as store:
+            start = time.perf_counter()
+            exported = store.export()
+            export_seconds = time.perf_counter() - start
+        assert exported == data, "export does not match the imported document"
+
+        print(f"{len(data['playbooks'])} playbooks, {plays} plays; "
+              f"JSON {json_path.stat().st_size / 1024:.0f} KB, database {db_path.stat().st_size / 1024:.0f} KB")
+        print(f"Full import {import_seconds * 1000:.0f} ms, export to playbooks.json schema "
+              f"{export_seconds * 1000:.0f} ms\n")
+
+        def store_query(fn):
+            with PlaybookStore(db_path) as store:
+                return fn(store)
+
+        # A changed playbook, as a partial re-scrape would produce. Alternate it
+        # with the original so every merge really rewrites the playbook.
+        original = data["playbooks"][len(data["playbooks"]) // 2]
+        changed = json.loads(json.dumps(original))
+        changed["formationGroups"][0]["formations"][0]["plays"].pop()
+        json_versions, store_versions = itertools.cycle([changed, original]), itertools.cycle([changed, original])
+
+        cases = [
+            ('playbooks with "PA BOOT"',
+             lambda: json_playbooks_with(json_path, "PA BOOT"),
+             lambda: store_query(lambda s: s.playbooks_with_play("PA BOOT"))),
+            ("run plays in Gun",
+             lambda: json_count(json_path, "run", "Gun"),
+             lambda: store_query(lambda s: s.count_plays("run", "Gun"))),
+            ("merge one re-scraped playbook",
+             lambda: json_merge(json_path, next(json_versions)),
+             lambda: store_query(lambda s: s.upsert_playbooks([next(store_versions)]))),
+        ]
+        print(f"{'operation':<32} {'JSON ms':>9} {'store ms':>9} {'speedup':>8}")
+        for label, on_json, on_store in cases:
+            if "merge" not in label:
+                assert on_json() == on_store(), f"{label}: answers differ"
+            json_time, store_time = timeit(on_json, args.repeat), timeit(on_store, args.repeat)
+            print(f"{label:<32} {json_time * 1000:>9.1f} {store_time * 1000:>9.2f} {json_time / store_time:>7.0f}x")
+
+        with open(json_path) as f:
+            merged = json.load(f)
+        assert store_query(lambda s: s.export()) == merged, "merged store differs from merged JSON"
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Transport cost per page: bytes on the wire, client CPU, and connection reuse.
+
+1. Wire bytes per page for each content coding the fixture server offers.
+2. Client CPU per formation page (fetch, decode and parse, on one thread)
+   for the old path, ``response.text`` handed to the parser, against
+   fetch_raw(): the body bytes plus the declared charset, straight to lxml.
+3. TCP connections opened by a concurrent crawl with requests' default
+   pool (10 per host) against one sized to the crawl's concurrency.
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+import scrape_huddle
+from fixture_server import FixtureServer
+
+FORMATION_PATH = re.compile(r"^/\d+/playbooks/([\w-]+)/([\w-]+)/$")
+
+
+def formation_pages(server: FixtureServer) -> list[tuple[str, str, str]]:
+    """(url, playbook slug, formation slug) for every formation page on the site."""
+    pages = []
+    for path in server._server.pages:
+        match = FORMATION_PATH.match(path)
+        if match:
+            pages.append((server.url + path, match.group(1), match.group(2)))
+    return pages
+
+
+def pad_pages(server: FixtureServer, page_kb: float):
+    """Add navigation markup and an inline script, as a real page's chrome would."""
+    nav = "".join(
+        f'<li><a href="/26/players/{i}/">Player \u00e9t\u00e9 {i}</a></li>' for i in range(400)
+    )
+    script = "<script>window.__DATA__ = {" + ",".join(f'"k{i}": "{i}"' for i in range(2000)) + "}</script>"
+    chrome = (f"<nav><ul>{nav}</ul></nav>{script}").encode("utf-8")
+    repeat = max(0, int(page_kb * 1024 / len(chrome)))
+    for path, body in server._server.pages.items():
+        server._server.pages[path] = body.replace(b"</body>", chrome * repeat + b"</body>")
+
+
+def old_path(session: requests.Session, url: str, pb_slug: str, f_slug: str) -> list[dict]:
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    return scrape_huddle.parse_formation_plays(response.text, pb_slug, f_slug)
+
+
+def new_path(url: str, pb_slug: str, f_slug: str) -> list[dict]:
+    page = scrape_huddle.fetch_raw(url)
+    return scrape_huddle.parse_formation_plays(page.content, pb_slug, f_slug, page.encoding)
+
+
+def cpu_per_page(fn, pages, rounds: int) -> tuple[float, list]:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.thread_time()
+        results = [fn(*page) for page in pages]
+        best = min(best, time.thread_time() - start)
+    return best / len(pages), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--page-kb", type=float, default=60,
+        help="pad pages to about this size with site chrome; rendered fixture pages are ~1.5 KB, real ones far larger"
+    )
+    args = parser.parse_args()
+
+    scrape_huddle.rate_limiter.rate = 0
+    with FixtureServer() as server, contextlib.redirect_stdout(io.StringIO()) as log:
+        scrape_huddle.BASE_URL = server.url
+        pages = formation_pages(server)
+        pad_pages(server, args.page_kb)
+
+        # 1. Wire bytes per coding
+        wire = {}
+        for coding in ("identity", "gzip", "br"):
+            session = requests.Session()
+            session.headers["Accept-Encoding"] = coding
+            server.reset_count()
+            for url, _, _ in pages:
+                session.get(url).raise_for_status()
+            wire[coding] = server.bytes_sent / len(pages)
+
+        # 2. Client CPU per page, both paths over the same negotiated encoding
+        session = requests.Session()
+        session.headers.update(scrape_huddle.HEADERS)
+        old_cpu, old_results = cpu_per_page(lambda *p: old_path(session, *p), pages, args.rounds)
+        scrape_huddle.configure_transport(1)
+        new_cpu, new_results = cpu_per_page(new_path, pages, args.rounds)
+        assert old_results == new_results, "bytes path parsed differently"
+
+        # 3. Connections opened by a concurrent crawl
+        connections = {}
+        for label, sized in (("default pool (10)", False), (f"sized to {args.concurrency}", True)):
+            scrape_huddle.session = requests.Session()
+            scrape_huddle.session.headers.update(scrape_huddle.HEADERS)
+            if sized:
+                scrape_huddle.configure_transport(args.concurrency)
+            server.reset_count()
+            server.configure(latency=0.02)
+            with warnings.catch_warnings(), ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                # urllib3 logs "Connection pool is full" for every discarded connection
+                warnings.simplefilter("ignore")
+                urllib3.disable_warnings()
+                list(executor.map(lambda page: new_path(*page), pages))
+            connections[label] = server.connection_count
+    del log
+
+    print(f"{len(pages)} formation pages from the fixture site, padded to ~{args.page_kb:.0f} KB\n")
+    print("Body bytes per page on the wire:")
+    for coding, size in wire.items():
+        print(f"  {coding:<10} {size / 1024:6.1f} KB  ({size / wire['identity']:.0%})")
+    print(f"\nNegotiated by default: {scrape_huddle.HEADERS['Accept-Encoding']}")
+
+    print("\nClient CPU per formation page (fetch + decode + parse):")
+    print(f"  response.text -> parser    {old_cpu * 1e6:7.0f} us")
+    print(f"  bytes + charset -> parser  {new_cpu * 1e6:7.0f} us  ({new_cpu / old_cpu - 1:+.0%})")
+
+    print(f"\nConnections opened by {len(pages)} requests from {args.concurrency} threads:")
+    for label, count in connections.items():
+        print(f"  {label:<20} {count:5d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Helpers shared by the bench_*.py scripts."""
+
+from __future__ import annotations
+
+import copy
+import re
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import scrape_huddle
+
+DEFAULT_INPUT = Path(__file__).parent / "output" / "playbooks_subset.json"
+
+
+def scale_site(data: dict, copies: int) -> dict:
+    """The scrape repeated ``copies`` times, copy n's ids being e.g. eagles-n-off."""
+    playbooks = []
+    for n in range(copies):
+        for pb in data["playbooks"]:
+            pb_id = re.sub(r"-(off|def)$", rf"-{n}-\1", pb["id"]) if n else pb["id"]
+            playbooks.append({**pb, "id": pb_id, "formationGroups": [
+                {**group, "formations": [
+                    {**formation, "plays": [
+                        {**play, "id": f"{pb_id}-{formation['slug']}-{play['slug']}"}
+                        for play in formation["plays"]
+                    ]}
+                    for formation in group["formations"]
+                ]}
+                for group in pb["formationGroups"]
+            ]})
+    return {**data, "playbooks": playbooks}
+
+
+def use_output_dir(directory: Path):
+    """Point scrape_huddle's OUTPUT_DIR, and every path global under it, into ``directory``.
+
+    The globals are found rather than listed, so a new output file can't
+    be missed and written into the real output/ by a bench.
+    """
+    old = scrape_huddle.OUTPUT_DIR
+    for name, value in list(vars(scrape_huddle).items()):
+        if name.isupper() and isinstance(value, Path) and value != old and value.is_relative_to(old):
+            setattr(scrape_huddle, name, directory / value.relative_to(old))
+    scrape_huddle.OUTPUT_DIR = directory
+
+
+def peak_rss() -> int:
+    """This process's peak resident set in bytes.
+
+    ru_maxrss survives exec on Linux, so a child would report its parent's
+    peak if that was higher; VmHWM belongs to the child's own address space.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Kilobytes on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def edit_site(data: dict) -> dict:
+    """Simulate a mid-season update touching two playbooks."""
+    data = copy.deepcopy(data)
+    eagles, chiefs = data["playbooks"][0], data["playbooks"][1]
+
+    # Eagles: a brand new formation in the first group
+    group = eagles["formationGroups"][0]
+    group["formations"].append({
+        "name": "Heavy Wing",
+        "slug": "goal-line-heavy-wing",
+        "plays": [
+            {"id": "eagles-off-goal-line-heavy-wing-hb-dive", "name": "HB DIVE", "slug": "hb-dive", "type": "run"},
+            {"id": "eagles-off-goal-line-heavy-wing-pa-boot", "name": "PA BOOT", "slug": "pa-boot", "type": "pass"},
+        ],
+    })
+
+    # Chiefs: a formation renamed on the playbook page, with one play renamed and one dropped
+    formation = chiefs["formationGroups"][0]["formations"][0]
+    formation["name"] += " Tight"
+    formation["plays"][0]["name"] += " V2"
+    del formation["plays"][-1]
+
+    # 49ers: patch day, a play renamed inside a formation; the playbook page is unchanged
+    data["playbooks"][2]["formationGroups"][0]["formations"][0]["plays"][0]["name"] += " (UPDATED)"
+    return data
+
+
+def scale(data: dict, copies: int) -> dict:
+    """Approximate a full crawl by repeating the subset under distinct playbook ids."""
+    return {**data, "playbooks": [
+        {**pb, "id": f"{pb['id']}-{n}"} for n in range(copies) for pb in data["playbooks"]
+    ]}
+
+
+def timeit(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
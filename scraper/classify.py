@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Rule-based play type and formation group classification.
+
+Each rule table is an ordered list of (substring, label); the first rule
+whose substring occurs anywhere in the text wins. Classifier compiles a
+table into one trie-shaped regex, so every text is scanned once instead of
+once per rule, with the same answer. Names repeat heavily across
+playbooks, so the per-name functions are also memoized.
+
+match_batch() runs the regex over all texts joined together, which
+spreads the per-call overhead across the whole batch.
+
+Classification doesn't need the network, so rule changes can be applied
+to an existing scrape:
+
+    python classify.py output/playbooks.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+RUN_INDICATORS = [
+    "hb ", "fb ", "dive", "draw", "sweep", "toss", "counter", "iso",
+    "blast", "slam", "inside zone", "outside zone", "stretch", "power",
+    "trap", "lead", "pitch", "option", "qb run", "qb sneak", "scramble",
+    "wildcat", "jet sweep", "end around", "reverse"
+]
+
+PASS_INDICATORS = [
+    "pa ", "pass", "screen", "slant", "post", "corner", "out", "curl",
+    "hitch", "fade", "streak", "seam", "cross", "drag", "wheel",
+    "comeback", "dig", "sail", "flood", "mesh", "spot", "stick",
+    "smash", "dagger", "bench", "levels", "y-", "te ", "wr "
+]
+
+# Run indicators take priority; anything unmatched is a pass (most plays are)
+PLAY_TYPE_RULES = [(s, "run") for s in RUN_INDICATORS] + [(s, "pass") for s in PASS_INDICATORS]
+DEFAULT_PLAY_TYPE = "pass"
+
+FORMATION_GROUP_RULES = [
+    ("gun", "Gun"),
+    ("shotgun", "Gun"),
+    ("pistol", "Pistol"),
+    ("singleback", "Singleback"),
+    ("i-form", "I Form"),
+    ("i form", "I Form"),
+    ("iform", "I Form"),
+    ("strong", "Strong"),
+    ("weak", "Weak"),
+    ("goal line", "Goal Line"),
+    ("goalline", "Goal Line"),
+    ("hail mary", "Hail Mary"),
+    ("wildcat", "Wildcat"),
+    ("jumbo", "Jumbo"),
+    ("full house", "Full House"),
+    ("empty", "Empty"),
+    ("trips", "Gun"),  # Usually part of Gun
+    ("bunch", "Gun"),  # Usually part of Gun
+    ("spread", "Gun"),
+    ("ace", "Singleback"),
+    ("3-4", "3-4"),
+    ("4-3", "4-3"),
+    ("nickel", "Nickel"),
+    ("dime", "Dime"),
+    ("quarter", "Quarter"),
+    ("dollar", "Dollar"),
+    ("big nickel", "Big Nickel"),
+    ("46", "46"),
+]
+
+# Joins texts for batch matching; never part of a rule, so matches can't span texts
+_SEPARATOR = "\n"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation of words factored into a trie, so each position is tried once."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A word may end here too; greedy, so the longest word wins
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Classifier:
+    """First-matching-rule substring classifier compiled to a single regex.
+
+    Trailing rules that give the default label can never change the answer
+    and are dropped. When what is left all share one label, a single search
+    suffices. Otherwise a lookahead finds the longest rule starting at each
+    position; every rule that also starts there is a prefix of it, so the
+    best priority among its prefixes (precomputed) is the best at that
+    position.
+    """
+
+    def __init__(self, rules: list[tuple[str, str]], default: Optional[str] = None):
+        while rules and rules[-1][1] == default:
+            rules = rules[:-1]
+        self.default = default
+        self.labels = [label for _, label in rules]
+        priority: dict[str, int] = {}
+        for i, (substring, _) in enumerate(rules):
+            priority.setdefault(substring, i)
+        # Best priority among the rules that are a prefix of each substring
+        self._priority = {
+            substring: min(p for other, p in priority.items() if substring.startswith(other))
+            for substring in priority
+        }
+        pattern = _trie_pattern(priority) if priority else "(?!)"
+        self._single = len(set(self.labels)) <= 1
+        if self._single:
+            self._regex = re.compile(pattern)
+        else:
+            self._regex = re.compile(f"(?=({pattern}))")
+
+    def match(self, text: str) -> Optional[str]:
+        """Label of the first rule whose substring occurs in text (already lowercased)."""
+        if self._single:
+            return self.labels[0] if self._regex.search(text) else self.default
+        found = self._regex.findall(text)
+        if not found:
+            return self.default
+        return self.labels[min(self._priority[substring] for substring in found)]
+
+    def match_batch(self, texts: list[str]) -> list[Optional[str]]:
+        """match() for many texts in one regex pass."""
+        joined = _SEPARATOR.join(texts)
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        if self._single:
+            hits = {bisect.bisect_right(starts, m.start()) - 1 for m in self._regex.finditer(joined)}
+            return [self.labels[0] if i in hits else self.default for i in range(len(texts))]
+
+        best: list[Optional[int]] = [None] * len(texts)
+        for m in self._regex.finditer(joined):
+            i = bisect.bisect_right(starts, m.start()) - 1
+            priority = self._priority[m.group(1)]
+            if best[i] is None or priority < best[i]:
+                best[i] = priority
+        return [self.labels[p] if p is not None else self.default for p in best]
+
+
+play_type_classifier = Classifier(PLAY_TYPE_RULES, DEFAULT_PLAY_TYPE)
+formation_group_classifier = Classifier(FORMATION_GROUP_RULES)
+
+
+@lru_cache(maxsize=16384)
+def play_type(name: str) -> str:
+    return play_type_classifier.match(name.lower())
+
+
+def play_types(names: Iterable[str]) -> list[str]:
+    """play_type() for a batch of names; repeated names are classified once."""
+    lowered = [name.lower() for name in names]
+    distinct = list(dict.fromkeys(lowered))
+    labels = dict(zip(distinct, play_type_classifier.match_batch(distinct)))
+    return [labels[name] for name in lowered]
+
+
+@lru_cache(maxsize=4096)
+def formation_group(name: str, slug: str) -> str:
+    # Name and slug are matched together; the separator keeps rules from spanning them
+    group = formation_group_classifier.match(f"{name.lower()}{_SEPARATOR}{slug.lower()}")
+    if group:
+        return group
+    # Default: use first word of formation name
+    return name.split()[0] if name else "Other"
+
+
+def reclassify(data: dict) -> int:
+    """Recompute every play's type in a playbooks document in place. Returns how many changed."""
+    plays = [
+        play
+        for pb in data["playbooks"]
+        for group in pb.get("formationGroups", [])
+        for formation in group.get("formations", [])
+        for play in formation.get("plays", [])
+    ]
+    changed = 0
+    for play, new_type in zip(plays, play_types(play["name"] for play in plays)):
+        if play["type"] != new_type:
+            play["type"] = new_type
+            changed += 1
+    return changed
+
+
+def main():
+    from fileutil import write_json_atomic
+
+    parser = argparse.ArgumentParser(
+        description="Re-run play type classification over an existing playbooks JSON, without the network"
+    )
+    parser.add_argument("input", type=Path, help="nested playbooks JSON (e.g. output/playbooks.json)")
+    parser.add_argument("-o", "--output", type=Path, help="default: rewrite input in place")
+    parser.add_argument("--dry-run", action="store_true", help="only report how many plays would change")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    changed = reclassify(data)
+    print(f"{changed} play types changed")
+    if args.dry_run or (not changed and not args.output):
+        return
+
+    output = args.output or args.input
+    write_json_atomic(output, data)
+    print(f"Wrote {output}")
+
+    # Keep the derived outputs next to it in step
+    if (output.parent / "manifest.json").exists():
+        from shards import write_shards
+        write_shards(data, output.parent)
+        print(f"Rewrote shards in {output.parent}")
+    columnar = output.with_suffix(".columnar.json")
+    if columnar.exists():
+        from export_columnar import write_columnar
+        write_columnar(data, columnar)
+        print(f"Rewrote {columnar}")
+    dedup = output.with_suffix(".dedup.json")
+    if dedup.exists():
+        from export_dedup import write_dedup
+        write_dedup(data, dedup)
+        print(f"Rewrote {dedup}")
+
+
+if __name__ == "__main__":
+    main()
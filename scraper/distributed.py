@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Distributed crawl: several worker processes share a lease-based work queue.
+
+    python distributed.py seed                 # fetch the playbook list, queue one item per playbook
+    python distributed.py work &               # start as many workers as you like, anywhere the
+    python distributed.py work &               #   queue file is reachable
+    python distributed.py merge                # assemble playbooks.json from the results
+
+A playbook item's result is its formation index (groups, formation names
+and URLs), and completing it queues one formation item per formation.
+A formation item's result is its plays. Results are written to the queue
+as each item completes, so a crash or a killed worker loses at most the
+items it held. Their leases expire and other workers take them over
+(see workqueue.py). All workers share one request rate budget.
+
+merge can run at any time. Playbooks with formations still outstanding or
+failed are reported as incomplete and keep their version from the
+previous output; one that output doesn't have is written with what is
+known. Run more workers and merge again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import scrape_huddle
+from fileutil import write_json_atomic
+from incremental import load_previous
+from politeness import AdaptiveRate
+from workqueue import LEASE_SECONDS, MAX_ATTEMPTS, Heartbeat, Item, SharedRateLimiter, WorkQueue
+
+DEFAULT_QUEUE = scrape_huddle.OUTPUT_DIR / "queue.db"
+POLL_SECONDS = 1.0
+
+
+def seed(queue: WorkQueue, rate: float, only: Optional[list[str]] = None) -> int:
+    """Queue every playbook on the site. Returns the number of new items."""
+    SharedRateLimiter(queue, rate)
+    use_shared_rate_limit(queue)
+    playbooks = scrape_huddle.get_playbook_list()
+    if only:
+        playbooks = [pb for pb in playbooks if pb["id"] in only]
+    queue.set_meta({
+        "baseUrl": scrape_huddle.BASE_URL,
+        "header": {"version": scrape_huddle.MADDEN_VERSION, "source": "huddle.gg"},
+    })
+    return queue.add(("playbook", pb["url"], pb) for pb in playbooks)
+
+
+def use_shared_rate_limit(queue: WorkQueue):
+    """Route this process's requests through the queue's global rate budget.
+
+    The adaptive controller stays off: each process would adjust a shared
+    budget from its own view of the server.
+    """
+    scrape_huddle.rate_limiter = SharedRateLimiter(queue)
+    scrape_huddle.rate_controller = AdaptiveRate(scrape_huddle.rate_limiter)
+    rate = scrape_huddle.rate_limiter.rate
+    scrape_huddle.rate_controller.configure(rate, rate, enabled=False)
+
+
+def process(item: Item) -> tuple[object, list[tuple[str, str, dict]]]:
+    """Scrape one item. Returns (result, follow-up items); raises if the page could not be fetched."""
+    if item.kind == "playbook":
+        playbook = item.payload
+        page = scrape_huddle.fetch_raw(playbook["url"])
+        if page is None:
+            raise RuntimeError(f"could not fetch {playbook['url']}")
+        with scrape_huddle.parse_timer("playbook", playbook["url"]):
+            groups = scrape_huddle.find_formations(page.content, playbook, page.encoding)
+        result = [
+            [group_name, [[formation["name"], formation["slug"], url] for formation, url in entries]]
+            for group_name, entries in groups.items()
+        ]
+        children = [
+            ("formation", url, {"playbook": playbook["id"], "playbookSlug": playbook["slug"], "slug": slug})
+            for _, entries in result for _, slug, url in entries
+        ]
+        return result, children
+
+    page = scrape_huddle.fetch_raw(item.key)
+    if page is None:
+        raise RuntimeError(f"could not fetch {item.key}")
+    with scrape_huddle.parse_timer("formation", item.key):
+        plays = scrape_huddle.parse_formation_plays(
+            page.content, item.payload["playbookSlug"], item.payload["slug"], page.encoding
+        )
+    return plays, []
+
+
+def work(queue: WorkQueue, owner: str, max_items: Optional[int] = None) -> int:
+    """Claim and process items until the queue is drained. Returns the number completed."""
+    meta = queue.meta()
+    scrape_huddle.BASE_URL = meta["baseUrl"]
+    use_shared_rate_limit(queue)
+
+    completed = 0
+    while max_items is None or completed < max_items:
+        item = queue.claim(owner)
+        if item is None:
+            if queue.drained():
+                break
+            # Others hold leases; their items may still fail back or queue formations
+            time.sleep(POLL_SECONDS)
+            continue
+        try:
+            with Heartbeat(queue, item, owner) as heartbeat:
+                result, children = process(item)
+        except Exception as e:
+            print(f"  [{owner}] {item.kind} failed (attempt {item.attempts}): {e}")
+            queue.fail(item, owner, str(e))
+            continue
+        if heartbeat.lost or not queue.complete(item, owner, result, children):
+            print(f"  [{owner}] lease on {item.key} was lost, dropping result")
+            continue
+        completed += 1
+    return completed
+
+
+def merge(queue: WorkQueue) -> tuple[dict, list[str]]:
+    """Assemble the playbooks document. Returns it and the ids of incomplete playbooks."""
+    playbook_items = queue.results("playbook")
+    formation_items = queue.results("formation")
+    header = {**queue.meta()["header"], "scrapedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+    playbooks, incomplete = [], []
+    for state, result, playbook in playbook_items.values():
+        groups = {}
+        complete = state == "done"
+        for group_name, entries in result or []:
+            groups[group_name] = []
+            for name, slug, url in entries:
+                f_state, plays, _ = formation_items.get(url, ("pending", None, None))
+                complete = complete and f_state == "done"
+                groups[group_name].append(({"name": name, "slug": slug, "plays": plays or []}, url))
+        playbooks.append(scrape_huddle.assemble_playbook(playbook, groups))
+        if not complete:
+            incomplete.append(playbook["id"])
+    return {**header, "playbooks": playbooks}, incomplete
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", type=Path, default=DEFAULT_QUEUE, help=f"queue database (default: {DEFAULT_QUEUE})")
+    parser.add_argument(
+        "--lease", type=float, default=LEASE_SECONDS,
+        help=f"seconds an item stays leased without a heartbeat (default: {LEASE_SECONDS:.0f})"
+    )
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed", help="queue the site's playbooks")
+    seed_cmd.add_argument("--base-url", default=scrape_huddle.BASE_URL)
+    seed_cmd.add_argument("--only", nargs="+", metavar="ID")
+    seed_cmd.add_argument(
+        "--rate", type=float, default=1 / scrape_huddle.DELAY_BETWEEN_REQUESTS,
+        help="requests per second across all workers, 0 for no limit"
+    )
+
+    work_cmd = commands.add_parser("work", help="process items until the queue is drained")
+    work_cmd.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}", help="worker name")
+    work_cmd.add_argument("--max-items", type=int, help="stop after this many items")
+
+    merge_cmd = commands.add_parser("merge", help="write playbooks.json from the results")
+    merge_cmd.add_argument("-o", "--output", type=Path, default=scrape_huddle.OUTPUT_FILE)
+
+    commands.add_parser("status", help="item counts by state")
+
+    args = parser.parse_args(argv)
+    queue = WorkQueue(args.queue, args.lease, args.max_attempts)
+    try:
+        if args.command == "seed":
+            scrape_huddle.BASE_URL = args.base_url.rstrip("/")
+            print(f"Queued {seed(queue, args.rate, args.only)} playbooks in {args.queue}")
+        elif args.command == "work":
+            print(f"[{args.id}] completed {work(queue, args.id, args.max_items)} items")
+        elif args.command == "merge":
+            data, incomplete = merge(queue)
+            # As in scrape_huddle.main(), a partial merge never replaces complete data
+            kept = load_previous(args.output, set(incomplete)) if incomplete else {}
+            data["playbooks"] = [kept.get(pb["id"], pb) for pb in data["playbooks"]]
+            write_json_atomic(args.output, data)
+            print(f"Wrote {args.output} ({len(data['playbooks'])} playbooks)")
+            if incomplete:
+                print(f"WARNING: {len(incomplete)} incomplete playbook(s), {len(kept)} kept from the previous "
+                      f"output: {', '.join(incomplete)}")
+                return 1
+        elif args.command == "status":
+            for state, count in sorted(queue.counts().items()):
+                print(f"{state:<8} {count}")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
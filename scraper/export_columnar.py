@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Compact columnar export of playbooks.json.
+
+Layout (all strings are indexes into one shared ``strings`` table, ordered
+most-frequent first so common values get short numbers):
+
+    {
+      "format": "playbooks-columnar", "formatVersion": 1,
+      "version": ..., "scrapedAt": ..., "source": ...,
+      "strings": ["pass", "run", ...],
+      "playbooks":  {"id": [], "name": [], "type": [], "category": [], "groupCount": []},
+      "groups":     {"name": [], "formationCount": []},
+      "formations": {"name": [], "slug": [], "playCount": []},
+      "plays":      {"name": [], "slug": [], "type": []},
+      "playIdOverrides": {"<play index>": "<id>"}
+    }
+
+Each level is stored column by column; the ``*Count`` columns say how many
+consecutive rows of the next level belong to each row. Play ids are not
+stored: they are derived as ``{playbook id}-{formation slug}-{play slug}``,
+which is how scrape_formation_plays builds them. Any id that doesn't follow
+that rule is kept in ``playIdOverrides`` so the round trip stays lossless.
+
+expand() turns the columnar document back into the nested schema.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+
+from fileutil import write_bytes_atomic
+
+FORMAT = "playbooks-columnar"
+FORMAT_VERSION = 1
+
+HEADER_FIELDS = ("version", "scrapedAt", "source")
+
+
+def play_id(playbook_id: str, formation_slug: str, play_slug: str) -> str:
+    return f"{playbook_id}-{formation_slug}-{play_slug}"
+
+
+def to_columnar(data: dict) -> dict:
+    """Convert a nested playbooks document to the columnar layout.
+
+    ``data["playbooks"]`` may be any iterable; it is read once.
+    """
+    playbooks = {"id": [], "name": [], "type": [], "category": [], "groupCount": []}
+    groups = {"name": [], "formationCount": []}
+    formations = {"name": [], "slug": [], "playCount": []}
+    plays = {"name": [], "slug": [], "type": []}
+    overrides = {}
+
+    for pb in data["playbooks"]:
+        for key in ("id", "name", "type", "category"):
+            playbooks[key].append(pb[key])
+        playbooks["groupCount"].append(len(pb["formationGroups"]))
+
+        for group in pb["formationGroups"]:
+            groups["name"].append(group["name"])
+            groups["formationCount"].append(len(group["formations"]))
+
+            for formation in group["formations"]:
+                formations["name"].append(formation["name"])
+                formations["slug"].append(formation["slug"])
+                formations["playCount"].append(len(formation["plays"]))
+
+                for play in formation["plays"]:
+                    if play["id"] != play_id(pb["id"], formation["slug"], play["slug"]):
+                        overrides[str(len(plays["name"]))] = play["id"]
+                    for key in ("name", "slug", "type"):
+                        plays[key].append(play[key])
+
+    string_columns = [
+        playbooks["id"], playbooks["name"], playbooks["type"], playbooks["category"],
+        groups["name"], formations["name"], formations["slug"],
+        plays["name"], plays["slug"], plays["type"],
+    ]
+    counts = Counter(value for column in string_columns for value in column)
+    strings = [value for value, _ in counts.most_common()]
+    index = {value: i for i, value in enumerate(strings)}
+    for column in string_columns:
+        column[:] = [index[value] for value in column]
+
+    return {
+        "format": FORMAT,
+        "formatVersion": FORMAT_VERSION,
+        **{key: data[key] for key in HEADER_FIELDS if key in data},
+        "strings": strings,
+        "playbooks": playbooks,
+        "groups": groups,
+        "formations": formations,
+        "plays": plays,
+        "playIdOverrides": overrides,
+    }
+
+
+def expand(columnar: dict) -> dict:
+    """Rebuild the nested playbooks document from the columnar layout."""
+    if columnar.get("format") != FORMAT or columnar.get("formatVersion") != FORMAT_VERSION:
+        raise ValueError("not a playbooks-columnar v1 document")
+
+    s = columnar["strings"]
+    pbs, grps, fms, pls = (columnar[k] for k in ("playbooks", "groups", "formations", "plays"))
+    overrides = columnar.get("playIdOverrides", {})
+
+    playbooks = []
+    g = f = p = 0
+    for i, pb_id in enumerate(pbs["id"]):
+        pb_id = s[pb_id]
+        formation_groups = []
+        for _ in range(pbs["groupCount"][i]):
+            formation_list = []
+            for _ in range(grps["formationCount"][g]):
+                formation_slug = s[fms["slug"][f]]
+                play_list = []
+                for _ in range(fms["playCount"][f]):
+                    play_slug = s[pls["slug"][p]]
+                    play_list.append({
+                        "id": overrides.get(str(p)) or play_id(pb_id, formation_slug, play_slug),
+                        "name": s[pls["name"][p]],
+                        "slug": play_slug,
+                        "type": s[pls["type"][p]],
+                    })
+                    p += 1
+                formation_list.append({
+                    "name": s[fms["name"][f]],
+                    "slug": formation_slug,
+                    "plays": play_list,
+                })
+                f += 1
+            formation_groups.append({"name": s[grps["name"][g]], "formations": formation_list})
+            g += 1
+        playbooks.append({
+            "id": pb_id,
+            "name": s[pbs["name"][i]],
+            "type": s[pbs["type"][i]],
+            "category": s[pbs["category"][i]],
+            "formationGroups": formation_groups,
+        })
+
+    return {
+        **{key: columnar[key] for key in HEADER_FIELDS if key in columnar},
+        "playbooks": playbooks,
+    }
+
+
+def write_columnar(data: dict, path: Path):
+    write_bytes_atomic(path, json.dumps(to_columnar(data), separators=(",", ":")).encode("utf-8"))
+
+
+def load_columnar(path: Path) -> dict:
+    """Load a columnar export and return it in the nested schema."""
+    with open(path) as f:
+        return expand(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the columnar export of a playbooks JSON file")
+    parser.add_argument("input", type=Path, help="nested playbooks JSON (e.g. output/playbooks.json)")
+    parser.add_argument("-o", "--output", type=Path, help="default: <input>.columnar.json")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    output = args.output or args.input.with_suffix(".columnar.json")
+    write_columnar(data, output)
+
+    roundtrip = load_columnar(output)
+    print(f"Wrote {output} ({output.stat().st_size / 1024:.0f} KB)")
+    print(f"Round trip matches input: {roundtrip == data}")
+
+
+if __name__ == "__main__":
+    main()
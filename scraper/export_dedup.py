@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Deduplicated export of playbooks.json.
+
+Team playbooks share most of their content: the same formation with the
+same plays appears under dozens of books. This export stores each distinct
+play and each distinct formation once, in shared tables, and playbooks
+refer to formations by index:
+
+    {
+      "format": "playbooks-dedup", "formatVersion": 1,
+      "version": ..., "scrapedAt": ..., "source": ...,
+      "plays": [[name, slug, type], ...],
+      "formations": [[name, slug, [play index, ...]], ...],
+      "playbooks": [
+        {"id": ..., "name": ..., "type": ..., "category": ...,
+         "formationGroups": [[group name, [formation index, ...]], ...]}
+      ],
+      "playIdOverrides": {"<play ordinal>": "<id>"}
+    }
+
+Plays and formations are interned by their full content. Play ids are
+not stored. As in the columnar export they are derived as
+``{playbook id}-{formation slug}-{play slug}``, and ids that don't follow
+that rule are kept in ``playIdOverrides``, keyed by the play's position in
+a walk of the nested document.
+
+expand() turns the deduplicated document back into the nested schema.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from export_columnar import HEADER_FIELDS, play_id
+from fileutil import write_bytes_atomic
+
+FORMAT = "playbooks-dedup"
+FORMAT_VERSION = 1
+
+
+def to_dedup(data: dict) -> dict:
+    """Convert a nested playbooks document to the deduplicated layout.
+
+    ``data["playbooks"]`` may be any iterable; it is read once.
+    """
+    plays: dict[tuple, int] = {}
+    formations: dict[tuple, int] = {}
+    playbooks = []
+    overrides = {}
+    ordinal = 0
+
+    for pb in data["playbooks"]:
+        groups = []
+        for group in pb["formationGroups"]:
+            refs = []
+            for formation in group["formations"]:
+                play_refs = []
+                for play in formation["plays"]:
+                    if play["id"] != play_id(pb["id"], formation["slug"], play["slug"]):
+                        overrides[str(ordinal)] = play["id"]
+                    ordinal += 1
+                    key = (play["name"], play["slug"], play["type"])
+                    play_refs.append(plays.setdefault(key, len(plays)))
+
+                key = (formation["name"], formation["slug"], tuple(play_refs))
+                refs.append(formations.setdefault(key, len(formations)))
+            groups.append([group["name"], refs])
+
+        playbooks.append({
+            "id": pb["id"],
+            "name": pb["name"],
+            "type": pb["type"],
+            "category": pb["category"],
+            "formationGroups": groups,
+        })
+
+    return {
+        "format": FORMAT,
+        "formatVersion": FORMAT_VERSION,
+        **{key: data[key] for key in HEADER_FIELDS if key in data},
+        "plays": [list(key) for key in plays],
+        "formations": [[name, slug, list(refs)] for name, slug, refs in formations],
+        "playbooks": playbooks,
+        "playIdOverrides": overrides,
+    }
+
+
+def expand(dedup: dict) -> dict:
+    """Rebuild the nested playbooks document from the deduplicated layout."""
+    if dedup.get("format") != FORMAT or dedup.get("formatVersion") != FORMAT_VERSION:
+        raise ValueError("not a playbooks-dedup v1 document")
+
+    plays, formations = dedup["plays"], dedup["formations"]
+    overrides = dedup.get("playIdOverrides", {})
+
+    playbooks = []
+    ordinal = 0
+    for pb in dedup["playbooks"]:
+        formation_groups = []
+        for group_name, refs in pb["formationGroups"]:
+            formation_list = []
+            for ref in refs:
+                name, formation_slug, play_refs = formations[ref]
+                play_list = []
+                for play_ref in play_refs:
+                    play_name, play_slug, play_type = plays[play_ref]
+                    play_list.append({
+                        "id": overrides.get(str(ordinal)) or play_id(pb["id"], formation_slug, play_slug),
+                        "name": play_name,
+                        "slug": play_slug,
+                        "type": play_type,
+                    })
+                    ordinal += 1
+                formation_list.append({"name": name, "slug": formation_slug, "plays": play_list})
+            formation_groups.append({"name": group_name, "formations": formation_list})
+        playbooks.append({**pb, "formationGroups": formation_groups})
+
+    return {
+        **{key: dedup[key] for key in HEADER_FIELDS if key in dedup},
+        "playbooks": playbooks,
+    }
+
+
+def dedup_stats(data: dict, dedup: dict) -> dict:
+    """Counts of play/formation occurrences against distinct table entries."""
+    formations = [f for pb in data["playbooks"] for g in pb["formationGroups"] for f in g["formations"]]
+    play_count = sum(len(f["plays"]) for f in formations)
+    return {
+        "plays": play_count,
+        "uniquePlays": len(dedup["plays"]),
+        "formations": len(formations),
+        "uniqueFormations": len(dedup["formations"]),
+    }
+
+
+def write_dedup(data: dict, path: Path):
+    write_bytes_atomic(path, json.dumps(to_dedup(data), separators=(",", ":")).encode("utf-8"))
+
+
+def load_dedup(path: Path) -> dict:
+    """Load a deduplicated export and return it in the nested schema."""
+    with open(path) as f:
+        return expand(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the deduplicated export of a playbooks JSON file")
+    parser.add_argument("input", type=Path, help="nested playbooks JSON (e.g. output/playbooks.json)")
+    parser.add_argument("-o", "--output", type=Path, help="default: <input>.dedup.json")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    output = args.output or args.input.with_suffix(".dedup.json")
+    write_dedup(data, output)
+
+    with open(output) as f:
+        stats = dedup_stats(data, json.load(f))
+    minified = len(json.dumps(data, separators=(",", ":")).encode())
+    size = output.stat().st_size
+    print(f"Wrote {output} ({size / 1024:.0f} KB, {size / minified:.0%} of minified nested JSON)")
+    print(f"Plays: {stats['plays']} -> {stats['uniquePlays']} unique "
+          f"({stats['plays'] / stats['uniquePlays']:.1f}x)")
+    print(f"Formations: {stats['formations']} -> {stats['uniqueFormations']} unique "
+          f"({stats['formations'] / stats['uniqueFormations']:.1f}x)")
+    print(f"Round trip matches input: {load_dedup(output) == data}")
+
+
+if __name__ == "__main__":
+    main()
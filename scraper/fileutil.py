@@ -0,0 +1,147 @@
+"""Atomic file writes shared by the scraper's output writers."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+
+def write_bytes_atomic(path: Path, data: bytes, fsync: bool = True):
+    """Write data to a temp file in the same directory, then rename it over path.
+
+    Readers see either the old file or the complete new one, never a partial
+    write. With ``fsync`` the data is flushed to disk before the rename.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_json_atomic(path: Path, data, indent: Optional[int] = 2):
+    """Atomically write data as JSON (see write_bytes_atomic)."""
+    write_bytes_atomic(path, json.dumps(data, indent=indent).encode("utf-8"))
+
+
+class StreamingJsonWriter:
+    """Write ``{**header, key: [items]}`` as JSON one item at a time.
+
+    The result is byte for byte what write_json_atomic() writes for the
+    whole document, but only the current item is ever serialized in
+    memory. It goes to a temp file that close() renames over path; leaving
+    a ``with`` block by an exception deletes the temp file instead, so the
+    previous file stays as it was.
+
+    Usage::
+
+        with StreamingJsonWriter(path, header, "playbooks") as writer:
+            for playbook in ...:
+                writer.write(playbook)
+    """
+
+    def __init__(self, path: Path, header: dict, key: str, indent: Optional[int] = 2):
+        self.path = Path(path)
+        self.indent = indent
+        self.count = 0
+        # The header with an empty array last, cut open just after the "["
+        head = json.dumps({**{k: v for k, v in header.items() if k != key}, key: []}, indent=indent)
+        self._tail = "\n}" if indent is not None else "}"
+        head = head[:-len(self._tail) - 1]
+        self._pad = "\n" + " " * (2 * indent) if indent is not None else ""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        self._file.write(head)
+
+    def write(self, item):
+        text = json.dumps(item, indent=self.indent)
+        if self.indent is not None:
+            text = text.replace("\n", self._pad)
+        if self.count:
+            self._file.write("," if self.indent is not None else ", ")
+        self._file.write(self._pad + text)
+        self.count += 1
+
+    def write_all(self, items: Iterable):
+        for item in items:
+            self.write(item)
+
+    def close(self, fsync: bool = True):
+        """Finish the document and rename it into place."""
+        if self.count and self.indent is not None:
+            self._file.write("\n" + " " * self.indent)
+        self._file.write("]" + self._tail)
+        if fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Discard the temp file, leaving path untouched."""
+        self._file.close()
+        os.unlink(self._tmp)
+
+    def __enter__(self) -> "StreamingJsonWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+_SKIP = re.compile(r"[\s,]*")
+
+
+def iter_json_array(path: Path, key: str, chunk_size: int = 1 << 16) -> Iterator:
+    """Yield the objects in the array ``key`` of a JSON document, one at a time.
+
+    The reading side of StreamingJsonWriter: only the current item and a
+    chunk of text are held in memory. The array is the first ``"key": [``
+    in the file, which for a StreamingJsonWriter document is the one after
+    the header.
+    """
+    start = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        text, pos = "", 0
+        while True:
+            match = start.search(text)
+            if match:
+                pos = match.end()
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            # Keep a tail in case the key straddles the chunk boundary
+            text = text[-256:] + chunk
+        while True:
+            pos = _SKIP.match(text, pos).end()
+            if pos < len(text) and text[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # An item cut off at the end of the chunk, unless the file ends there
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                text, pos = text[pos:] + chunk, 0
+                continue
+            yield item
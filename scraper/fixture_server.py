@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Huddle.gg used by the scraper benchmarks.
+
+The site comes from one of two sources:
+
+- a scrape JSON (output/playbooks_subset.json by default), rendered into
+  the playbook index, playbook pages and formation pages with the URL
+  layout and markup the scraper expects. Crawling it reproduces the
+  source JSON, which makes it a convenient correctness fixture.
+- a recorded site (``*.json.gz``, see ``record``), the real HTML of a
+  slice of huddle.gg captured once and replayed offline.
+
+With ``sitemap`` on, the site also has a sitemap index at /sitemap.xml
+over sitemaps of SITEMAP_CHUNK URLs each, with a <lastmod> per page.
+
+Latency, jitter and error responses can be injected to exercise the
+scraper's politeness and retry behaviour. Responses are compressed (br or
+gzip) when the client asks for it, like the real site's CDN.
+
+    python fixture_server.py serve --latency 0.1 --error-rate 0.05
+    python fixture_server.py serve --sitemap
+    python fixture_server.py record eagles-off chiefs-def -o fixtures/site.json.gz
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import html
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional, br is only offered when available
+    brotli = None
+
+MADDEN_VERSION = "26"
+DEFAULT_SOURCE = Path(__file__).parent / "output" / "playbooks_subset.json"
+SITEMAP_CHUNK = 200  # URLs per sitemap file
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>{title} - Huddle</title></head>
+<body>
+<nav><ul><li><a href="/">Home</a></li><li><a href="/{version}/playbooks/">Playbooks</a></li></ul></nav>
+<main>
+<h1>{title}</h1>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+def _link(href: str, text: str) -> str:
+    return f'<li><a href="{html.escape(href)}">{html.escape(text)}</a></li>'
+
+
+def _page(title: str, body: str) -> bytes:
+    return PAGE_TEMPLATE.format(title=html.escape(title), body=body, version=MADDEN_VERSION).encode("utf-8")
+
+
+def load_site(source: Path) -> dict[str, bytes]:
+    """Pages keyed by URL path, from a recorded site or a scrape JSON to render."""
+    source = Path(source)
+    if source.name.endswith(".json.gz"):
+        with gzip.open(source, "rt", encoding="utf-8") as f:
+            return {path: body.encode("utf-8") for path, body in json.load(f)["pages"].items()}
+    with open(source) as f:
+        return render_site(json.load(f))
+
+
+def render_site(data: dict) -> dict[str, bytes]:
+    """Render every page of the stand-in site, keyed by URL path."""
+    root = f"/{MADDEN_VERSION}/playbooks/"
+    pages = {}
+
+    index_links = []
+    for pb in data["playbooks"]:
+        pb_path = f"{root}{pb['id']}/"
+        index_links.append(_link(pb_path, pb["name"]))
+
+        sections = []
+        for group in pb.get("formationGroups", []):
+            formation_links = []
+            for formation in group.get("formations", []):
+                formation_path = f"{pb_path}{formation['slug']}/"
+                formation_links.append(_link(formation_path, formation["name"]))
+
+                play_links = [
+                    _link(f"{formation_path}{play['slug']}/", play["name"])
+                    for play in formation.get("plays", [])
+                ]
+                pages[formation_path] = _page(
+                    f"{pb['name']} {formation['name']}",
+                    "<ul>\n" + "\n".join(play_links) + "\n</ul>",
+                )
+
+            sections.append(
+                f"<h3>{html.escape(group['name'])}</h3>\n<ul>\n" + "\n".join(formation_links) + "\n</ul>"
+            )
+
+        pages[pb_path] = _page(f"{pb['name']} Playbook", "\n".join(sections))
+
+    pages[root] = _page("Madden Playbooks", "<ul>\n" + "\n".join(index_links) + "\n</ul>")
+    return pages
+
+
+def _w3c_datetime(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def render_sitemaps(base_url: str, lastmod: dict[str, float], chunk: int = SITEMAP_CHUNK) -> dict[str, bytes]:
+    """A sitemap index at /sitemap.xml and its sitemaps, for page paths -> lastmod."""
+    paths = sorted(lastmod)
+    pages = {}
+    index = []
+    for n, start in enumerate(range(0, len(paths), chunk)):
+        part = paths[start:start + chunk]
+        urls = "".join(
+            f"<url><loc>{html.escape(base_url + path)}</loc><lastmod>{_w3c_datetime(lastmod[path])}</lastmod></url>\n"
+            for path in part
+        )
+        sitemap_path = f"/sitemaps/pages-{n + 1}.xml"
+        pages[sitemap_path] = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n{urls}</urlset>\n'.encode()
+        newest = max(lastmod[path] for path in part)
+        index.append(f"<sitemap><loc>{html.escape(base_url + sitemap_path)}</loc>"
+                     f"<lastmod>{_w3c_datetime(newest)}</lastmod></sitemap>\n")
+    pages["/sitemap.xml"] = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n{"".join(index)}</sitemapindex>\n'
+    ).encode()
+    return pages
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    # Keep-alive, so connection reuse (and its absence) is visible
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms) on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            delay = server.latency + (server.rng.uniform(0, server.jitter) if server.jitter else 0)
+            fail = server.error_rate and server.rng.random() < server.error_rate
+            if fail:
+                server.error_count += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            self.send_response(server.error_status)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = server.pages.get(self.path.split("?", 1)[0])
+
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        coding = server.negotiate(self.headers.get("Accept-Encoding", ""))
+        # Each representation gets its own strong validator
+        etag = f'"{hashlib.md5(body).hexdigest()}{"-" + coding if coding else ""}"'
+        if self.server.validators and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        path = self.path.split("?", 1)[0]
+        body = server.encoded(path, body, coding)
+        self.send_response(200)
+        content_type = "application/xml" if path.endswith(".xml") else "text/html; charset=utf-8"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        self.send_header("Vary", "Accept-Encoding")
+        if self.server.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages: dict[str, bytes], validators: bool):
+        super().__init__(address, _Handler)
+        self.pages = pages
+        self.validators = validators
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+        self.latency = 0.0
+        self.jitter = 0.0
+        self.error_rate = 0.0
+        self.error_status = 503
+        self.retry_after: Optional[int] = None
+        self.rng = random.Random(0)
+        self.compression = True
+        self.bytes_sent = 0
+        self.connection_count = 0
+        self._encoded: dict[tuple[str, str], bytes] = {}
+
+    def handle_error(self, request, client_address):
+        # A client that went away mid-response (e.g. a killed worker) is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Content coding to answer with: br if offered (and available), then gzip."""
+        if not self.compression:
+            return None
+        offered = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if brotli and "br" in offered:
+            return "br"
+        if "gzip" in offered:
+            return "gzip"
+        return None
+
+    def encoded(self, path: str, body: bytes, coding: Optional[str]) -> bytes:
+        """Body in the given coding, compressed once per page."""
+        if coding is None:
+            return body
+        key = (path, coding)
+        if key not in self._encoded:
+            if coding == "br":
+                self._encoded[key] = brotli.compress(body)
+            else:
+                self._encoded[key] = gzip.compress(body, compresslevel=6, mtime=0)
+        return self._encoded[key]
+
+
+class FixtureServer:
+    """Serve a rendered site on 127.0.0.1 from a background thread.
+
+    Use as a context manager; ``url`` is the base URL to point the scraper at.
+    With ``validators`` on, responses carry ETag/Last-Modified and matching
+    If-None-Match requests get a 304.
+
+    With ``sitemap``, /sitemap.xml indexes every page, each page's
+    <lastmod> taken from ``lastmod`` (path -> epoch seconds) or else the
+    server's start time.
+
+    Each response is delayed by ``latency`` plus up to ``jitter`` seconds.
+    A seeded ``error_rate`` fraction of requests fail with ``error_status``,
+    carrying a ``Retry-After`` header when ``retry_after`` is set. With
+    ``compression`` on, bodies are sent br/gzip encoded when accepted;
+    ``bytes_sent`` counts body bytes as sent.
+    """
+
+    def __init__(
+        self,
+        source: Optional[Path] = None,
+        latency: float = 0.0,
+        port: int = 0,
+        validators: bool = True,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Optional[int] = None,
+        seed: int = 0,
+        compression: bool = True,
+        sitemap: bool = False,
+        lastmod: Optional[dict[str, float]] = None,
+    ):
+        self._server = _Server(("127.0.0.1", port), load_site(source or DEFAULT_SOURCE), validators)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        if sitemap:
+            started = time.time()
+            self._server.pages.update(render_sitemaps(
+                self.url, {path: (lastmod or {}).get(path, started) for path in self._server.pages}
+            ))
+        self.configure(
+            latency=latency, jitter=jitter, error_rate=error_rate,
+            error_status=error_status, retry_after=retry_after, seed=seed, compression=compression
+        )
+
+    def configure(self, **settings):
+        """Change latency, jitter, error_rate, error_status, retry_after, compression or seed while running."""
+        with self._server.lock:
+            for key, value in settings.items():
+                if key == "seed":
+                    self._server.rng = random.Random(value)
+                elif key in ("latency", "jitter", "error_rate", "error_status", "retry_after", "compression"):
+                    setattr(self._server, key, value)
+                else:
+                    raise TypeError(f"unknown setting {key!r}")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._server.pages)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self._server.request_count
+
+    @property
+    def error_count(self) -> int:
+        return self._server.error_count
+
+    @property
+    def bytes_sent(self) -> int:
+        return self._server.bytes_sent
+
+    @property
+    def connection_count(self) -> int:
+        return self._server.connection_count
+
+    def reset_count(self):
+        with self._server.lock:
+            self._server.request_count = 0
+            self._server.error_count = 0
+            self._server.bytes_sent = 0
+            self._server.connection_count = 0
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(playbook_ids: list[str], output: Path):
+    """Capture the live playbook index plus the given playbooks and their formation pages.
+
+    Fetches go through scrape_huddle, so its rate limit applies.
+    """
+    from urllib.parse import urlparse
+
+    import scrape_huddle
+
+    pages = {}
+
+    def capture(url: str) -> Optional[str]:
+        text = scrape_huddle.fetch_html(url)
+        if text is not None:
+            pages[urlparse(url).path] = text
+        return text
+
+    capture(f"{scrape_huddle.BASE_URL}/{MADDEN_VERSION}/playbooks/")
+    playbooks = {pb["id"]: pb for pb in scrape_huddle.get_playbook_list()}
+    for playbook_id in playbook_ids:
+        playbook = playbooks.get(playbook_id)
+        if playbook is None:
+            print(f"  Unknown playbook {playbook_id}, skipping")
+            continue
+        text = capture(playbook["url"])
+        if text is None:
+            continue
+        for entries in scrape_huddle.find_formations(text, playbook).values():
+            for _, url in entries:
+                capture(url)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(output, "wt", encoding="utf-8") as f:
+        json.dump({"recordedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "pages": pages}, f)
+    print(f"Recorded {len(pages)} pages to {output}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve or record a local Huddle.gg stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="serve a rendered or recorded site")
+    serve.add_argument("--source", type=Path, default=DEFAULT_SOURCE, help="scrape JSON or recorded *.json.gz")
+    serve.add_argument("--port", type=int, default=8026)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds to delay each response")
+    serve.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--retry-after", type=int, help="Retry-After seconds to send with errors")
+    serve.add_argument("--sitemap", action="store_true", help="serve a sitemap index at /sitemap.xml")
+
+    rec = commands.add_parser("record", help="record a slice of the live site")
+    rec.add_argument("playbooks", nargs="+", help="playbook ids, e.g. eagles-off")
+    rec.add_argument("-o", "--output", type=Path, required=True, help="recorded site file (*.json.gz)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.playbooks, args.output)
+        return
+
+    server = FixtureServer(
+        args.source, latency=args.latency, port=args.port, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after,
+        sitemap=args.sitemap,
+    )
+    print(f"Serving {server.page_count} pages at {server.url}/{MADDEN_VERSION}/playbooks/")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Snapshot history of scraped playbooks, stored as a base plus deltas.
+
+A snapshot is flattened to records keyed by stable identifiers:
+
+    ("pb", playbook id)                      -> [playbook fields, [[group name, [formation slugs]], ...]]
+    ("f", playbook id, group name, slug)     -> [formation name, [play ids]]
+    ("p", play id)                           -> [name, slug, type]
+
+plus the header fields and the playbook order. The delta from one snapshot
+to the next lists each record that changed as ``[key, before, after]``
+(``None`` for a record that didn't exist), so an unchanged scrape costs a
+few bytes and a reclassified play costs one record. Keeping ``before``
+makes deltas composable: the changes between any two snapshots are found
+by folding the deltas between them, without rebuilding either snapshot.
+
+Layout of the history directory:
+
+    index.json              snapshot list: id, header, whether it has a base, file sizes
+    00000.base.json.gz      full playbooks.json document
+    00001.delta.json.gz     delta from snapshot 0 to 1
+    ...
+
+Every snapshot after the first has a delta; some also have a base. A
+snapshot is rebuilt from the nearest base at or before it plus the deltas
+after that base. record() writes a new base (re-bases) every
+``rebase_every`` snapshots, or sooner once the deltas since the last base
+add up to ``rebase_ratio`` of its size, which bounds rebuild time. Storage
+therefore grows with the amount of change, plus one base per re-base.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from fileutil import write_bytes_atomic, write_json_atomic
+
+FORMAT = "playbooks-history"
+FORMAT_VERSION = 1
+
+DEFAULT_DIR = Path(__file__).parent / "output" / "history"
+REBASE_EVERY = 20
+REBASE_RATIO = 0.5
+
+
+@dataclass
+class Snapshot:
+    header: dict = field(default_factory=dict)
+    order: list[str] = field(default_factory=list)
+    records: dict[tuple, list] = field(default_factory=dict)
+
+
+def _flatten(pb: dict) -> Iterator[tuple[tuple, list]]:
+    """One playbook's records, as (key, value) pairs."""
+    groups = []
+    for group in pb.get("formationGroups", []):
+        slugs = []
+        for formation in group["formations"]:
+            play_ids = []
+            for play in formation["plays"]:
+                yield ("p", play["id"]), [play["name"], play["slug"], play["type"]]
+                play_ids.append(play["id"])
+            yield ("f", pb["id"], group["name"], formation["slug"]), [formation["name"], play_ids]
+            slugs.append(formation["slug"])
+        groups.append([group["name"], slugs])
+    fields = {k: v for k, v in pb.items() if k != "formationGroups"}
+    yield ("pb", pb["id"]), [fields, groups]
+
+
+def _conflict(key: tuple):
+    return ValueError(f"play id {key[1]} is used for two different plays")
+
+
+def to_snapshot(data: dict) -> Snapshot:
+    """Flatten a playbooks document into keyed records.
+
+    data["playbooks"] may be any iterable of playbooks; it is read once.
+    """
+    snapshot = Snapshot(header={k: v for k, v in data.items() if k != "playbooks"})
+    records = snapshot.records
+    for pb in data["playbooks"]:
+        snapshot.order.append(pb["id"])
+        for key, value in _flatten(pb):
+            if key[0] != "p":
+                records[key] = value
+            elif records.setdefault(key, value) != value:
+                raise _conflict(key)
+    return snapshot
+
+
+def to_document(snapshot: Snapshot) -> dict:
+    """Rebuild the playbooks document from a snapshot's records."""
+    return {**snapshot.header, "playbooks": list(iter_playbooks(snapshot))}
+
+
+def iter_playbooks(snapshot: Snapshot) -> Iterator[dict]:
+    """Rebuild a snapshot's playbooks one at a time, in order."""
+    records = snapshot.records
+    for pb_id in snapshot.order:
+        fields, groups = records[("pb", pb_id)]
+        formation_groups = []
+        for group_name, slugs in groups:
+            formations = []
+            for slug in slugs:
+                name, play_ids = records[("f", pb_id, group_name, slug)]
+                plays = []
+                for play_id in play_ids:
+                    play_name, play_slug, play_type = records[("p", play_id)]
+                    plays.append({"id": play_id, "name": play_name, "slug": play_slug, "type": play_type})
+                formations.append({"name": name, "slug": slug, "plays": plays})
+            formation_groups.append({"name": group_name, "formations": formations})
+        yield {**fields, "formationGroups": formation_groups}
+
+
+def diff(old: Snapshot, new: Snapshot) -> dict:
+    """The delta that turns old into new."""
+    changes = [[list(key), old.records.get(key), value]
+               for key, value in new.records.items() if old.records.get(key) != value]
+    changes += [[list(key), value, None] for key, value in old.records.items() if key not in new.records]
+    delta = {
+        "header": {k: [old.header.get(k), new.header.get(k)]
+                   for k in {**old.header, **new.header} if old.header.get(k) != new.header.get(k)},
+        "changes": changes,
+    }
+    if old.order != new.order:
+        delta["order"] = [old.order, new.order]
+    return delta
+
+
+def diff_document(old: Snapshot, data: dict) -> dict:
+    """diff(old, to_snapshot(data)), without building the new snapshot.
+
+    data["playbooks"] is read once, one playbook at a time; besides old,
+    only the new keys and the records that changed are held.
+    """
+    header = {k: v for k, v in data.items() if k != "playbooks"}
+    order, seen, changed = [], set(), {}
+    for pb in data["playbooks"]:
+        order.append(pb["id"])
+        for key, value in _flatten(pb):
+            before = old.records.get(key)
+            if key in seen and key[0] == "p":
+                # The first of two records for a play wins, as in to_snapshot()
+                if changed.get(key, before) != value:
+                    raise _conflict(key)
+                continue
+            seen.add(key)
+            if value != before:
+                changed[key] = value
+            else:
+                changed.pop(key, None)
+    changes = [[list(key), old.records.get(key), value] for key, value in changed.items()]
+    changes += [[list(key), value, None] for key, value in old.records.items() if key not in seen]
+    delta = {
+        "header": {k: [old.header.get(k), header.get(k)]
+                   for k in {**old.header, **header} if old.header.get(k) != header.get(k)},
+        "changes": changes,
+    }
+    if old.order != order:
+        delta["order"] = [old.order, order]
+    return delta
+
+
+def apply(snapshot: Snapshot, delta: dict) -> Snapshot:
+    """Apply a delta to a snapshot in place and return it."""
+    for key, (_, after) in delta["header"].items():
+        if after is None:
+            snapshot.header.pop(key, None)
+        else:
+            snapshot.header[key] = after
+    for key, _, after in delta["changes"]:
+        if after is None:
+            snapshot.records.pop(tuple(key), None)
+        else:
+            snapshot.records[tuple(key)] = after
+    if "order" in delta:
+        snapshot.order = list(delta["order"][1])
+    return snapshot
+
+
+def compose(deltas: Iterable[dict]) -> dict:
+    """Fold consecutive deltas into one, keeping each record's first before and last after."""
+    header: dict[str, list] = {}
+    net: dict[tuple, list] = {}
+    order = None
+    for delta in deltas:
+        for key, (before, after) in delta["header"].items():
+            header.setdefault(key, [before, after])[1] = after
+        for key, before, after in delta["changes"]:
+            net.setdefault(tuple(key), [before, after])[1] = after
+        if "order" in delta:
+            order = [order[0] if order else delta["order"][0], delta["order"][1]]
+    result = {
+        "header": {k: v for k, v in header.items() if v[0] != v[1]},
+        "changes": [[list(key), before, after] for key, (before, after) in net.items() if before != after],
+    }
+    if order and order[0] != order[1]:
+        result["order"] = order
+    return result
+
+
+def describe(delta: dict) -> dict:
+    """Summarize a delta as playbooks, formations and plays added, removed or changed."""
+    # Where each play sits, from the formation records that changed with it
+    located: dict[str, dict] = {}
+    for key, before, after in delta["changes"]:
+        if key[0] == "f":
+            for state in (before, after):
+                for play_id in (state or [None, []])[1]:
+                    located.setdefault(play_id, {"playbook": key[1], "formationGroup": key[2], "formation": key[3]})
+
+    report = {
+        "playbooks": {"added": [], "removed": []},
+        "formations": {"added": [], "removed": []},
+        "plays": {"added": [], "removed": [], "reclassified": [], "renamed": []},
+    }
+    for key, before, after in sorted(delta["changes"], key=lambda change: change[0]):
+        kind = key[0]
+        if kind == "pb":
+            if before is None or after is None:
+                report["playbooks"]["added" if before is None else "removed"].append(key[1])
+        elif kind == "f":
+            if before is None or after is None:
+                entry = {"playbook": key[1], "formationGroup": key[2], "slug": key[3], "name": (after or before)[0]}
+                report["formations"]["added" if before is None else "removed"].append(entry)
+        elif kind == "p":
+            play_id = key[1]
+            entry = {"id": play_id, "name": (after or before)[0], "type": (after or before)[2],
+                     **located.get(play_id, {})}
+            if before is None:
+                report["plays"]["added"].append(entry)
+            elif after is None:
+                report["plays"]["removed"].append(entry)
+            else:
+                if before[2] != after[2]:
+                    report["plays"]["reclassified"].append({**entry, "previousType": before[2]})
+                if before[0] != after[0]:
+                    report["plays"]["renamed"].append({**entry, "previousName": before[0]})
+    return report
+
+
+def _read(path: Path):
+    with gzip.open(path, "rt") as f:
+        return json.load(f)
+
+
+def _write(path: Path, value) -> int:
+    body = gzip.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), mtime=0)
+    write_bytes_atomic(path, body)
+    return len(body)
+
+
+def _write_base(path: Path, snapshot: Snapshot) -> int:
+    """Write a snapshot's document like _write(), serializing one playbook at a time."""
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    head = json.dumps({**snapshot.header, "playbooks": []}, separators=(",", ":"))[:-2]
+    parts = [compressor.compress(head.encode("utf-8"))]
+    for i, playbook in enumerate(iter_playbooks(snapshot)):
+        text = ("," if i else "") + json.dumps(playbook, separators=(",", ":"))
+        parts.append(compressor.compress(text.encode("utf-8")))
+    parts.append(compressor.compress(b"]}"))
+    parts.append(compressor.flush())
+    body = b"".join(parts)
+    write_bytes_atomic(path, body)
+    return len(body)
+
+
+class History:
+    """A directory of snapshots; see the module docstring for the layout."""
+
+    def __init__(self, directory: Path = DEFAULT_DIR, rebase_every: int = REBASE_EVERY,
+                 rebase_ratio: float = REBASE_RATIO):
+        self.directory = Path(directory)
+        self.rebase_every = rebase_every
+        self.rebase_ratio = rebase_ratio
+        self.index_path = self.directory / "index.json"
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get("format") != FORMAT or index.get("formatVersion") != FORMAT_VERSION:
+                raise ValueError(f"{self.index_path} is not a {FORMAT} v{FORMAT_VERSION} index")
+            self.snapshots: list[dict] = index["snapshots"]
+        else:
+            self.snapshots = []
+
+    def _base_path(self, snapshot_id: int) -> Path:
+        return self.directory / f"{snapshot_id:05d}.base.json.gz"
+
+    def _delta_path(self, snapshot_id: int) -> Path:
+        return self.directory / f"{snapshot_id:05d}.delta.json.gz"
+
+    def _save_index(self):
+        write_json_atomic(self.index_path, {
+            "format": FORMAT, "formatVersion": FORMAT_VERSION, "snapshots": self.snapshots,
+        })
+
+    def _entry(self, snapshot_id: int) -> dict:
+        if not 0 <= snapshot_id < len(self.snapshots):
+            raise KeyError(f"no snapshot {snapshot_id} (have 0..{len(self.snapshots) - 1})")
+        return self.snapshots[snapshot_id]
+
+    def _last_base(self, snapshot_id: int) -> int:
+        return max(s["id"] for s in self.snapshots[:snapshot_id + 1] if s["baseBytes"])
+
+    def deltas(self, start: int, end: int) -> Iterable[dict]:
+        """Deltas taking snapshot start to snapshot end (start <= end)."""
+        for snapshot_id in range(start + 1, end + 1):
+            yield _read(self._delta_path(snapshot_id))
+
+    def load(self, snapshot_id: int) -> Snapshot:
+        self._entry(snapshot_id)
+        base = self._last_base(snapshot_id)
+        snapshot = to_snapshot(_read(self._base_path(base)))
+        for delta in self.deltas(base, snapshot_id):
+            apply(snapshot, delta)
+        return snapshot
+
+    def document(self, snapshot_id: int) -> dict:
+        """Reconstruct a snapshot as a playbooks.json document."""
+        return to_document(self.load(snapshot_id))
+
+    def record(self, data: dict) -> dict:
+        """Add a snapshot of data; returns its index entry.
+
+        data["playbooks"] may be an iterator: it is read once and diffed
+        against the previous snapshot as it goes (diff_document), and a new
+        base is that snapshot with the delta applied.
+        """
+        snapshot_id = len(self.snapshots)
+        entry = {"id": snapshot_id, "header": {k: v for k, v in data.items() if k != "playbooks"},
+                 "baseBytes": 0, "deltaBytes": 0}
+        if snapshot_id:
+            snapshot = self.load(snapshot_id - 1)
+            delta = diff_document(snapshot, data)
+            entry["deltaBytes"] = _write(self._delta_path(snapshot_id), delta)
+            base = self._entry(self._last_base(snapshot_id - 1))
+            since_base = self.snapshots[base["id"] + 1:] + [entry]
+            rebase = (
+                len(since_base) >= self.rebase_every
+                or sum(s["deltaBytes"] for s in since_base) >= self.rebase_ratio * base["baseBytes"]
+            )
+        else:
+            snapshot, delta = to_snapshot(data), None
+            rebase = True
+        if rebase:
+            if delta:
+                apply(snapshot, delta)
+            entry["baseBytes"] = _write_base(self._base_path(snapshot_id), snapshot)
+        self.snapshots.append(entry)
+        self._save_index()
+        return entry
+
+    def rebase(self, snapshot_id: Optional[int] = None) -> dict:
+        """Store a full base for a snapshot (default: the latest)."""
+        if snapshot_id is None:
+            snapshot_id = len(self.snapshots) - 1
+        entry = self._entry(snapshot_id)
+        if not entry["baseBytes"]:
+            entry["baseBytes"] = _write_base(self._base_path(snapshot_id), self.load(snapshot_id))
+            self._save_index()
+        return entry
+
+    def changes(self, start: int, end: int) -> dict:
+        """Net delta between two snapshots, from the deltas alone."""
+        self._entry(start)
+        self._entry(end)
+        if start <= end:
+            return compose(self.deltas(start, end))
+        # Backwards: fold forward, then swap before and after
+        forward = compose(self.deltas(end, start))
+        backward = {
+            "header": {k: [after, before] for k, (before, after) in forward["header"].items()},
+            "changes": [[key, after, before] for key, before, after in forward["changes"]],
+        }
+        if "order" in forward:
+            backward["order"] = forward["order"][::-1]
+        return backward
+
+    def size(self) -> int:
+        return sum(s["baseBytes"] + s["deltaBytes"] for s in self.snapshots)
+
+
+def print_report(report: dict):
+    for section, kinds in report.items():
+        counts = ", ".join(f"{len(items)} {kind}" for kind, items in kinds.items())
+        print(f"  {section:<11} {counts}")
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Snapshot history of scraped playbooks")
+    parser.add_argument("--dir", type=Path, default=DEFAULT_DIR, help=f"history directory (default: {DEFAULT_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="add a snapshot of a playbooks JSON file")
+    record.add_argument("input", type=Path)
+
+    commands.add_parser("list", help="list snapshots")
+
+    show = commands.add_parser("show", help="reconstruct a snapshot as playbooks.json")
+    show.add_argument("id", type=int)
+    show.add_argument("output", type=Path)
+
+    changes = commands.add_parser("changes", help="what changed between two snapshots")
+    changes.add_argument("start", type=int)
+    changes.add_argument("end", type=int)
+    changes.add_argument("-o", "--output", type=Path, help="write the full report as JSON")
+
+    rebase = commands.add_parser("rebase", help="store a full base for a snapshot")
+    rebase.add_argument("id", type=int, nargs="?")
+
+    args = parser.parse_args(argv)
+    history = History(args.dir)
+
+    if args.command == "record":
+        with open(args.input) as f:
+            entry = history.record(json.load(f))
+        print(f"Snapshot {entry['id']}: delta {entry['deltaBytes'] / 1024:.1f} KB"
+              + (f", base {entry['baseBytes'] / 1024:.0f} KB" if entry["baseBytes"] else ""))
+    elif args.command == "list":
+        for s in history.snapshots:
+            stored = "base + delta" if s["baseBytes"] and s["deltaBytes"] else "base" if s["baseBytes"] else "delta"
+            print(f"{s['id']:5d}  {s['header'].get('scrapedAt', '?'):<22} {stored:<13}"
+                  f"{(s['baseBytes'] + s['deltaBytes']) / 1024:8.1f} KB")
+        print(f"Total {history.size() / 1024:.0f} KB")
+    elif args.command == "show":
+        write_json_atomic(args.output, history.document(args.id))
+        print(f"Wrote snapshot {args.id} to {args.output}")
+    elif args.command == "changes":
+        report = describe(history.changes(args.start, args.end))
+        print(f"Snapshot {args.start} -> {args.end}:")
+        print_report(report)
+        if args.output:
+            write_json_atomic(args.output, report)
+    elif args.command == "rebase":
+        entry = history.rebase(args.id)
+        print(f"Snapshot {entry['id']} base: {entry['baseBytes'] / 1024:.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
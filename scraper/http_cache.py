@@ -0,0 +1,184 @@
+"""
+On-disk HTTP response cache for the scraper.
+
+Bodies are stored gzip-compressed under ``bodies/`` and named by the
+SHA-256 of their content, so identical pages share one file. Each URL has
+a small JSON entry under ``entries/`` recording the body hash, encoding,
+ETag/Last-Modified validators and when it was fetched. Entry mtimes double
+as last-used times for LRU eviction.
+
+Modes:
+    replay      serve only from the cache; a miss is treated as a failed fetch
+    revalidate  always ask the server, with If-None-Match/If-Modified-Since
+    ttl         serve entries younger than ``ttl`` directly, revalidate the rest
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional
+
+from fileutil import write_bytes_atomic
+
+MODES = ("replay", "revalidate", "ttl")
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "output" / "http_cache"
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body_hash: str
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Content-addressed response cache with TTL expiry and size-bounded LRU eviction."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIR,
+        mode: str = "revalidate",
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode {mode!r}, expected one of {MODES}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    # Plain strings rather than Paths: pathlib interns every path component,
+    # which on a long crawl keeps a string alive per cached page
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.directory, "entries", f"{hashlib.sha256(url.encode()).hexdigest()}.json")
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, "bodies", body_hash[:2], f"{body_hash}.gz")
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for url, or None if it is missing or its body is gone."""
+        path = self._entry_path(url)
+        try:
+            with open(path) as f:
+                entry = CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not os.path.exists(self._body_path(entry.body_hash)):
+            return None
+        os.utime(path)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether entry can be served without asking the server."""
+        if self.mode == "replay":
+            return True
+        if self.mode == "ttl" and self.ttl is not None:
+            return time.time() - entry.fetched_at < self.ttl
+        return False
+
+    def read_body(self, entry: CacheEntry) -> bytes:
+        with open(self._body_path(entry.body_hash), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def store(self, url: str, body: bytes, encoding: Optional[str], headers: Mapping[str, str]) -> CacheEntry:
+        """Save a fresh 200 response."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(body_hash)
+        added = 0
+        if not os.path.exists(body_path):
+            compressed = gzip.compress(body, compresslevel=6)
+            write_bytes_atomic(body_path, compressed, fsync=False)
+            added = len(compressed)
+
+        entry = CacheEntry(
+            url=url,
+            body_hash=body_hash,
+            encoding=encoding,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            fetched_at=time.time(),
+        )
+        self._write_entry(entry)
+
+        if added and self.max_bytes is not None:
+            with self._lock:
+                if self._size is None:
+                    self._size = self._scan_size()
+                else:
+                    self._size += added
+                over = self._size > self.max_bytes
+            if over:
+                self.evict()
+        return entry
+
+    def touch(self, entry: CacheEntry):
+        """Mark entry as just validated by the server (after a 304)."""
+        entry.fetched_at = time.time()
+        self._write_entry(entry)
+
+    def _write_entry(self, entry: CacheEntry):
+        write_bytes_atomic(self._entry_path(entry.url), json.dumps(entry.__dict__).encode(), fsync=False)
+
+    def _scan_size(self) -> int:
+        bodies = self.directory / "bodies"
+        if not bodies.exists():
+            return 0
+        return sum(p.stat().st_size for p in bodies.glob("*/*.gz"))
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for path in (self.directory / "entries").glob("*.json"):
+                try:
+                    with open(path) as f:
+                        body_hash = json.load(f)["body_hash"]
+                    entries.append((path.stat().st_mtime, path, body_hash))
+                except (OSError, ValueError, KeyError):
+                    path.unlink(missing_ok=True)
+            entries.sort()
+
+            refs: dict[str, int] = {}
+            for _, _, body_hash in entries:
+                refs[body_hash] = refs.get(body_hash, 0) + 1
+
+            size = self._scan_size()
+            # Evict down to 90% so we don't rescan on every subsequent store
+            target = int(self.max_bytes * 0.9)
+            for _, path, body_hash in entries:
+                if size <= target:
+                    break
+                path.unlink(missing_ok=True)
+                refs[body_hash] -= 1
+                if refs[body_hash] == 0:
+                    body_path = self._body_path(body_hash)
+                    try:
+                        size -= os.stat(body_path).st_size
+                        os.unlink(body_path)
+                    except OSError:
+                        pass
+            self._size = size
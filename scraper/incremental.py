@@ -0,0 +1,180 @@
+"""
+Incremental re-scrape support.
+
+Each playbook page is fetched again (through the response cache, so an
+unchanged page costs a 304) and each formation's entry on it is
+fingerprinted: group, name and slug. A formation whose entry matches the
+previous playbooks.json keeps its previous plays without a request; only
+new formations, and formations whose entry changed, are fetched. No extra
+state file is needed. A weekly re-crawl therefore costs the playbook
+index, one request per playbook, and the formations that changed.
+
+The playbook page lists formations, not plays, so a play changed inside
+an otherwise unchanged formation isn't seen that way. --revalidate is the
+fallback for that: every formation page is requested too, conditionally
+with its ETag and Last-Modified, so an unchanged page costs a 304 with no
+body, and no share of the politeness budget; pages are parsed again from
+the cached body. Where the site has a sitemap, --sitemap's <lastmod>s
+find those changes without a request per page (sitemap.py).
+
+main() turns the cache on in revalidate mode for --incremental if it is
+off. Formations fetched again are compared with their previous play list
+(ids, names and types, in order) to count them as changed or unchanged.
+A formation page that can't be fetched keeps its previous plays.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from fileutil import iter_json_array
+from scrape_huddle import assemble_playbook, failed_urls, fetch_raw, find_formations, parse_timer, scrape_formations
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def formation_fingerprint(group_name: str, formation: dict) -> str:
+    """Fingerprint of a formation's entry on its playbook page."""
+    return _digest([group_name, formation["name"], formation["slug"]])
+
+
+def plays_fingerprint(plays: list[dict]) -> str:
+    """Fingerprint of a formation's play list."""
+    return _digest([[play["id"], play["name"], play.get("type")] for play in plays])
+
+
+def load_previous(path: Path, ids: Optional[set[str]] = None) -> dict[str, dict]:
+    """Load a previous playbooks.json as playbook id -> playbook, only ``ids`` if given."""
+    if not path.exists():
+        return {}
+    return {pb["id"]: pb for pb in iter_json_array(path, "playbooks") if ids is None or pb["id"] in ids}
+
+
+def scrape_playbook_incremental(
+    playbook: dict,
+    previous: Optional[dict],
+    executor: Optional[Executor] = None,
+    stats: Optional[Counter] = None,
+    resume: Optional[dict[str, list[dict]]] = None,
+    on_formation: Optional[Callable[[dict, str], None]] = None,
+    revalidate: bool = False,
+) -> dict:
+    """Scrape a playbook, fetching only formations whose entry on its page changed.
+
+    With ``revalidate`` the other formation pages are requested too, with
+    conditional GETs, and their plays compared with ``previous``. ``stats``
+    (if given) counts formations under ``reused`` (not requested),
+    ``unchanged``, ``changed`` and ``new``. ``resume`` and ``on_formation``
+    are as for scrape_playbook().
+    """
+    stats = stats if stats is not None else Counter()
+
+    if previous is None:
+        print(f"\nScraping new playbook: {playbook['name']} ({playbook['type']})")
+    else:
+        print(f"\nChecking playbook: {playbook['name']} ({playbook['type']})")
+
+    page = fetch_raw(playbook["url"])
+    if page is None:
+        if previous is not None:
+            # Keep last known data rather than replacing it with nothing
+            print("  Could not fetch playbook page, keeping previous data")
+            return previous
+        return {**playbook, "formationGroups": []}
+
+    with parse_timer("playbook", playbook["url"]):
+        formation_groups = find_formations(page.content, playbook, page.encoding)
+
+    known = {}
+    for group in (previous or {}).get("formationGroups", []):
+        for formation in group["formations"]:
+            known[formation_fingerprint(group["name"], formation)] = formation["plays"]
+
+    counts = Counter()
+    todo = []
+    for group_name, entries in formation_groups.items():
+        for formation, url in entries:
+            before = known.get(formation_fingerprint(group_name, formation))
+            if resume and url in resume:
+                formation["plays"] = resume[url]
+            elif before is not None and not revalidate:
+                formation["plays"] = before
+                counts["reused"] += 1
+            else:
+                todo.append((formation, url, before))
+
+    if revalidate:
+        print(f"  Revalidating {len(todo)} formations")
+    else:
+        print(f"  Fetching {len(todo)} new or changed formations, reusing {counts['reused']}")
+    scrape_formations([(formation, url) for formation, url, _ in todo], playbook["slug"], executor, on_formation)
+
+    for formation, url, before in todo:
+        if before is None:
+            counts["new"] += 1
+        elif url in failed_urls:
+            formation["plays"] = before
+        elif plays_fingerprint(formation["plays"]) == plays_fingerprint(before):
+            counts["unchanged"] += 1
+        else:
+            counts["changed"] += 1
+    stats.update(counts)
+    if revalidate:
+        print(f"  {counts['changed']} changed, {counts['new']} new, {counts['unchanged']} unchanged")
+    return assemble_playbook(playbook, formation_groups)
+
+
+PLAY_FIELDS = ("id", "name", "playbook", "formationGroup", "formation")
+
+
+def _iter_plays(playbooks: Iterable[dict]) -> Iterator[tuple]:
+    """Each play as a tuple of PLAY_FIELDS."""
+    for pb in playbooks:
+        for group in pb.get("formationGroups", []):
+            for formation in group.get("formations", []):
+                for play in formation.get("plays", []):
+                    yield play["id"], play["name"], pb["id"], group["name"], formation["name"]
+
+
+def diff_plays(old_playbooks: Iterable[dict], new_playbooks: Iterable[dict]) -> dict:
+    """Compare two scrapes by play id.
+
+    Returns added and removed plays, and plays whose id is unchanged but
+    whose display name differs (renamed). Both sides are read once, one
+    playbook at a time; only an index of the old plays is kept.
+    """
+    old = {play[0]: play for play in _iter_plays(old_playbooks)}
+    seen = set()
+    added, renamed = [], []
+    for play in _iter_plays(new_playbooks):
+        if play[0] in seen:
+            continue
+        seen.add(play[0])
+        before = old.get(play[0])
+        if before is None:
+            added.append(dict(zip(PLAY_FIELDS, play)))
+        elif before[1] != play[1]:
+            renamed.append({**dict(zip(PLAY_FIELDS, play)), "previousName": before[1]})
+
+    return {
+        "added": added,
+        "removed": [dict(zip(PLAY_FIELDS, play)) for play_id, play in old.items() if play_id not in seen],
+        "renamed": renamed,
+    }
+
+
+def write_diff_report(report: dict, path: Path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nChanges since previous scrape ({path.name}):")
+    print(f"  Added plays:   {len(report['added'])}")
+    print(f"  Removed plays: {len(report['removed'])}")
+    print(f"  Renamed plays: {len(report['renamed'])}")
@@ -0,0 +1,196 @@
+"""
+Append-only crawl journal for crash-safe resume.
+
+Each finished formation and each finished playbook is appended to a JSONL
+file as soon as it completes, then flushed and fsynced, so a crash loses
+at most the formation being fetched. Checkpoint cost is one small record
+per item regardless of how far into the crawl we are.
+
+Record kinds:
+    {"kind": "formation", "playbook": id, "url": formation url, "plays": [...]}
+    {"kind": "playbook", "playbook": {...full playbook dict...}}
+
+Loading is a single pass; a torn final line from a crash (one that
+doesn't parse, or lacks its newline) is ignored, and cut off before the
+first new record is appended, so records written after a crash don't end
+up behind it. Loading keeps only the byte offset of
+each finished playbook's record, and the formations of playbooks that
+never finished, so resuming a long crawl doesn't hold the crawl in
+memory. playbooks() reads finished playbooks
+back one at a time, and compact() streams them into the final
+playbooks.json through a temp file and an atomic rename.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from fileutil import StreamingJsonWriter, write_bytes_atomic
+
+
+@dataclass
+class JournalState:
+    # playbook id -> byte offset of its finished record, see Journal.read_playbook()
+    playbooks: dict[str, int] = field(default_factory=dict)
+    # formation url -> plays, for formations of unfinished playbooks
+    formations: dict[str, list[dict]] = field(default_factory=dict)
+
+
+class Journal:
+    """Thread-safe append-only JSONL journal of finished formations and playbooks."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+        # Finished playbooks' offsets, kept up to date by record_playbook() once load() ran
+        self._offsets: Optional[dict[str, int]] = None
+        # Length of the journal up to any torn line, as of load(); cut to it before appending
+        self._intact: Optional[int] = None
+
+    def load(self) -> JournalState:
+        """Replay the journal in one pass."""
+        state = JournalState()
+        if not self.path.exists():
+            self._intact = 0
+            return state
+
+        # playbook id -> {formation url: plays}, dropped once the playbook finishes
+        unfinished: dict[str, dict[str, list[dict]]] = {}
+        with open(self.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    # Torn write from a crash, even if what made it to disk parses:
+                    # the next record would be appended onto the same line
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; everything before it is intact
+                    break
+                if record["kind"] == "formation":
+                    unfinished.setdefault(record["playbook"], {})[record["url"]] = record["plays"]
+                elif record["kind"] == "playbook":
+                    state.playbooks[record["playbook"]["id"]] = offset
+                    unfinished.pop(record["playbook"]["id"], None)
+        self._intact = offset
+        for formations in unfinished.values():
+            state.formations.update(formations)
+        self._offsets = dict(state.playbooks)
+        return state
+
+    def read_playbook(self, offset: int) -> dict:
+        """The finished playbook recorded at ``offset`` (from JournalState.playbooks)."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["playbook"]
+
+    def _append(self, record: dict) -> int:
+        """Write one record; returns its byte offset."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._truncate_torn()
+                self._file = open(self.path, "ab")
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            # The file now ends past what load() measured
+            self._intact = None
+            return offset
+
+    def _truncate_torn(self):
+        """Cut a torn last line, so the next record starts a line of its own."""
+        if self._intact is None:
+            self.load()
+        if self.path.exists() and self.path.stat().st_size > self._intact:
+            os.truncate(self.path, self._intact)
+
+    def record_formation(self, playbook_id: str, url: str, plays: list[dict]):
+        self._append({"kind": "formation", "playbook": playbook_id, "url": url, "plays": plays})
+
+    def record_playbook(self, playbook: dict):
+        offset = self._append({"kind": "playbook", "playbook": playbook})
+        if self._offsets is not None:
+            self._offsets[playbook["id"]] = offset
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def keep_unfinished(self):
+        """Drop finished playbooks, keeping only formations of playbooks that never finished.
+
+        The next run then scrapes every playbook afresh, except that a
+        playbook cut short still resumes from its finished formations.
+        """
+        self.close()
+        finished = set(self.load().playbooks)
+        kept = []
+        with open(self.path, "rb") if self.path.exists() else nullcontext(b"") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record["kind"] == "formation" and record["playbook"] not in finished:
+                    kept.append(line)
+        if kept:
+            write_bytes_atomic(self.path, b"".join(kept))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._offsets = None
+
+    def remove(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+        self._offsets = None
+
+    def playbooks(
+        self, order: Iterable[str], pending: Optional[dict[str, dict]] = None
+    ) -> Iterator[dict]:
+        """Yield finished playbooks in ``order`` of ids, reading one record at a time.
+
+        ``pending`` maps ids to playbooks that are not finished (so not in the
+        journal) but should still be included; they take precedence.
+        """
+        self.close()
+        offsets = self._offsets if self._offsets is not None else self.load().playbooks
+        pending = pending or {}
+        with open(self.path, "rb") if self.path.exists() else nullcontext() as f:
+            for pb_id in order:
+                if pb_id in pending:
+                    yield pending[pb_id]
+                elif pb_id in offsets:
+                    f.seek(offsets[pb_id])
+                    yield json.loads(f.readline())["playbook"]
+
+    def compact(
+        self, output_path: Path, header: dict, order: Iterable[str], pending: Optional[dict[str, dict]] = None
+    ) -> list[str]:
+        """Stream the final output from finished playbooks, in ``order`` of ids.
+
+        ``pending`` is as for playbooks(). Returns the ids written.
+        """
+        written = []
+        with StreamingJsonWriter(output_path, header, "playbooks") as writer:
+            for playbook in self.playbooks(order, pending):
+                writer.write(playbook)
+                written.append(playbook["id"])
+        return written
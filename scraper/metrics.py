@@ -0,0 +1,280 @@
+"""
+Crawl instrumentation: counters, histograms, a progress line and a parse profiler.
+
+The scraper records into the module-level ``metrics`` registry:
+
+    counters     http_responses_total{status}, cache_total{result},
+                 fetch_errors_total, response_bytes_total, pages_parsed_total{page}
+    histograms   rate_limit_wait_seconds, fetch_seconds, parse_seconds{page},
+                 formation_seconds, checkpoint_seconds, write_seconds{output}
+
+Histograms keep the slowest few observations with a key (e.g. the formation
+url) so slow pages can be named. Everything can be exported as JSONL (one
+line per series) or in the Prometheus text exposition format.
+"""
+
+from __future__ import annotations
+
+import bisect
+import cProfile
+import heapq
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Upper bounds in seconds; spans rate limit waits through slow page loads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOWEST_KEPT = 10
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket histogram that also remembers its slowest keyed observations."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.slowest: list[tuple[float, str]] = []
+
+    def observe(self, value: float, key: Optional[str] = None):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if key is not None:
+            if len(self.slowest) < SLOWEST_KEPT:
+                heapq.heappush(self.slowest, (value, key))
+            elif value > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (value, key))
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+            "slowest": [{"seconds": round(v, 6), "key": k} for v, k in sorted(self.slowest, reverse=True)],
+        }
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, Histogram]] = {}
+        self.started = time.time()
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, key: Optional[str] = None, **labels):
+        label_key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if label_key not in series:
+                series[label_key] = Histogram()
+            series[label_key].observe(value, key)
+
+    @contextmanager
+    def timer(self, name: str, key: Optional[str] = None, **labels) -> Iterator[None]:
+        """Observe the wall time of the block in histogram ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, key, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self.counters.get(name, {}).get(_label_key(labels), 0)
+
+    def total(self, name: str) -> float:
+        """Sum of a counter across all its labels."""
+        with self._lock:
+            return sum(self.counters.get(name, {}).values())
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        with self._lock:
+            return self.histograms.get(name, {}).get(_label_key(labels))
+
+    def write_jsonl(self, path: Path):
+        """One JSON line per series."""
+        with self._lock, open(path, "w") as f:
+            for name, series in sorted(self.counters.items()):
+                for labels, value in sorted(series.items()):
+                    f.write(json.dumps({"type": "counter", "name": name, "labels": dict(labels), "value": value}) + "\n")
+            for name, series in sorted(self.histograms.items()):
+                for labels, hist in sorted(series.items()):
+                    f.write(json.dumps({"type": "histogram", "name": name, "labels": dict(labels), **hist.to_dict()}) + "\n")
+
+    def write_prometheus(self, path: Path, prefix: str = "huddle_scraper_"):
+        """Prometheus text exposition format, e.g. for the node exporter textfile collector."""
+        def fmt(labels: tuple, extra: tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{prefix}{name}{fmt(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip([f"{b:g}" for b in hist.buckets] + ["+Inf"], hist.counts):
+                        cumulative += n
+                        lines.append(f"{prefix}{name}_bucket{fmt(labels, (('le', bound),))} {cumulative}")
+                    lines.append(f"{prefix}{name}_sum{fmt(labels)} {hist.sum:.6f}")
+                    lines.append(f"{prefix}{name}_count{fmt(labels)} {hist.count}")
+        Path(path).write_text("\n".join(lines) + "\n")
+
+    def write(self, path: Path):
+        """Export by file suffix: .prom/.txt as Prometheus text, anything else as JSONL."""
+        path = Path(path)
+        if path.suffix in (".prom", ".txt"):
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
+
+    def summary(self) -> list[str]:
+        """Human-readable time breakdown for the end-of-crawl report."""
+        lines = []
+        for name in ("rate_limit_wait_seconds", "fetch_seconds", "parse_seconds",
+                     "checkpoint_seconds", "write_seconds"):
+            with self._lock:
+                series = dict(self.histograms.get(name, {}))
+            for labels, hist in sorted(series.items()):
+                label = ",".join(v for _, v in labels)
+                title = f"{name}[{label}]" if label else name
+                lines.append(
+                    f"{title:<32} {hist.sum:9.2f}s total  {hist.count:6d} calls  "
+                    f"p50 {hist.quantile(0.5) * 1000:7.1f}ms  p95 {hist.quantile(0.95) * 1000:7.1f}ms"
+                )
+        formations = self.histogram("formation_seconds")
+        if formations and formations.slowest:
+            lines.append("Slowest formations:")
+            for value, key in sorted(formations.slowest, reverse=True)[:5]:
+                lines.append(f"  {value:6.2f}s  {key}")
+        return lines
+
+
+class ProgressLine:
+    """One-line crawl progress with throughput and ETA, redrawn in place on a terminal."""
+
+    def __init__(self, total: int, stream=None):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.stream = stream or sys.stderr
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def advance(self, pages: float, label: str = "", skipped: bool = False):
+        """Mark one more unit done; ``pages`` is the crawl's running page count.
+
+        Skipped units (already scraped on a resumed run) don't count towards the ETA rate.
+        """
+        with self._lock:
+            self.done += 1
+            self.skipped += skipped
+            elapsed = time.monotonic() - self.started
+            rate = pages / elapsed if elapsed else 0.0
+            worked = self.done - self.skipped
+            remaining = (self.total - self.done) * elapsed / worked if worked else 0.0
+            line = (
+                f"[{self.done}/{self.total}] {pages:.0f} pages, {rate:.2f} pages/s, "
+                f"elapsed {_duration(elapsed)}, ETA {_duration(remaining)} {label}"
+            )
+            if self.stream.isatty():
+                self.stream.write("\r\x1b[K" + line)
+                if self.done == self.total:
+                    self.stream.write("\n")
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+class ParseProfiler:
+    """cProfile limited to the parse calls, safe to use from several worker threads.
+
+    cProfile only profiles the thread that enabled it, so each thread gets its
+    own profiler and the stats are merged when dumped.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        prof = getattr(self._local, "profile", None)
+        if prof is None:
+            prof = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(prof)
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+
+    def dump(self, path: Path, top: int = 15):
+        """Write merged pstats to path and print the top functions by cumulative time."""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(str(path))
+        stats.sort_stats("cumulative").print_stats(top)
+
+
+metrics = Metrics()
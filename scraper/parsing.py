@@ -0,0 +1,106 @@
+"""
+Link extraction for Huddle.gg pages using lxml directly.
+
+These functions walk an lxml tree and return plain tuples, replacing
+the BeautifulSoup tree + find_all(href=re.compile(...)) passes used before.
+They mirror the BeautifulSoup semantics exactly: text is the concatenation
+of stripped descendant strings (get_text(strip=True)), hrefs are matched
+with re.search, and results come back in document order.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from functools import lru_cache
+from typing import Optional, Union
+
+import lxml.html
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+
+
+def sniff_encoding(content: bytes) -> str:
+    """Encoding declared in the page's first 1024 bytes, else UTF-8."""
+    match = _META_CHARSET.search(content, 0, 1024)
+    return match.group(1).decode("ascii").lower() if match else "utf-8"
+
+
+@lru_cache(maxsize=16)
+def _parser(encoding: str) -> lxml.html.HTMLParser:
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = "utf-8"
+    return lxml.html.HTMLParser(encoding=encoding)
+
+
+def parse_html(html: Union[str, bytes], encoding: Optional[str] = None) -> lxml.html.HtmlElement:
+    """Parse a page into an lxml tree.
+
+    Bytes are handed to lxml undecoded, in ``encoding`` (the charset from
+    the HTTP headers) or else whatever the page itself declares.
+    """
+    if isinstance(html, bytes):
+        return lxml.html.document_fromstring(html, parser=_parser(encoding or sniff_encoding(html)))
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+def text_of(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)."""
+    return "".join(text.strip() for text in element.itertext())
+
+
+def extract_links(element, pattern: re.Pattern) -> list[tuple[str, str, str]]:
+    """(text, slug, href) for every <a> under element whose href matches pattern.
+
+    The pattern's first group captures the slug.
+    """
+    links = []
+    for a in element.iter("a"):
+        href = a.get("href")
+        if href is None:
+            continue
+        match = pattern.search(href)
+        if match:
+            links.append((text_of(a), match.group(1), href))
+    return links
+
+
+def extract_formation_groups(root, pattern: re.Pattern) -> dict[str, list[tuple[str, str, str]]]:
+    """Formation links under each <h3> group header's following <ul>.
+
+    Returns group name -> [(formation name, formation slug, href)]. As with
+    the original parser, a repeated group name replaces the earlier group.
+    """
+    groups = {}
+    for h3 in root.iter("h3"):
+        group_name = text_of(h3)
+        if not group_name:
+            continue
+        ul = next(h3.itersiblings("ul"), None)
+        if ul is None:
+            continue
+        groups[group_name] = extract_links(ul, pattern)
+    return groups
+
+
+def extract_list_items(root) -> list[str]:
+    """Text of every <li> inside a <ul>, preferring the li's first link.
+
+    Each li is visited once, in document order. The original nested
+    ul/li loop visited nested items once per enclosing ul; after the
+    caller's de-duplication the result is the same.
+    """
+    names = []
+    for li in root.iter("li"):
+        if not any(ancestor.tag == "ul" for ancestor in li.iterancestors()):
+            continue
+        link = next(li.iter("a"), None)
+        names.append(text_of(link if link is not None else li))
+    return names
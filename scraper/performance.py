@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Season analytics over the app's recorded play performance.
+
+The playsheet app (src/lib/db.js) keeps, per game session, one
+playPerformance row per play called: callCount, successCount and
+yardsGained for a playId. Play ids are the scraper's
+({playbook}-{formation slug}-{play slug}), so an export of those Dexie
+tables joins straight onto playbooks.json.
+
+The export is read as a stream: either dexie-export-import's format
+
+    {"formatName": "dexie", "data": {"data": [{"tableName": "playPerformance", "rows": [...]}, ...]}}
+
+or a plain {"gameSessions": [...], "playPerformance": [...]} dump. Rows
+are decoded a buffer's worth at a time into columns, so memory holds
+numbers, not a season of row dicts. Each row's playId is looked up in a
+play index built from playbooks.json; the per-play, per-formation-group
+and per-run/pass sums are then np.bincount group-bys over those columns.
+
+Reported per play, formation group and type:
+
+    calls, successRate   with a 95% Wilson score interval
+    yardsPerCall         with a 95% interval from the ratio estimator's
+                         variance across rows (each row is one session's
+                         calls of a play, so rows are the sampling units)
+
+    python performance.py playsheet-export.json --playbooks output/playbooks.json
+    python performance.py playsheet-export.json --opponent Cowboys --top 20 -o output/performance.json
+    python -m scraper performance playsheet-export.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from fileutil import write_json_atomic
+
+FORMAT = "play-performance"
+FORMAT_VERSION = 1
+
+DEFAULT_PLAYBOOKS = Path(__file__).parent / "output" / "playbooks.json"
+Z = 1.959964  # 95% two-sided
+CHUNK = 1 << 20
+
+
+class _Buffer:
+    """A text file read a chunk at a time, with a cursor into what is buffered."""
+
+    def __init__(self, f):
+        self.f = f
+        self.text = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """Drop what was consumed and read another chunk; False at end of file."""
+        chunk = self.f.read(CHUNK)
+        if not chunk:
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def seek(self, pattern: re.Pattern) -> bool:
+        """Move past the next match of ``pattern``; False if there is none."""
+        while True:
+            match = pattern.search(self.text, self.pos)
+            if match:
+                self.pos = match.end()
+                return True
+            # Keep a tail in case a match straddles the chunk boundary
+            self.pos = max(self.pos, len(self.text) - 256)
+            if not self.fill():
+                return False
+
+
+_SKIP = re.compile(r"[\s,]*")
+
+
+def _decode_rows(buf: _Buffer, tries: int = 3) -> Optional[list[dict]]:
+    """The whole rows from the cursor to a "}" in the buffer, with one json.loads.
+
+    The cut is first made at the buffer's last "}", then before wherever
+    decoding failed. A cut that decodes falls between two rows.
+    """
+    end = buf.text.rfind("}", buf.pos) + 1
+    for _ in range(tries):
+        if end <= buf.pos:
+            return None
+        try:
+            batch = json.loads("[" + buf.text[buf.pos:end] + "]")
+        except json.JSONDecodeError as e:
+            end = buf.text.rfind("}", buf.pos, buf.pos + e.pos - 1) + 1
+        else:
+            buf.pos = end
+            return batch
+    return None
+
+
+def iter_batches(path: Path, table: str) -> Iterator[list[dict]]:
+    """Rows of one table of a Dexie JSON export, a buffer's worth at a time.
+
+    Rows are decoded with one json.loads per buffer (_decode_rows); where
+    no cut decodes (say, a "}" in a string at every try) they are decoded
+    one by one until the next read.
+    """
+    name = re.escape(table)
+    start = re.compile(rf'"tableName"\s*:\s*"{name}"|"{name}"\s*:\s*\[')
+    rows = re.compile(r'"rows"\s*:\s*\[')
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = _Buffer(f)
+        if not buf.seek(start):
+            return
+        if not buf.text[buf.pos - 1] == "[" and not buf.seek(rows):
+            return
+        batched = True
+        while True:
+            buf.pos = _SKIP.match(buf.text, buf.pos).end()
+            if buf.pos == len(buf.text):
+                if not buf.fill():
+                    raise ValueError(f"{path}: {table} rows end early")
+                batched = True
+                continue
+            if buf.text[buf.pos] == "]":
+                return
+            if batched:
+                batch = _decode_rows(buf)
+                if batch:
+                    yield batch
+                    continue
+                batched = False
+            try:
+                row, buf.pos = decoder.raw_decode(buf.text, buf.pos)
+            except json.JSONDecodeError:
+                # A row cut off at the end of the buffer, unless the file ends there
+                if buf.fill():
+                    batched = True
+                    continue
+                raise
+            yield [row]
+
+
+def iter_table(path: Path, table: str) -> Iterator[dict]:
+    """Rows of one table of a Dexie JSON export."""
+    for batch in iter_batches(path, table):
+        yield from batch
+
+
+@dataclass
+class PlayIndex:
+    """playbooks.json's plays, as columns, with play id -> row and group/type codes."""
+
+    ids: list[str]
+    rows: dict[str, int]
+    names: list[str]
+    playbooks: list[str]
+    formations: list[str]
+    group_names: list[str]
+    group: np.ndarray  # per play, index into group_names
+    type_names: list[str]
+    type: np.ndarray  # per play, index into type_names
+
+    @classmethod
+    def build(cls, data: dict) -> "PlayIndex":
+        ids, names, playbooks, formations, group_codes, type_codes = [], [], [], [], [], []
+        groups: dict[str, int] = {}
+        types: dict[str, int] = {}
+        for pb in data["playbooks"]:
+            for group in pb["formationGroups"]:
+                group_code = groups.setdefault(group["name"], len(groups))
+                for formation in group["formations"]:
+                    for play in formation["plays"]:
+                        ids.append(play["id"])
+                        names.append(play["name"])
+                        playbooks.append(pb["id"])
+                        formations.append(formation["name"])
+                        group_codes.append(group_code)
+                        type_codes.append(types.setdefault(play.get("type") or "unknown", len(types)))
+        return cls(
+            ids=ids,
+            rows={play_id: i for i, play_id in enumerate(ids)},
+            names=names,
+            playbooks=playbooks,
+            formations=formations,
+            group_names=list(groups),
+            group=np.array(group_codes, dtype=np.int64),
+            type_names=list(types),
+            type=np.array(type_codes, dtype=np.int64),
+        )
+
+
+@dataclass
+class PerformanceLog:
+    """playPerformance rows as columns; ``play`` is a PlayIndex row, -1 if unknown."""
+
+    session: np.ndarray
+    play: np.ndarray
+    calls: np.ndarray
+    successes: np.ndarray
+    yards: np.ndarray
+
+    @classmethod
+    def read(cls, batches: Iterable[list[dict]], index: PlayIndex) -> "PerformanceLog":
+        """Columns from batches of rows (iter_batches); a batch's dicts are dropped once read."""
+        dtypes = (np.int64, np.int64, np.float64, np.float64, np.float64)
+        columns = [[np.zeros(0, dtype=dtype)] for dtype in dtypes]
+        lookup = index.rows.get
+        for batch in batches:
+            for column, values, dtype in zip(columns, (
+                [row.get("sessionId") or 0 for row in batch],
+                [lookup(row.get("playId"), -1) for row in batch],
+                [row.get("callCount") or 0 for row in batch],
+                [row.get("successCount") or 0 for row in batch],
+                [row.get("yardsGained") or 0 for row in batch],
+            ), dtypes):
+                column.append(np.array(values, dtype=dtype))
+        return cls(*(np.concatenate(column) for column in columns))
+
+    def __len__(self) -> int:
+        return len(self.play)
+
+    def where(self, keep: np.ndarray) -> "PerformanceLog":
+        return PerformanceLog(self.session[keep], self.play[keep], self.calls[keep], self.successes[keep],
+                              self.yards[keep])
+
+
+# Sums kept per group: enough for rates, the Wilson interval and the ratio estimator's variance
+SUMS = ("rows", "calls", "successes", "yards", "yards2", "calls2", "yardsCalls")
+
+
+def group_sums(log: PerformanceLog, keys: np.ndarray, size: int) -> dict[str, np.ndarray]:
+    """Per-key sums of the log's columns; ``keys`` has a group index per row."""
+    columns = {
+        "rows": None,
+        "calls": log.calls,
+        "successes": log.successes,
+        "yards": log.yards,
+        "yards2": log.yards * log.yards,
+        "calls2": log.calls * log.calls,
+        "yardsCalls": log.yards * log.calls,
+    }
+    return {name: np.bincount(keys, weights=column, minlength=size).astype(np.float64)
+            for name, column in columns.items()}
+
+
+def regroup(sums: dict[str, np.ndarray], keys: np.ndarray, size: int) -> dict[str, np.ndarray]:
+    """Sums per coarser group: ``keys`` maps each finer group to one."""
+    return {name: np.bincount(keys, weights=values, minlength=size) for name, values in sums.items()}
+
+
+def statistics(sums: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Rates and 95% intervals from group sums; NaN where undefined."""
+    n, calls, successes, yards = sums["rows"], sums["calls"], sums["successes"], sums["yards"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.clip(successes / calls, 0, 1)
+        z2 = Z * Z / calls
+        center = (rate + z2 / 2) / (1 + z2)
+        half = Z * np.sqrt(rate * (1 - rate) / calls + z2 / (4 * calls)) / (1 + z2)
+
+        per_call = yards / calls
+        # Ratio estimator: sum over rows of (y - r c)^2, expanded into the kept sums
+        residual = sums["yards2"] - 2 * per_call * sums["yardsCalls"] + per_call * per_call * sums["calls2"]
+        se = np.sqrt(np.maximum(residual, 0) * n / (n - 1)) / calls
+        se[n < 2] = np.nan
+    return {
+        "successRate": rate, "successLow": center - half, "successHigh": center + half,
+        "yardsPerCall": per_call, "yardsLow": per_call - Z * se, "yardsHigh": per_call + Z * se,
+    }
+
+
+def _records(labels: list[dict], sums: dict[str, np.ndarray]) -> list[dict]:
+    """One record per group with calls, most called first."""
+    stats = statistics(sums)
+    order = np.argsort(-sums["calls"], kind="stable")
+    records = []
+    for i in order:
+        if sums["calls"][i] <= 0:
+            break
+        record = {**labels[i], "rows": int(sums["rows"][i]), "calls": int(sums["calls"][i]),
+                  "successes": int(sums["successes"][i]), "yards": float(sums["yards"][i])}
+        for name, values in stats.items():
+            value = values[i]
+            record[name] = None if np.isnan(value) else round(float(value), 4)
+        records.append(record)
+    return records
+
+
+def analyze(log: PerformanceLog, index: PlayIndex) -> dict:
+    """Per play, formation group and play type statistics of a performance log."""
+    matched = log.where(log.play >= 0)
+    plays = group_sums(matched, matched.play, len(index.ids))
+    groups = regroup(plays, index.group, len(index.group_names))
+    types = regroup(plays, index.type, len(index.type_names))
+    return {
+        "format": FORMAT,
+        "formatVersion": FORMAT_VERSION,
+        "rows": len(log),
+        "unmatchedRows": len(log) - len(matched),
+        "sessions": int(np.unique(log.session).size),
+        "plays": _records([
+            {"playId": index.ids[i], "name": index.names[i], "playbook": index.playbooks[i],
+             "formationGroup": index.group_names[index.group[i]], "formation": index.formations[i],
+             "type": index.type_names[index.type[i]]}
+            for i in range(len(index.ids))
+        ], plays),
+        "formationGroups": _records([{"name": name} for name in index.group_names], groups),
+        "types": _records([{"name": name} for name in index.type_names], types),
+    }
+
+
+def read_sessions(path: Path, opponent: Optional[str] = None, since: Optional[str] = None) -> Optional[np.ndarray]:
+    """Ids of the game sessions matching the filters, or None without filters."""
+    if opponent is None and since is None:
+        return None
+    return np.array([
+        session["id"] for session in iter_table(path, "gameSessions")
+        if (opponent is None or (session.get("opponent") or "").lower() == opponent.lower())
+        and (since is None or (session.get("date") or "") >= since)
+    ], dtype=np.int64)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Success rates and yards per call from a playsheet export")
+    parser.add_argument("export", type=Path, help="JSON export of the app's Dexie tables")
+    parser.add_argument("--playbooks", type=Path, default=DEFAULT_PLAYBOOKS, help="scraped playbooks JSON")
+    parser.add_argument("-o", "--output", type=Path, help="write the full report here")
+    parser.add_argument("--opponent", help="only sessions against this opponent")
+    parser.add_argument("--since", metavar="DATE", help="only sessions on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, default=15, help="plays to list")
+    args = parser.parse_args(argv)
+
+    with open(args.playbooks) as f:
+        index = PlayIndex.build(json.load(f))
+    log = PerformanceLog.read(iter_batches(args.export, "playPerformance"), index)
+    sessions = read_sessions(args.export, args.opponent, args.since)
+    if sessions is not None:
+        log = log.where(np.isin(log.session, sessions))
+    report = analyze(log, index)
+
+    print(f"{report['rows']} performance rows over {report['sessions']} sessions "
+          f"({report['unmatchedRows']} with play ids not in {args.playbooks.name})")
+    for title, records, label in (
+        ("Plays", report["plays"][:args.top], lambda r: f"{r['name']} ({r['playbook']}, {r['formation']})"),
+        ("Formation groups", report["formationGroups"], lambda r: r["name"]),
+        ("Run/pass", report["types"], lambda r: r["name"]),
+    ):
+        print(f"\n{title}:")
+        print(f"  {'':<48} {'calls':>6} {'success':>8} {'95% CI':>13} {'yds/call':>9} {'95% CI':>13}")
+        for r in records:
+            low = "" if r["yardsLow"] is None else f"{r['yardsLow']:5.1f}-{r['yardsHigh']:<5.1f}"
+            print(f"  {label(r)[:48]:<48} {r['calls']:>6} {r['successRate']:>8.1%} "
+                  f"{r['successLow']:>6.1%}-{r['successHigh']:<6.1%} {r['yardsPerCall']:>9.1f} {low:>13}")
+
+    if args.output:
+        write_json_atomic(args.output, report, indent=None)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
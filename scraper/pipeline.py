@@ -0,0 +1,125 @@
+"""
+Pipelined formation scraping: threads fetch, a process pool parses, one writer assembles.
+
+    fetch workers (threads)  ->  parse workers (processes)  ->  writer (caller's thread)
+
+Fetching is I/O bound and stays on threads. Extraction is CPU bound, so it
+runs in a ProcessPoolExecutor and can use more than one core. Workers get
+the raw page bytes and return plain play dicts, never parse trees. The writer
+consumes results strictly in page order, filling in each formation and
+yielding it there, so output and journal order match the serial path.
+
+Backpressure is an ordered window: formation i may start fetching only
+once the writer has consumed formation i - window. At most ``window``
+pages (fetched text or parsed plays) are in flight, whatever the speed
+of each stage. Because the window is ordered, the formation the writer
+waits on always holds a slot, so the pipeline can't deadlock.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+
+class Window:
+    """Admits item i once item i - size has been consumed."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.consumed = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def enter(self, index: int) -> bool:
+        """Block until item index may start. Returns False if the window was closed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or index < self.consumed + self.size)
+            return not self.closed
+
+    def advance(self):
+        with self._cond:
+            self.consumed += 1
+            self._cond.notify_all()
+
+    def close(self):
+        """Release every waiting item, e.g. when the writer failed."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+def _parse_job(
+    content: bytes, encoding: Optional[str], playbook_slug: str, formation_slug: str
+) -> tuple[list[dict], float]:
+    """Runs in a parse worker process; returns plays and the CPU seconds spent."""
+    from scrape_huddle import parse_formation_plays
+
+    start = time.process_time()
+    plays = parse_formation_plays(content, playbook_slug, formation_slug, encoding)
+    return plays, time.process_time() - start
+
+
+def _warm_up():
+    """Import the parser in each worker up front rather than on its first page."""
+    import scrape_huddle  # noqa: F401
+
+
+def create_parse_pool(workers: int) -> ProcessPoolExecutor:
+    pool = ProcessPoolExecutor(max_workers=workers)
+    for future in [pool.submit(_warm_up) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+def iter_formations_pipelined(
+    entries: Iterable[tuple[dict, str]],
+    playbook_slug: str,
+    parse_pool: Executor,
+    fetch_executor: Optional[Executor] = None,
+    window: int = 16,
+) -> Iterator[tuple[dict, str]]:
+    """Pipelined version of scrape_huddle.iter_formations().
+
+    The consumer is the writer: the window advances as each entry is
+    yielded, so a slow consumer holds back fetching too.
+    """
+    from scrape_huddle import fetch_raw, metrics
+
+    entries = list(entries)
+    gate = Window(window)
+
+    def fetch(index: int, url: str, formation_slug: str) -> Optional[Future]:
+        if not gate.enter(index):
+            return None
+        page = fetch_raw(url)
+        if page is None:
+            return None
+        return parse_pool.submit(_parse_job, page.content, page.encoding, playbook_slug, formation_slug)
+
+    own_executor = fetch_executor is None
+    if own_executor:
+        # Still overlap fetching with parsing when the crawl itself is serial
+        fetch_executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        fetches = [
+            fetch_executor.submit(fetch, i, url, formation["slug"])
+            for i, (formation, url) in enumerate(entries)
+        ]
+        for (formation, url), fetched in zip(entries, fetches):
+            parsed = fetched.result()
+            if parsed is None:
+                formation["plays"] = []
+            else:
+                formation["plays"], cpu = parsed.result()
+                metrics.inc("pages_parsed_total", page="formation")
+                metrics.observe("parse_seconds", cpu, url, page="formation")
+                print(f"    Found {len(formation['plays'])} plays in {formation['slug']}")
+            yield formation, url
+            gate.advance()
+    finally:
+        gate.close()
+        if own_executor:
+            fetch_executor.shutdown()
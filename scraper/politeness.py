@@ -0,0 +1,181 @@
+"""
+Adaptive politeness for the scraper: AIMD rate control, retry backoff and a circuit breaker.
+
+AdaptiveRate drives the shared TokenBucket's rate. Every healthy response
+(success status, latency under ``slow_latency``) adds ``increase`` requests
+per second, up to ``max_rate``. A throttle (429), server error or slow
+response multiplies the rate by ``decrease``, down to ``min_rate``. At most
+one decrease applies per request interval, so a burst of concurrent
+failures counts once. A ``Retry-After`` pauses the whole bucket.
+
+CircuitBreaker counts consecutive server failures. Once ``threshold``
+is reached it opens and every worker blocks for ``cooldown`` seconds.
+After that a single probe request goes out. If the probe succeeds the
+circuit closes; if it fails the circuit reopens with twice the cooldown,
+up to ``max_cooldown``. An outage therefore pauses the crawl rather than
+failing every remaining page.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+# Don't let a server park us for longer than this per Retry-After
+MAX_RETRY_AFTER = 300.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRate:
+    """Additive-increase/multiplicative-decrease control of a TokenBucket's rate."""
+
+    def __init__(
+        self,
+        bucket,
+        min_rate: float = 0.1,
+        max_rate: float = 2.0,
+        increase: Optional[float] = None,
+        decrease: float = 0.5,
+        slow_latency: float = 2.0,
+    ):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        # Default step reaches max_rate from zero in about 50 healthy responses
+        self.increase = increase if increase is not None else max_rate / 50
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self.enabled = True
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, max_rate: float, min_rate: Optional[float] = None, enabled: bool = True):
+        """Start at ``rate`` and adapt between min_rate and max_rate."""
+        with self._lock:
+            self.bucket.rate = rate
+            self.max_rate = max(max_rate, rate)
+            if min_rate is not None:
+                self.min_rate = min_rate
+            self.increase = self.max_rate / 50
+            self.enabled = enabled
+
+    def _active(self) -> bool:
+        # A rate of 0 means unlimited, which leaves nothing to adapt
+        return self.enabled and self.bucket.rate > 0
+
+    def success(self, latency: float):
+        if latency > self.slow_latency:
+            self._back_off()
+            return
+        with self._lock:
+            if self._active() and self.bucket.rate < self.max_rate:
+                self.bucket.rate = min(self.max_rate, self.bucket.rate + self.increase)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """The server pushed back (429, or an error with Retry-After)."""
+        if retry_after:
+            self.bucket.pause(retry_after)
+        self._back_off()
+
+    def failed(self):
+        self._back_off()
+
+    def _back_off(self):
+        with self._lock:
+            if not self._active():
+                return
+            now = time.monotonic()
+            if now - self._last_decrease < 1 / self.bucket.rate:
+                return
+            self._last_decrease = now
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * self.decrease)
+
+
+class CircuitBreaker:
+    """Pause every worker while the server looks down, probing with one request at a time."""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0, max_cooldown: float = 600.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._current_cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    def wait(self) -> float:
+        """Block until a request may be sent. Returns seconds waited."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if self.state == "closed":
+                    break
+                now = time.monotonic()
+                if self.state == "open":
+                    if now < self._open_until:
+                        self._cond.wait(self._open_until - now)
+                        continue
+                    self.state = "half-open"
+                    self._probing = False
+                if not self._probing:
+                    # This request is the probe
+                    self._probing = True
+                    break
+                self._cond.wait()
+        return time.monotonic() - start
+
+    def record_success(self):
+        with self._cond:
+            self.failures = 0
+            if self.state != "closed":
+                print("  Server is responding again, resuming crawl")
+                self.state = "closed"
+                self._current_cooldown = self.cooldown
+                self._cond.notify_all()
+
+    def record_failure(self):
+        with self._cond:
+            self.failures += 1
+            if self.state == "half-open":
+                self._current_cooldown = min(self.max_cooldown, self._current_cooldown * 2)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened += 1
+        self._probing = False
+        self._open_until = time.monotonic() + self._current_cooldown
+        print(f"  {self.failures} consecutive server failures, pausing crawl for {self._current_cooldown:.0f}s")
+        self._cond.notify_all()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Crawl scheduling: which playbooks to scrape first, and what fits in a time budget.
+
+Every playbook gets a priority score from three signals:
+
+    hot        listed with --hot: always ahead of the rest
+    staleness  days since its last successful scrape, capped at MAX_STALENESS;
+               a playbook never scraped counts as maximally stale
+    churn      how often scraping it found changes, (changes + 1) / (scrapes + 2),
+               so a playbook with no history starts at 0.5
+
+    score = HOT_BONUS * hot + staleness * (1 + CHURN_WEIGHT * churn)
+
+Among equally stale playbooks the ones that change often go first, and a
+playbook that changes often comes due again sooner than one that never
+does. Equal scores keep the site's order, so without any history the
+crawl order is unchanged.
+
+Formations are ranked the same way within their playbook, by churn alone
+(they all share the playbook's staleness): formation_score() is what
+scrape_huddle.formation_priority is set to, so the formations whose plays
+change most often are fetched first and a deadline cuts off the steadiest.
+
+The history is output/schedule.json: per playbook, when it last finished,
+how long that took, how many scrapes and changes it has seen (in all and
+per formation), a hash of its content, and the time its content was known current as of (see
+fresh_as_of(), which sitemap discovery compares <lastmod> against). A
+scrape whose hash differs from the previous one counts as a change.
+
+With a time budget, playbooks are taken in priority order as long as the
+expected duration (its last duration, else the mean of the known ones)
+fits in the time left. One that doesn't fit is passed over for smaller
+ones further down the list. At the deadline, fetch_raw() stops the
+playbook in progress (scrape_huddle.DeadlineExceeded). Its finished
+formations stay in the journal, so the next run carries on from there.
+
+    python schedule.py                      # ranking from output/schedule.json
+    python schedule.py --hot eagles-off     # ... with a hot list
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fileutil import write_json_atomic
+
+FORMAT = "crawl-schedule"
+FORMAT_VERSION = 1
+
+DEFAULT_FILE = Path(__file__).parent / "output" / "schedule.json"
+HOT_BONUS = 1000.0
+MAX_STALENESS = 30.0  # days
+CHURN_WEIGHT = 2.0
+DAY = 24 * 3600
+
+
+@dataclass
+class FormationHistory:
+    scrapes: int = 0
+    changes: int = 0
+    content_hash: str = ""  # of its plays
+
+
+@dataclass
+class PlaybookHistory:
+    last_scraped: float = 0.0  # epoch seconds, 0 if never
+    seconds: float = 0.0  # wall time of the last scrape
+    scrapes: int = 0
+    changes: int = 0
+    content_hash: str = ""
+    fresh_as_of: float = 0.0  # epoch seconds; pages modified since may differ from content_hash's
+    formations: dict[str, FormationHistory] = field(default_factory=dict)  # by slug
+
+
+def content_hash(playbook) -> str:
+    return hashlib.sha256(json.dumps(playbook, separators=(",", ":"), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_history(entry: dict) -> PlaybookHistory:
+    formations = {slug: FormationHistory(**f) for slug, f in entry.get("formations", {}).items()}
+    return PlaybookHistory(**{**entry, "formations": formations})
+
+
+def formations_of(playbook: dict):
+    for group in playbook.get("formationGroups", []):
+        yield from group.get("formations", [])
+
+
+class Schedule:
+    """Priorities and duration estimates from the crawl history, which record() updates."""
+
+    def __init__(self, path: Path = DEFAULT_FILE, hot: Iterable[str] = (), now: Optional[float] = None):
+        self.path = Path(path)
+        self.hot = set(hot)
+        self.now = time.time() if now is None else now
+        self.playbooks: dict[str, PlaybookHistory] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("format") != FORMAT or data.get("formatVersion") != FORMAT_VERSION:
+                raise ValueError(f"{self.path} is not a {FORMAT} v{FORMAT_VERSION} file")
+            self.playbooks = {pb_id: load_history(entry) for pb_id, entry in data["playbooks"].items()}
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "format": FORMAT,
+            "formatVersion": FORMAT_VERSION,
+            "playbooks": {pb_id: asdict(entry) for pb_id, entry in sorted(self.playbooks.items())},
+        })
+
+    def staleness(self, playbook_id: str) -> float:
+        entry = self.playbooks.get(playbook_id)
+        if entry is None or not entry.last_scraped:
+            return MAX_STALENESS
+        return min(max(self.now - entry.last_scraped, 0.0) / DAY, MAX_STALENESS)
+
+    def churn(self, playbook_id: str) -> float:
+        entry = self.playbooks.get(playbook_id, PlaybookHistory())
+        return (entry.changes + 1) / (entry.scrapes + 2)
+
+    def score(self, playbook_id: str) -> float:
+        hot = HOT_BONUS if playbook_id in self.hot else 0.0
+        return hot + self.staleness(playbook_id) * (1 + CHURN_WEIGHT * self.churn(playbook_id))
+
+    def formation_score(self, playbook_id: str, slug: str) -> float:
+        """A formation's churn within its playbook; one never scraped starts at 0.5."""
+        entry = self.playbooks.get(playbook_id, PlaybookHistory()).formations.get(slug, FormationHistory())
+        return (entry.changes + 1) / (entry.scrapes + 2)
+
+    def order(self, playbooks: list[dict]) -> list[dict]:
+        """Playbooks by descending score; ties keep their order."""
+        return sorted(playbooks, key=lambda pb: -self.score(pb["id"]))
+
+    def estimate(self, playbook_id: str) -> Optional[float]:
+        """Expected seconds to scrape a playbook, None with no durations to go on."""
+        entry = self.playbooks.get(playbook_id)
+        if entry is not None and entry.seconds:
+            return entry.seconds
+        known = [e.seconds for e in self.playbooks.values() if e.seconds]
+        return sum(known) / len(known) if known else None
+
+    def fresh_as_of(self, playbook_id: str, playbook: Optional[dict]) -> Optional[float]:
+        """When ``playbook`` (e.g. from the previous output) was known current.
+
+        None unless it is the version last recorded for its id: a version
+        that was never recorded (say, one with pages missing) is vouched
+        for by nothing.
+        """
+        entry = self.playbooks.get(playbook_id)
+        if entry is None or not entry.fresh_as_of or playbook is None or content_hash(playbook) != entry.content_hash:
+            return None
+        return entry.fresh_as_of
+
+    def record(
+        self, playbook: dict, seconds: float, finished_at: Optional[float] = None, fresh_as_of: Optional[float] = None
+    ) -> bool:
+        """Note a finished scrape of a playbook. Returns whether its content changed.
+
+        ``fresh_as_of`` defaults to when the scrape started; pass an earlier
+        time if parts of it were vouched for before that (e.g. by a sitemap).
+        """
+        entry = self.playbooks.setdefault(playbook["id"], PlaybookHistory())
+        digest = content_hash(playbook)
+        changed = bool(entry.content_hash) and digest != entry.content_hash
+        entry.last_scraped = time.time() if finished_at is None else finished_at
+        entry.fresh_as_of = entry.last_scraped - seconds if fresh_as_of is None else fresh_as_of
+        entry.seconds = seconds
+        entry.scrapes += 1
+        entry.changes += changed
+        entry.content_hash = digest
+
+        # Formations no longer on the page drop out of the history
+        formations = {}
+        for formation in formations_of(playbook):
+            if "plays" not in formation:
+                continue
+            history = formations[formation["slug"]] = entry.formations.get(formation["slug"], FormationHistory())
+            digest = content_hash(formation["plays"])
+            history.changes += bool(history.content_hash) and digest != history.content_hash
+            history.scrapes += 1
+            history.content_hash = digest
+        entry.formations = formations
+        return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedule", type=Path, default=DEFAULT_FILE)
+    parser.add_argument("--hot", nargs="+", default=[], metavar="ID")
+    args = parser.parse_args()
+
+    schedule = Schedule(args.schedule, args.hot)
+    playbooks = [{"id": pb_id} for pb_id in schedule.playbooks]
+    print(f"{'playbook':<24} {'score':>8} {'days':>6} {'churn':>6} {'scrapes':>8} {'seconds':>8}")
+    for pb in schedule.order(playbooks):
+        entry = schedule.playbooks[pb["id"]]
+        print(f"{pb['id']:<24} {schedule.score(pb['id']):>8.2f} {schedule.staleness(pb['id']):>6.1f} "
+              f"{schedule.churn(pb['id']):>6.2f} {entry.scrapes:>8d} {entry.seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,197 +8,537 @@ Outputs a JSON file for use in the Gameday Playsheet app.
 
 from __future__ import annotations
 
+import argparse
 import json
+import string
+import sys
+import threading
 import time
 import re
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from classify import formation_group, play_type
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, MODES as CACHE_MODES, ResponseCache
+from metrics import ParseProfiler, ProgressLine, metrics
+from politeness import (
+    MAX_RETRIES, RETRY_STATUSES, AdaptiveRate, CircuitBreaker, backoff_delay, parse_retry_after
+)
+from parsing import extract_formation_groups, extract_links, extract_list_items, parse_html, sniff_encoding
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 BASE_URL = "https://huddle.gg"
 MADDEN_VERSION = "26"
 DELAY_BETWEEN_REQUESTS = 1.5  # Be respectful
+MAX_RATE = 2.0  # Ceiling for the adaptive rate, requests/sec
+PIPELINE_WINDOW = 32  # Formation pages in flight between fetch and parse with --parse-workers
 
 # Output paths
 OUTPUT_DIR = Path(__file__).parent / "output"
 OUTPUT_FILE = OUTPUT_DIR / "playbooks.json"
-PROGRESS_FILE = OUTPUT_DIR / "progress.json"
+JOURNAL_FILE = OUTPUT_DIR / "progress.jsonl"
+DIFF_REPORT_FILE = OUTPUT_DIR / "diff_report.json"
+COLUMNAR_FILE = OUTPUT_DIR / "playbooks.columnar.json"
+DEDUP_FILE = OUTPUT_DIR / "playbooks.dedup.json"
+SEARCH_INDEX_FILE = OUTPUT_DIR / "search_index.json"
+SCHEDULE_FILE = OUTPUT_DIR / "schedule.json"
+HISTORY_DIR = OUTPUT_DIR / "history"
 
 # Headers to look like a browser
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.5",
+    # Every content coding urllib3 can decode here: gzip, deflate, br (brotli, in requirements.txt), zstd if installed
+    "Accept-Encoding": urllib3.util.make_headers(accept_encoding=True)["accept-encoding"],
 }
 
+_CHARSET = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every fetch worker.
+
+    Tokens refill at ``rate`` per second up to ``capacity``. Each request
+    takes one token, so the aggregate request rate stays within the
+    politeness budget no matter how many workers are fetching. A rate of
+    0 disables limiting. ``pause()`` holds every worker until a given time,
+    e.g. for a server's Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until it is available. Returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            paused = max(0.0, self._resume_at - now)
+            if self.rate <= 0:
+                wait = paused
+            else:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Reserve the token now and sleep outside the lock; a negative
+                # balance queues later callers behind this one.
+                self._tokens -= 1
+                wait = max(paused, -self._tokens / self.rate if self._tokens < 0 else 0.0)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hold all requests for the next ``seconds``."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def refund(self):
+        """Give back a token for a request that turned out not to cost the server a download."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
 session = requests.Session()
 session.headers.update(HEADERS)
 
 
-def fetch_page(url: str) -> Optional[BeautifulSoup]:
-    """Fetch a page and return BeautifulSoup object."""
-    try:
-        print(f"  Fetching: {url}")
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        time.sleep(DELAY_BETWEEN_REQUESTS)
-        return BeautifulSoup(response.text, "lxml")
-    except requests.RequestException as e:
-        print(f"  ERROR fetching {url}: {e}")
-        return None
+def configure_transport(concurrency: int):
+    """Keep one reusable keep-alive connection per fetch worker.
 
+    requests' default pool holds 10 connections per host; more workers than
+    that open and discard a connection per request, fewer waste sockets.
+    Retries are ours (see _download), so urllib3's are off.
+    """
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(concurrency, 1), max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
-def get_playbook_list() -> list[dict]:
-    """Get list of all playbooks from Huddle.gg."""
-    url = f"{BASE_URL}/{MADDEN_VERSION}/playbooks/"
-    soup = fetch_page(url)
-    if not soup:
-        return []
 
-    playbooks = []
+@dataclass(frozen=True)
+class Page:
+    """A fetched page body as received, with the charset its headers declared (if any)."""
+    content: bytes
+    encoding: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or sniff_encoding(self.content), errors="replace")
 
-    # Find all playbook links - they follow pattern /26/playbooks/{slug}/
-    playbook_links = soup.find_all("a", href=re.compile(rf"/{MADDEN_VERSION}/playbooks/[\w-]+-(?:off|def)/$"))
 
-    for link in playbook_links:
-        href = link.get("href", "")
-        name = link.get_text(strip=True)
+def declared_encoding(content_type: Optional[str]) -> Optional[str]:
+    """Charset from a Content-Type header; None leaves it to the page's <meta> (or UTF-8)."""
+    match = _CHARSET.search(content_type or "")
+    return match.group(1).lower() if match else None
 
-        # Extract slug from href
-        match = re.search(rf"/{MADDEN_VERSION}/playbooks/([\w-]+)/$", href)
-        if match:
-            slug = match.group(1)
 
-            # Determine type from slug
-            if slug.endswith("-off"):
-                pb_type = "offense"
-                team_name = slug.replace("-off", "").replace("-", " ").title()
-            elif slug.endswith("-def"):
-                pb_type = "defense"
-                team_name = slug.replace("-def", "").replace("-", " ").title()
+rate_limiter = TokenBucket(1 / DELAY_BETWEEN_REQUESTS)
+rate_controller = AdaptiveRate(rate_limiter, max_rate=MAX_RATE)
+breaker = CircuitBreaker()
+
+# URLs that could not be fetched even after retries, see fetch_raw()
+failed_urls: set[str] = set()
+
+# Optional on-disk response cache, see enable_cache()
+cache: Optional[ResponseCache] = None
+
+# Optional cProfile of the parse phase (--profile)
+profiler: Optional[ParseProfiler] = None
+
+# Optional process pool that formation pages are parsed in (--parse-workers), see pipeline
+parse_pool: Optional[Executor] = None
+
+# Optional (playbook id, formation slug) -> priority; a playbook's formations are
+# fetched highest first (schedule.Schedule.formation_score), else in page order
+formation_priority: Optional[Callable[[str, str], float]] = None
+
+# time.monotonic() after which fetch_raw() raises DeadlineExceeded (--time-budget)
+deadline: Optional[float] = None
+
+
+class DeadlineExceeded(Exception):
+    """The crawl's time budget ran out; raised instead of starting another fetch."""
+
+
+def enable_cache(
+    mode: str = "revalidate",
+    directory: Path = DEFAULT_CACHE_DIR,
+    ttl: Optional[float] = None,
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+) -> ResponseCache:
+    """Route fetch_page through an on-disk response cache (see http_cache)."""
+    global cache
+    cache = ResponseCache(directory, mode=mode, ttl=ttl, max_bytes=max_bytes)
+    return cache
+
+
+def _download(url: str) -> Optional[Page]:
+    """Fetch a page, going through the response cache when enabled.
+
+    Throttling, server errors and connection failures are retried with
+    backoff (or after the server's Retry-After) and feed the adaptive rate
+    and circuit breaker. Returns None on a cache miss in replay mode;
+    raises once retries are exhausted or on other HTTP errors.
+    """
+    entry = cache.lookup(url) if cache else None
+    if entry and cache.is_fresh(entry):
+        metrics.inc("cache_total", result="fresh")
+        return Page(cache.read_body(entry), entry.encoding)
+    if cache and cache.mode == "replay":
+        metrics.inc("cache_total", result="miss")
+        print(f"  CACHE MISS (replay mode): {url}")
+        return None
+
+    for attempt in range(MAX_RETRIES + 1):
+        metrics.observe("circuit_wait_seconds", breaker.wait())
+        metrics.observe("rate_limit_wait_seconds", rate_limiter.acquire())
+        print(f"  Fetching: {url}" + (f" (retry {attempt})" if attempt else ""))
+        retry_after = None
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=30, headers=entry.conditional_headers() if entry else None)
+        except requests.RequestException as e:
+            error = e
+            breaker.record_failure()
+            rate_controller.failed()
+        else:
+            latency = time.perf_counter() - start
+            metrics.observe("fetch_seconds", latency, url)
+            metrics.inc("http_responses_total", status=str(response.status_code))
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                rate_controller.success(latency)
+                break
+            error = requests.HTTPError(f"{response.status_code} for url: {url}", response=response)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                # Throttled, but up: that's for the rate controller, not the breaker
+                breaker.record_success()
+                rate_controller.throttled(retry_after)
             else:
-                continue
+                breaker.record_failure()
+                if retry_after is not None:
+                    rate_controller.throttled(retry_after)
+                else:
+                    rate_controller.failed()
+
+        if attempt == MAX_RETRIES:
+            raise error
+        metrics.inc("http_retries_total")
+        if retry_after is None:
+            delay = backoff_delay(attempt)
+            print(f"  {error}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            # The rate limiter holds every worker until Retry-After has passed
+            print(f"  {error}; server asked to retry after {retry_after:.0f}s")
+
+    if entry and response.status_code == 304:
+        # Not modified: nothing was downloaded, so don't charge the politeness budget
+        metrics.inc("cache_total", result="revalidated")
+        rate_limiter.refund()
+        cache.touch(entry)
+        return Page(cache.read_body(entry), entry.encoding)
+
+    response.raise_for_status()
+    # Bytes as decompressed, and as they came over the wire
+    metrics.inc("response_bytes_total", len(response.content))
+    metrics.inc("wire_bytes_total", response.raw.tell())
+    # Only the declared charset: response.text would guess one (charset detection)
+    # and decode the whole page, just for lxml to re-encode it
+    page = Page(response.content, declared_encoding(response.headers.get("Content-Type")))
+    if cache:
+        metrics.inc("cache_total", result="stored")
+        cache.store(url, page.content, page.encoding, response.headers)
+    return page
+
+
+def fetch_raw(url: str) -> Optional[Page]:
+    """Fetch a page undecoded, or None if it could not be fetched (see failed_urls)."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(url)
+    try:
+        page = _download(url)
+    except requests.RequestException as e:
+        metrics.inc("fetch_errors_total")
+        print(f"  ERROR fetching {url}: {e}")
+        page = None
+    if page is None:
+        failed_urls.add(url)
+    else:
+        failed_urls.discard(url)
+    return page
 
-            # Determine category (team vs alternate)
-            alternate_names = [
-                "air-raid", "balanced", "benkerts-dimes", "pistol", "run-and-shoot",
-                "run-balanced", "run-heavy", "run-n-gun", "shotgun", "shotgun-mix",
-                "singleback", "spread", "two-back", "west-coast",
-                "3-4", "4-3", "46", "cover-2", "multiple-d"
-            ]
-            base_slug = slug.replace("-off", "").replace("-def", "")
-            category = "alternate" if base_slug in alternate_names else "team"
-
-            playbooks.append({
-                "id": slug,
-                "name": name or team_name,
-                "slug": slug,
-                "type": pb_type,
-                "category": category,
-                "url": urljoin(BASE_URL, href)
-            })
 
-    # Remove duplicates
-    seen = set()
-    unique_playbooks = []
-    for pb in playbooks:
-        if pb["id"] not in seen:
-            seen.add(pb["id"])
-            unique_playbooks.append(pb)
+def fetch_html(url: str) -> Optional[str]:
+    """Fetch a page and return its HTML, or None if it could not be fetched (see failed_urls)."""
+    page = fetch_raw(url)
+    return page.text if page else None
 
-    return unique_playbooks
 
+def fetch_page(url: str) -> Optional[BeautifulSoup]:
+    """Fetch a page and return BeautifulSoup object."""
+    # bs4 is slow to import and the crawl itself parses with lxml directly
+    from bs4 import BeautifulSoup
 
-def scrape_playbook(playbook: dict) -> dict:
-    """Scrape all formations and plays from a single playbook."""
-    print(f"\nScraping playbook: {playbook['name']} ({playbook['type']})")
+    page = fetch_raw(url)
+    if page is None:
+        return None
+    with parse_timer("list", url):
+        return BeautifulSoup(page.content, "lxml", from_encoding=page.encoding or sniff_encoding(page.content))
 
-    soup = fetch_page(playbook["url"])
-    if not soup:
-        return {**playbook, "formationGroups": []}
 
-    formation_groups = {}
+@contextmanager
+def parse_timer(page: str, key: str) -> Iterator[None]:
+    """Time (and, with --profile, profile) parsing one page of kind ``page``."""
+    metrics.inc("pages_parsed_total", page=page)
+    with metrics.timer("parse_seconds", key, page=page), (profiler.profile() if profiler else nullcontext()):
+        yield
 
-    # Huddle.gg structure: <h3>Formation Group</h3> followed by <ul> with formation links
-    # Find all h3 headers that represent formation groups
-    h3_headers = soup.find_all("h3")
 
-    for h3 in h3_headers:
-        group_name = h3.get_text(strip=True)
-        if not group_name:
-            continue
+# Alternate (non-team) playbooks, by slug without the -off/-def suffix
+ALTERNATE_PLAYBOOKS = {
+    "air-raid", "balanced", "benkerts-dimes", "pistol", "run-and-shoot",
+    "run-balanced", "run-heavy", "run-n-gun", "shotgun", "shotgun-mix",
+    "singleback", "spread", "two-back", "west-coast",
+    "3-4", "4-3", "46", "cover-2", "multiple-d"
+}
 
-        # Find the next ul sibling containing formation links
-        ul = h3.find_next_sibling("ul")
-        if not ul:
-            continue
 
-        formation_groups[group_name] = []
+def playbook_stub(slug: str, name: Optional[str] = None) -> Optional[dict]:
+    """The playbook dict for a slug like ``eagles-off``, or None if it isn't a playbook slug.
 
-        # Find formation links within this ul
-        formation_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook['slug'])}/([\w-]+)/$"
-        formation_links = ul.find_all("a", href=re.compile(formation_pattern))
+    Without a name (the link text on the index page), one is derived from
+    the slug: ``49ers-off`` -> ``49ers``, ``multiple-d-def`` -> ``Multiple D``.
+    """
+    if slug.endswith("-off"):
+        pb_type = "offense"
+    elif slug.endswith("-def"):
+        pb_type = "defense"
+    else:
+        return None
+    base_slug = slug[:-4]
+    return {
+        "id": slug,
+        "name": name or string.capwords(base_slug.replace("-", " ")),
+        "slug": slug,
+        "type": pb_type,
+        "category": "alternate" if base_slug in ALTERNATE_PLAYBOOKS else "team",
+        "url": f"{BASE_URL}/{MADDEN_VERSION}/playbooks/{slug}/"
+    }
 
-        for link in formation_links:
-            href = link.get("href", "")
-            formation_name = link.get_text(strip=True)
 
-            match = re.search(formation_pattern, href)
-            if not match:
+def get_playbook_list() -> list[dict]:
+    """Get list of all playbooks from Huddle.gg."""
+    url = f"{BASE_URL}/{MADDEN_VERSION}/playbooks/"
+    page = fetch_raw(url)
+    if page is None:
+        return []
+    with parse_timer("list", url):
+        return parse_playbook_list(page.content, page.encoding)
+
+
+def parse_playbook_list(html: Union[str, bytes], encoding: Optional[str] = None) -> list[dict]:
+    """Playbooks linked from the playbook index page, first link per playbook."""
+    # Playbook links follow the pattern /26/playbooks/{slug}/, slug ending -off or -def
+    pattern = re.compile(rf"/{MADDEN_VERSION}/playbooks/([\w-]+-(?:off|def))/$")
+    playbooks = {}
+    for name, slug, href in extract_links(parse_html(html, encoding), pattern):
+        if slug not in playbooks:
+            playbooks[slug] = {**playbook_stub(slug, name), "url": urljoin(BASE_URL, href)}
+    return list(playbooks.values())
+
+
+def scrape_playbook(
+    playbook: dict,
+    executor: Optional[Executor] = None,
+    resume: Optional[dict[str, list[dict]]] = None,
+    on_formation: Optional[Callable[[dict, str], None]] = None
+) -> dict:
+    """Scrape all formations and plays from a single playbook.
+
+    Formation pages are fetched through ``executor`` when one is given.
+    Results are assembled in page order, so the output is the same at any
+    concurrency. ``resume`` and ``on_formation`` are as for iter_playbook().
+    """
+    formation_groups = dict(iter_playbook(playbook, executor, resume, on_formation))
+    if not formation_groups and playbook["url"] in failed_urls:
+        return {**playbook, "formationGroups": []}
+    return assemble_playbook(playbook, formation_groups)
+
+
+def iter_playbook(
+    playbook: dict,
+    executor: Optional[Executor] = None,
+    resume: Optional[dict[str, list[dict]]] = None,
+    on_formation: Optional[Callable[[dict, str], None]] = None
+) -> Iterator[tuple[str, list[tuple[dict, str]]]]:
+    """Generator form of scrape_playbook(): yields (group name, [(formation, url)]).
+
+    Groups come in page order, each as soon as its formations have their
+    plays (with formation_priority set, all of them at the end). Yields
+    nothing if the playbook page could not be fetched.
+    ``resume`` maps formation urls to plays already scraped, which are
+    reused instead of fetched; ``on_formation(formation, url)`` is called
+    for each fetched formation as it completes (see iter_formations()).
+    """
+    print(f"\nScraping playbook: {playbook['name']} ({playbook['type']})")
+
+    page = fetch_raw(playbook["url"])
+    if page is None:
+        return
+
+    with parse_timer("playbook", playbook["url"]):
+        formation_groups = find_formations(page.content, playbook, page.encoding)
+    # Don't keep the page alive while its formations are scraped
+    del page
+
+    todo = []
+    for entries in formation_groups.values():
+        for formation, url in entries:
+            if resume and url in resume:
+                formation["plays"] = resume[url]
+            else:
+                todo.append((formation, url))
+    if formation_priority is not None:
+        # Fetched in priority order, so the groups only come once all are done
+        scrape_formations(todo, playbook["slug"], executor, on_formation)
+        yield from formation_groups.items()
+        return
+    fetched = iter_formations(todo, playbook["slug"], executor)
+    for group_name, entries in formation_groups.items():
+        for formation, url in entries:
+            if resume and url in resume:
                 continue
+            next(fetched)
+            if on_formation and url not in failed_urls:
+                on_formation(formation, url)
+        yield group_name, entries
 
-            formation_slug = match.group(1)
-            formation_url = urljoin(BASE_URL, href)
 
-            # Scrape plays for this formation
-            plays = scrape_formation_plays(formation_url, playbook["slug"], formation_slug)
+@lru_cache(maxsize=256)
+def formation_pattern(playbook_slug: str) -> re.Pattern:
+    """Formation links: /26/playbooks/{playbook}/{formation}/"""
+    return re.compile(rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/([\w-]+)/$")
 
-            formation_groups[group_name].append({
-                "name": formation_name,
-                "slug": formation_slug,
-                "plays": plays
-            })
 
-    # Fallback: if no h3 structure found, try finding all formation links
-    if not formation_groups:
-        formation_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook['slug'])}/([\w-]+)/$"
-        formation_links = soup.find_all("a", href=re.compile(formation_pattern))
+# Each formation's pattern is used for one page per crawl; the cache only
+# has to cover re-parsing recent pages, not hold a pattern per formation
+@lru_cache(maxsize=256)
+def play_pattern(playbook_slug: str, formation_slug: str) -> re.Pattern:
+    """Play links: /26/playbooks/{playbook}/{formation}/{play}/"""
+    return re.compile(
+        rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/{re.escape(formation_slug)}/([\w-]+)/$"
+    )
 
-        for link in formation_links:
-            href = link.get("href", "")
-            formation_name = link.get_text(strip=True)
 
-            match = re.search(formation_pattern, href)
-            if not match:
-                continue
+def find_formations(
+    html: Union[str, bytes], playbook: dict, encoding: Optional[str] = None
+) -> dict[str, list[tuple[dict, str]]]:
+    """Collect the formation links on a playbook page (text, or bytes in ``encoding``).
+
+    Returns group name -> [(formation dict, formation url)] in page order.
+    The formation dicts have empty ``plays``; see scrape_formations().
+    """
+    root = parse_html(html, encoding)
+    pattern = formation_pattern(playbook["slug"])
+    formation_groups = {}
 
-            formation_slug = match.group(1)
-            formation_url = urljoin(BASE_URL, href)
+    # Huddle.gg structure: <h3>Formation Group</h3> followed by <ul> with formation links
+    for group_name, links in extract_formation_groups(root, pattern).items():
+        formation_groups[group_name] = [
+            ({"name": name, "slug": slug, "plays": []}, urljoin(BASE_URL, href))
+            for name, slug, href in links
+        ]
 
+    # Fallback: if no h3 structure found, try finding all formation links
+    if not formation_groups:
+        for name, slug, href in extract_links(root, pattern):
             # Determine formation group from the slug
-            group_name = determine_formation_group(formation_name, formation_slug)
+            group_name = determine_formation_group(name, slug)
+            formation_groups.setdefault(group_name, []).append(
+                ({"name": name, "slug": slug, "plays": []}, urljoin(BASE_URL, href))
+            )
+
+    return formation_groups
+
+
+def scrape_formations(
+    entries: list[tuple[dict, str]],
+    playbook_slug: str,
+    executor: Optional[Executor] = None,
+    on_formation: Optional[Callable[[dict, str], None]] = None
+):
+    """Fill in ``plays`` for each (formation dict, formation url) entry.
+
+    Entries are fetched by descending formation_priority when it is set,
+    else in the order given. ``on_formation(formation, url)`` is called as
+    each formation finishes, in that order, from the caller's thread. It is
+    not called for formations whose page could not be fetched.
+    """
+    if formation_priority is not None:
+        entries = sorted(entries, key=lambda entry: -formation_priority(playbook_slug, entry[0]["slug"]))
+    for formation, url in iter_formations(entries, playbook_slug, executor):
+        if on_formation and url not in failed_urls:
+            on_formation(formation, url)
+
+
+def iter_formations(
+    entries: Iterable[tuple[dict, str]],
+    playbook_slug: str,
+    executor: Optional[Executor] = None
+) -> Iterator[tuple[dict, str]]:
+    """Generator form of scrape_formations(): yields each entry, plays filled in, in order.
+
+    Pages are fetched through ``executor`` when one is given. With a
+    parse_pool, pages are fetched on ``executor`` and parsed in the pool
+    (see pipeline.iter_formations_pipelined).
+    """
+    if parse_pool is not None:
+        from pipeline import iter_formations_pipelined
+        yield from iter_formations_pipelined(entries, playbook_slug, parse_pool, executor, window=PIPELINE_WINDOW)
+        return
 
-            if group_name not in formation_groups:
-                formation_groups[group_name] = []
+    def scrape(entry: tuple[dict, str]) -> tuple[dict, str]:
+        formation, url = entry
+        with metrics.timer("formation_seconds", url):
+            formation["plays"] = scrape_formation_plays(url, playbook_slug, formation["slug"])
+        return entry
 
-            plays = scrape_formation_plays(formation_url, playbook["slug"], formation_slug)
+    if executor is None:
+        yield from map(scrape, entries)
+    else:
+        yield from executor.map(scrape, entries)
 
-            formation_groups[group_name].append({
-                "name": formation_name,
-                "slug": formation_slug,
-                "plays": plays
-            })
 
+def assemble_playbook(playbook: dict, formation_groups: dict[str, list[tuple[dict, str]]]) -> dict:
+    """Build the output dict for a playbook from find_formations() results."""
     # Convert to list format
     formation_group_list = [
         {
             "name": group_name,
-            "formations": formations
+            "formations": [formation for formation, _ in entries]
         }
-        for group_name, formations in sorted(formation_groups.items())
+        for group_name, entries in sorted(formation_groups.items())
     ]
 
     return {
@@ -211,105 +551,56 @@ def scrape_playbook(playbook: dict) -> dict:
 
 
 def determine_formation_group(formation_name: str, formation_slug: str) -> str:
-    """Determine the formation group based on formation name."""
-    name_lower = formation_name.lower()
-    slug_lower = formation_slug.lower()
-
-    # Check for common formation group prefixes
-    group_mappings = [
-        ("gun", "Gun"),
-        ("shotgun", "Gun"),
-        ("pistol", "Pistol"),
-        ("singleback", "Singleback"),
-        ("i-form", "I Form"),
-        ("i form", "I Form"),
-        ("iform", "I Form"),
-        ("strong", "Strong"),
-        ("weak", "Weak"),
-        ("goal line", "Goal Line"),
-        ("goalline", "Goal Line"),
-        ("hail mary", "Hail Mary"),
-        ("wildcat", "Wildcat"),
-        ("jumbo", "Jumbo"),
-        ("full house", "Full House"),
-        ("empty", "Empty"),
-        ("trips", "Gun"),  # Usually part of Gun
-        ("bunch", "Gun"),  # Usually part of Gun
-        ("spread", "Gun"),
-        ("ace", "Singleback"),
-        ("3-4", "3-4"),
-        ("4-3", "4-3"),
-        ("nickel", "Nickel"),
-        ("dime", "Dime"),
-        ("quarter", "Quarter"),
-        ("dollar", "Dollar"),
-        ("big nickel", "Big Nickel"),
-        ("46", "46"),
-    ]
-
-    for pattern, group in group_mappings:
-        if pattern in name_lower or pattern in slug_lower:
-            return group
-
-    # Default: use first word of formation name
-    first_word = formation_name.split()[0] if formation_name else "Other"
-    return first_word
+    """Determine the formation group based on formation name (see classify.FORMATION_GROUP_RULES)."""
+    return formation_group(formation_name, formation_slug)
 
 
 def scrape_formation_plays(formation_url: str, playbook_slug: str, formation_slug: str) -> list[dict]:
     """Scrape all plays from a formation page."""
-    soup = fetch_page(formation_url)
-    if not soup:
+    page = fetch_raw(formation_url)
+    if page is None:
         return []
 
-    plays = []
+    with parse_timer("formation", formation_url):
+        plays = parse_formation_plays(page.content, playbook_slug, formation_slug, page.encoding)
+    print(f"    Found {len(plays)} plays in {formation_slug}")
+    return plays
 
-    # Pattern for play links: /26/playbooks/{playbook}/{formation}/{play}/
-    play_pattern = rf"/{MADDEN_VERSION}/playbooks/{re.escape(playbook_slug)}/{re.escape(formation_slug)}/([\w-]+)/$"
-    play_links = soup.find_all("a", href=re.compile(play_pattern))
 
-    for link in play_links:
-        play_name = link.get_text(strip=True)
-        href = link.get("href", "")
+def parse_formation_plays(
+    html: Union[str, bytes], playbook_slug: str, formation_slug: str, encoding: Optional[str] = None
+) -> list[dict]:
+    """Extract the plays from a formation page's HTML (text, or bytes in ``encoding``)."""
+    root = parse_html(html, encoding)
+    plays = []
 
-        match = re.search(play_pattern, href)
-        if match:
-            play_slug = match.group(1)
-            play_id = f"{playbook_slug}-{formation_slug}-{play_slug}"
+    for play_name, play_slug, _ in extract_links(root, play_pattern(playbook_slug, formation_slug)):
+        play_id = f"{playbook_slug}-{formation_slug}-{play_slug}"
 
-            # Determine play type from name
-            play_type = determine_play_type(play_name)
+        # Determine play type from name
+        play_type = determine_play_type(play_name)
 
-            plays.append({
-                "id": play_id,
-                "name": play_name,
-                "slug": play_slug,
-                "type": play_type
-            })
+        plays.append({
+            "id": play_id,
+            "name": play_name,
+            "slug": play_slug,
+            "type": play_type
+        })
 
     # Fallback: if plays are listed without individual links (just in a ul/li structure)
     if not plays:
-        # Look for ul > li structure with play names
-        for ul in soup.find_all("ul"):
-            for li in ul.find_all("li"):
-                # Check if this li contains a play link or just text
-                link = li.find("a")
-                if link:
-                    play_name = link.get_text(strip=True)
-                else:
-                    play_name = li.get_text(strip=True)
-
-                if play_name and len(play_name) < 100 and play_name not in ["Home", "Playbooks"]:
-                    play_slug = slugify(play_name)
-                    play_id = f"{playbook_slug}-{formation_slug}-{play_slug}"
-                    play_type = determine_play_type(play_name)
-
-                    plays.append({
-                        "id": play_id,
-                        "name": play_name,
-                        "slug": play_slug,
-                        "type": play_type
-                    })
+        for play_name in extract_list_items(root):
+            if play_name and len(play_name) < 100 and play_name not in ["Home", "Playbooks"]:
+                play_slug = slugify(play_name)
+                play_id = f"{playbook_slug}-{formation_slug}-{play_slug}"
+                play_type = determine_play_type(play_name)
+
+                plays.append({
+                    "id": play_id,
+                    "name": play_name,
+                    "slug": play_slug,
+                    "type": play_type
+                })
 
     # Remove duplicates
     seen = set()
@@ -319,40 +610,12 @@ def scrape_formation_plays(formation_url: str, playbook_slug: str, formation_slu
             seen.add(play["id"])
             unique_plays.append(play)
 
-    print(f"    Found {len(unique_plays)} plays in {formation_slug}")
     return unique_plays
 
 
 def determine_play_type(play_name: str) -> str:
-    """Determine if a play is a run or pass based on name."""
-    name_lower = play_name.lower()
-
-    # Run play indicators
-    run_indicators = [
-        "hb ", "fb ", "dive", "draw", "sweep", "toss", "counter", "iso",
-        "blast", "slam", "inside zone", "outside zone", "stretch", "power",
-        "trap", "lead", "pitch", "option", "qb run", "qb sneak", "scramble",
-        "wildcat", "jet sweep", "end around", "reverse"
-    ]
-
-    # Pass play indicators
-    pass_indicators = [
-        "pa ", "pass", "screen", "slant", "post", "corner", "out", "curl",
-        "hitch", "fade", "streak", "seam", "cross", "drag", "wheel",
-        "comeback", "dig", "sail", "flood", "mesh", "spot", "stick",
-        "smash", "dagger", "bench", "levels", "y-", "te ", "wr "
-    ]
-
-    for indicator in run_indicators:
-        if indicator in name_lower:
-            return "run"
-
-    for indicator in pass_indicators:
-        if indicator in name_lower:
-            return "pass"
-
-    # Default to pass (most plays are passing plays)
-    return "pass"
+    """Determine if a play is a run or pass based on name (see classify.PLAY_TYPE_RULES)."""
+    return play_type(play_name)
 
 
 def slugify(text: str) -> str:
@@ -363,27 +626,126 @@ def slugify(text: str) -> str:
     return text
 
 
-def save_progress(data: dict, completed: list[str]):
-    """Save scraping progress for resume capability."""
-    OUTPUT_DIR.mkdir(exist_ok=True)
-    progress = {
-        "completed_playbooks": completed,
-        "partial_data": data
-    }
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(progress, f, indent=2)
-
-
-def load_progress() -> tuple[dict, list[str]]:
-    """Load previous scraping progress."""
-    if PROGRESS_FILE.exists():
-        with open(PROGRESS_FILE) as f:
-            progress = json.load(f)
-            return progress.get("partial_data", {}), progress.get("completed_playbooks", [])
-    return {}, []
-
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape Madden playbooks from Huddle.gg")
+    parser.add_argument(
+        "--only", nargs="+", metavar="ID",
+        help="only scrape these playbook ids (e.g. eagles-off chiefs-def)"
+    )
+    parser.add_argument(
+        "--hot", nargs="+", default=[], metavar="ID",
+        help="scrape these playbook ids before any others (see schedule.py for the crawl order)"
+    )
+    parser.add_argument(
+        "--time-budget", type=float, metavar="MINUTES",
+        help="stop after this long, highest priority playbooks first; the rest keep their previous data"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=1,
+        help="number of formation pages to fetch in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=0,
+        help="parse formation pages in this many processes, pipelined with fetching (default: 0, parse inline)"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=1 / DELAY_BETWEEN_REQUESTS,
+        help="starting requests per second across all workers, 0 for no limit "
+             f"(default: {1 / DELAY_BETWEEN_REQUESTS:.2f})"
+    )
+    parser.add_argument(
+        "--max-rate", type=float, default=MAX_RATE,
+        help=f"ceiling the rate may climb to while the site is healthy (default: {MAX_RATE})"
+    )
+    parser.add_argument(
+        "--fixed-rate", action="store_true",
+        help="keep the rate at --rate instead of adapting it to server health"
+    )
+    parser.add_argument(
+        "--cache", choices=("off",) + CACHE_MODES, default="off",
+        help="response cache mode: replay (offline), revalidate (conditional GETs) "
+             "or ttl (trust entries younger than --cache-ttl)"
+    )
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="response cache directory")
+    parser.add_argument(
+        "--cache-ttl", type=float, default=24 * 3600,
+        help="seconds a cached page stays fresh in ttl mode (default: 1 day)"
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help="evict least recently used pages beyond this size"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="fetch only formations that are new or changed on their playbook page since the previous "
+             "playbooks.json, reusing the rest (turns on --cache revalidate)"
+    )
+    parser.add_argument(
+        "--revalidate", action="store_true",
+        help="with --incremental, also request unchanged formations' pages with conditional GETs, "
+             "to catch plays changed inside them"
+    )
+    parser.add_argument(
+        "--sitemap", nargs="?", const="", metavar="URL",
+        help="discover pages from the site's sitemap (default: /sitemap.xml) and skip those unchanged "
+             "since the previous playbooks.json; follows links if there is none"
+    )
+    parser.add_argument(
+        "--columnar", action="store_true",
+        help=f"also write the compact columnar export ({COLUMNAR_FILE.name})"
+    )
+    parser.add_argument(
+        "--dedup", action="store_true",
+        help=f"also write the deduplicated export with shared formation/play tables ({DEDUP_FILE.name})"
+    )
+    parser.add_argument(
+        "--shard", action="store_true",
+        help="also write one content-hashed file per playbook plus manifest.json"
+    )
+    parser.add_argument(
+        "--db", type=Path, metavar="PATH",
+        help="also upsert each finished playbook into this SQLite store (see store.py)"
+    )
+    parser.add_argument(
+        "--history", action="store_true",
+        help=f"record this scrape as a snapshot in {HISTORY_DIR.name}/ (base plus deltas, see history.py)"
+    )
+    parser.add_argument(
+        "--metrics", type=Path, metavar="PATH",
+        help="write crawl metrics here: Prometheus text for .prom/.txt, JSONL otherwise"
+    )
+    parser.add_argument(
+        "--profile", type=Path, metavar="PATH",
+        help="cProfile the parse phase and dump pstats here"
+    )
+    args = parser.parse_args(argv)
+    if args.revalidate and not args.incremental:
+        parser.error("--revalidate needs --incremental")
+    return args
+
+
+def main(argv: Optional[list[str]] = None):
+    from fileutil import iter_json_array
+    from incremental import diff_plays, load_previous, scrape_playbook_incremental, write_diff_report
+    from journal import Journal
+    from schedule import Schedule
+    from search_index import write_index
+    from shards import ShardWriter, playbook_counts
+
+    global deadline, formation_priority, parse_pool, profiler
+    args = parse_args(argv)
+    started_at = time.monotonic()
+    configure_transport(args.concurrency)
+    rate_controller.configure(args.rate, args.max_rate, enabled=not args.fixed_rate)
+    metrics.reset()
+    if args.profile:
+        profiler = ParseProfiler()
+    if args.incremental and args.cache == "off":
+        # Unchanged pages then cost a 304 instead of a download
+        args.cache = "revalidate"
+    if args.cache != "off":
+        enable_cache(args.cache, args.cache_dir, args.cache_ttl, int(args.cache_max_mb * 1024 * 1024))
 
-def main():
     print("=" * 60)
     print("Huddle.gg Madden 26 Playbook Scraper")
     print("=" * 60)
@@ -391,7 +753,23 @@ def main():
     OUTPUT_DIR.mkdir(exist_ok=True)
 
     # Load any previous progress
-    partial_data, completed = load_progress()
+    journal = Journal(JOURNAL_FILE)
+    progress = journal.load()
+
+    # Previous output, for incremental reuse; the change report reads it after the crawl
+    previous = load_previous(OUTPUT_FILE) if args.incremental or args.sitemap is not None else {}
+    incremental_stats = Counter()
+
+    site = None
+    sitemap_stats = Counter()
+    if args.sitemap is not None:
+        from sitemap import read_sitemap, scrape_playbook_sitemap
+        print("\nReading sitemap...")
+        site = read_sitemap(args.sitemap or None)
+        if site is None:
+            print("No usable sitemap, discovering pages by following links")
+        else:
+            print(f"  {len(site.playbooks)} playbooks in {site.files} sitemap file(s)")
 
     # Get list of all playbooks
     print("\nFetching playbook list...")
@@ -401,6 +779,13 @@ def main():
         print("ERROR: Could not fetch playbook list. Check if Huddle.gg structure has changed.")
         return
 
+    # The output keeps every playbook on the site; those --only leaves out keep their previous version
+    site_playbooks = playbooks
+    if args.only:
+        playbooks = [p for p in playbooks if p["id"] in args.only]
+    left_out = [p for p in site_playbooks if args.only and p["id"] not in args.only]
+    order = [pb["id"] for pb in site_playbooks]
+
     print(f"\nFound {len(playbooks)} playbooks")
 
     # Separate by type
@@ -409,67 +794,238 @@ def main():
     print(f"  - {len(offense_books)} offensive playbooks")
     print(f"  - {len(defense_books)} defensive playbooks")
 
-    # Scrape each playbook
-    all_playbooks = []
-
-    for i, playbook in enumerate(playbooks):
-        if playbook["id"] in completed:
-            print(f"\nSkipping {playbook['name']} (already scraped)")
-            # Find in partial data
-            for pb in partial_data.get("playbooks", []):
-                if pb["id"] == playbook["id"]:
-                    all_playbooks.append(pb)
-                    break
-            continue
-
-        print(f"\n[{i+1}/{len(playbooks)}] ", end="")
-        scraped = scrape_playbook(playbook)
-        all_playbooks.append(scraped)
-        completed.append(playbook["id"])
-
-        # Save progress periodically
-        if (i + 1) % 5 == 0:
-            save_progress({"playbooks": all_playbooks}, completed)
-            print(f"\n  Progress saved ({len(completed)}/{len(playbooks)} playbooks)")
-
-    # Build final output
-    output = {
+    # Crawl the most valuable playbooks first; the output keeps the site's order
+    schedule = Schedule(SCHEDULE_FILE, args.hot)
+    queue = schedule.order(playbooks)
+    formation_priority = schedule.formation_score
+    # Armed only now, so the playbook list is always fetched
+    if args.time_budget is not None:
+        deadline = started_at + args.time_budget * 60
+
+    # Scrape each playbook. Finished playbooks live in the journal, not in memory,
+    # and every whole-crawl output below reads them back one at a time.
+    totals = Counter()
+    shard_writer = ShardWriter(OUTPUT_DIR) if args.shard else None
+    store = None
+    if args.db:
+        from store import PlaybookStore
+        store = PlaybookStore(args.db)
+    progress_line = ProgressLine(len(playbooks))
+    # Playbooks with pages that failed after retries; kept out of the journal's finished set
+    incomplete = {}
+    # Playbooks the time budget didn't leave room for, or ran out in the middle of
+    unreached = []
+
+    if args.parse_workers > 0:
+        from pipeline import create_parse_pool
+        parse_pool = create_parse_pool(args.parse_workers)
+
+    pool = ThreadPoolExecutor(max_workers=args.concurrency) if args.concurrency > 1 else nullcontext()
+    with pool as executor, (parse_pool or nullcontext()):
+        for i, playbook in enumerate(queue):
+            if playbook["id"] in progress.playbooks:
+                print(f"\nSkipping {playbook['name']} (already scraped)")
+                resumed = journal.read_playbook(progress.playbooks[playbook["id"]])
+                totals.update(playbook_counts(resumed))
+                if shard_writer:
+                    shard_writer.add(resumed)
+                if store:
+                    store.upsert_playbooks([resumed], order=order)
+                progress_line.advance(metrics.total("pages_parsed_total"), playbook["id"], skipped=True)
+                continue
+
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                estimate = schedule.estimate(playbook["id"])
+                if left <= 0 or (estimate is not None and estimate > left):
+                    if left > 0:
+                        print(f"\nPassing over {playbook['name']}: takes about {estimate:.0f}s, {left:.0f}s left")
+                    unreached.append(playbook)
+                    progress_line.advance(metrics.total("pages_parsed_total"), playbook["id"], skipped=True)
+                    continue
+
+            def record_formation(formation: dict, url: str, playbook_id: str = playbook["id"]):
+                with metrics.timer("checkpoint_seconds"):
+                    journal.record_formation(playbook_id, url, formation["plays"])
+
+            print(f"\n[{i+1}/{len(playbooks)}] ", end="")
+            failed_before = set(failed_urls)
+            started = time.monotonic()
+            listed = site.playbooks.get(playbook["id"]) if site else None
+            since = schedule.fresh_as_of(playbook["id"], previous.get(playbook["id"])) if listed else None
+            # Reused formations are only as fresh as the previous scrape that fetched them
+            fresh_as_of = site.read_at if site else None
+            try:
+                if since is not None:
+                    scraped = scrape_playbook_sitemap(
+                        playbook, listed, previous[playbook["id"]], since, executor, sitemap_stats,
+                        progress.formations, record_formation
+                    )
+                elif args.incremental:
+                    if not args.revalidate or cache.mode != "revalidate":
+                        # Reused formations, or cached pages served without asking the server,
+                        # are only as fresh as the previous scrape
+                        entry = schedule.playbooks.get(playbook["id"])
+                        fresh_as_of = entry.fresh_as_of if entry else 0.0
+                    scraped = scrape_playbook_incremental(
+                        playbook, previous.get(playbook["id"]), executor, incremental_stats,
+                        progress.formations, record_formation, args.revalidate
+                    )
+                else:
+                    scraped = scrape_playbook(playbook, executor, progress.formations, record_formation)
+            except DeadlineExceeded:
+                print(f"\n  Time budget used up partway through {playbook['name']}; "
+                      f"its finished formations are kept for the next run")
+                unreached.append(playbook)
+                progress_line.advance(metrics.total("pages_parsed_total"), playbook["id"], skipped=True)
+                continue
+            totals.update(playbook_counts(scraped))
+            missing = failed_urls - failed_before
+            if missing:
+                print(f"  WARNING: {len(missing)} page(s) failed, {playbook['name']} is incomplete")
+                incomplete[playbook["id"]] = scraped
+            else:
+                with metrics.timer("checkpoint_seconds"):
+                    journal.record_playbook(scraped)
+                schedule.record(scraped, time.monotonic() - started, fresh_as_of=fresh_as_of)
+                if store:
+                    with metrics.timer("write_seconds", output="db"):
+                        store.upsert_playbooks([scraped], order=order)
+            if shard_writer:
+                with metrics.timer("write_seconds", output="shards"):
+                    shard_writer.add(scraped)
+            progress_line.advance(metrics.total("pages_parsed_total"), playbook["id"])
+    parse_pool = None
+    deadline = formation_priority = None
+    schedule.save()
+
+    # Playbooks left out by --only or not reached within the time budget keep their previous version,
+    # so a partial run never shrinks the output. Only those are read from the previous output.
+    missing = {pb["id"] for pb in left_out + unreached}
+    if missing and not previous:
+        previous = load_previous(OUTPUT_FILE, missing)
+    carried = {pb_id: previous[pb_id] for pb_id in missing if pb_id in previous}
+    pending = {**carried, **incomplete}
+    previous = None
+    # The change report compares against the previous output, so it is read before compact() replaces it.
+    # Both sides are streamed a playbook at a time.
+    report = (
+        diff_plays(iter_json_array(OUTPUT_FILE, "playbooks"), journal.playbooks(order, pending))
+        if OUTPUT_FILE.exists() else None
+    )
+    if shard_writer:
+        for playbook in carried.values():
+            shard_writer.add(playbook)
+
+    # Build final output from the journal
+    header = {
         "version": MADDEN_VERSION,
         "scrapedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "source": "huddle.gg",
-        "playbooks": all_playbooks
     }
-
-    # Save final output
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(output, f, indent=2)
-
-    # Clean up progress file
-    if PROGRESS_FILE.exists():
-        PROGRESS_FILE.unlink()
+    with metrics.timer("write_seconds", output="playbooks"):
+        written = journal.compact(OUTPUT_FILE, header, order, pending)
+
+    if args.history:
+        from history import History
+        with metrics.timer("write_seconds", output="history"):
+            snapshot = History(HISTORY_DIR).record({**header, "playbooks": journal.playbooks(order, pending)})
+
+    with metrics.timer("write_seconds", output="search_index"):
+        write_index({**header, "playbooks": journal.playbooks(order, pending)}, SEARCH_INDEX_FILE)
+
+    if shard_writer:
+        with metrics.timer("write_seconds", output="shards"):
+            shard_writer.finish(header, order)
+
+    if store:
+        # Incomplete playbooks stay out of the store, which keeps their last complete version
+        store.set_header(header)
+        store.close()
+
+    if args.columnar:
+        from export_columnar import write_columnar
+        with metrics.timer("write_seconds", output="columnar"):
+            write_columnar({**header, "playbooks": journal.playbooks(order, pending)}, COLUMNAR_FILE)
+
+    if args.dedup:
+        from export_dedup import write_dedup
+        with metrics.timer("write_seconds", output="dedup"):
+            write_dedup({**header, "playbooks": journal.playbooks(order, pending)}, DEDUP_FILE)
+
+    # Clean up progress journal, unless it is needed to finish incomplete playbooks.
+    # After a time budget only the formations of unfinished playbooks are worth keeping:
+    # the next run is a new crawl, not a resumption of this one.
+    if incomplete:
+        journal.close()
+    elif unreached:
+        journal.keep_unfinished()
+    else:
+        journal.remove()
+
+    if report is not None:
+        write_diff_report(report, DIFF_REPORT_FILE)
 
     # Print summary
     print("\n" + "=" * 60)
     print("SCRAPING COMPLETE")
     print("=" * 60)
     print(f"Output: {OUTPUT_FILE}")
-
-    total_formations = sum(
-        len(fg["formations"])
-        for pb in all_playbooks
-        for fg in pb.get("formationGroups", [])
-    )
-    total_plays = sum(
-        len(f["plays"])
-        for pb in all_playbooks
-        for fg in pb.get("formationGroups", [])
-        for f in fg.get("formations", [])
+    if args.db:
+        print(f"Database: {args.db}")
+    if args.history:
+        print(f"History: snapshot {snapshot['id']}, delta {snapshot['deltaBytes'] / 1024:.1f} KB"
+              + (", new base" if snapshot["baseBytes"] else ""))
+
+    print(f"Playbooks: {len(written)}")
+    if left_out:
+        kept = sum(1 for pb in left_out if pb["id"] in carried)
+        print(f"Not selected by --only: {len(left_out)} ({kept} kept from the previous output)")
+    if unreached:
+        kept = sum(1 for pb in unreached if pb["id"] in carried)
+        print(f"Not reached within the time budget: {len(unreached)} "
+              f"({kept} kept from the previous output, {len(unreached) - kept} left out)")
+    print(f"Formations: {totals['formations']}")
+    print(f"Plays: {totals['plays']}")
+    print(
+        f"Retries: {metrics.total('http_retries_total'):.0f}, "
+        f"circuit breaker opened {breaker.opened} time(s)"
     )
 
-    print(f"Playbooks: {len(all_playbooks)}")
-    print(f"Formations: {total_formations}")
-    print(f"Plays: {total_plays}")
+    if args.incremental:
+        print(
+            f"Formations: {incremental_stats['reused']} reused without a request, "
+            f"{incremental_stats['new']} new, {incremental_stats['changed']} changed, "
+            f"{incremental_stats['unchanged']} revalidated unchanged; "
+            f"{metrics.counter('cache_total', result='revalidated'):.0f} page(s) not modified (304)"
+        )
+    if site:
+        print(
+            f"Sitemap: {site.files} file(s) read, {sitemap_stats['skipped']} unchanged page(s) not fetched, "
+            f"{sitemap_stats['skipped'] - site.files} request(s) saved"
+        )
+
+    print("\nTime breakdown:")
+    for line in metrics.summary():
+        print(f"  {line}")
+    if args.metrics:
+        metrics.write(args.metrics)
+        print(f"Metrics: {args.metrics}")
+    if profiler:
+        print(f"\nParse profile: {args.profile}")
+        profiler.dump(args.profile)
+        profiler = None
+
+    if incomplete:
+        print(f"\nWARNING: {len(incomplete)} playbook(s) have pages that could not be fetched:")
+        for pb in incomplete.values():
+            print(f"  - {pb['name']}")
+        print(f"Run again to fetch just the missing pages (progress kept in {JOURNAL_FILE.name})")
+        return 1
 
 
 if __name__ == "__main__":
-    main()
+    # Modules that import scrape_huddle (incremental, pipeline) must see this
+    # run's cache, rate limiter and failure tracking, not a second copy
+    sys.modules.setdefault("scrape_huddle", sys.modules[__name__])
+    sys.exit(main())
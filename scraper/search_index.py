@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Precomputed play search index.
+
+Answers the same question as searchPlays() in src/data/playbooks.js (case
+insensitive substring match on play names, optional side and playbook
+filters, results in playbooks.json order, capped at ``limit``) without
+scanning every play.
+
+Plays are identified by their ordinal: their position when walking
+playbooks -> formationGroups -> formations -> plays in playbooks.json.
+Many plays share a name, so the index is built over the distinct
+lowercased names:
+
+    {
+      "format": "playbooks-search", "formatVersion": 1,
+      "playbooks": {"id": [...], "type": [...], "firstPlay": [...]},
+      "names": ["hb dive", ...],                   # lowercased, distinct
+      "namePlays": [[ordinal deltas], ...],        # per name, ascending
+      "grams": {"hb ": [name index deltas], ...}   # 2- and 3-grams
+    }
+
+Posting lists are delta-encoded. A query of 3+ characters intersects the
+posting lists of its trigrams, a 2-character query uses its bigram, and
+candidates are confirmed with a substring check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Iterator, Optional
+
+from fileutil import write_bytes_atomic
+
+FORMAT = "playbooks-search"
+FORMAT_VERSION = 1
+
+
+def iter_plays(data: dict) -> Iterator[tuple[dict, dict, dict, dict]]:
+    """Yield (playbook, group, formation, play) in ordinal order."""
+    for pb in data["playbooks"]:
+        for group in pb.get("formationGroups", []):
+            for formation in group.get("formations", []):
+                for play in formation.get("plays", []):
+                    yield pb, group, formation, play
+
+
+def grams(text: str) -> set[str]:
+    return {text[i:i + n] for n in (2, 3) for i in range(len(text) - n + 1)}
+
+
+def _deltas(values: list[int]) -> list[int]:
+    return [b - a for a, b in zip([0] + values, values)]
+
+
+def build_index(data: dict) -> dict:
+    """Build the search index for a playbooks document.
+
+    ``data["playbooks"]`` may be any iterable; it is read once.
+    """
+    pb_ids, pb_types, first_play = [], [], []
+    names: dict[str, int] = {}
+    name_plays: list[list[int]] = []
+
+    ordinal = 0
+    for pb in data["playbooks"]:
+        pb_ids.append(pb["id"])
+        pb_types.append(pb["type"])
+        first_play.append(ordinal)
+        for group in pb.get("formationGroups", []):
+            for formation in group.get("formations", []):
+                for play in formation.get("plays", []):
+                    name = play["name"].lower()
+                    if name not in names:
+                        names[name] = len(name_plays)
+                        name_plays.append([])
+                    name_plays[names[name]].append(ordinal)
+                    ordinal += 1
+
+    postings: dict[str, list[int]] = {}
+    for name, i in names.items():
+        for gram in grams(name):
+            postings.setdefault(gram, []).append(i)
+
+    return {
+        "format": FORMAT,
+        "formatVersion": FORMAT_VERSION,
+        "playbooks": {"id": pb_ids, "type": pb_types, "firstPlay": first_play},
+        "names": list(names),
+        "namePlays": [_deltas(ordinals) for ordinals in name_plays],
+        "grams": {gram: _deltas(ids) for gram, ids in sorted(postings.items())},
+    }
+
+
+def write_index(data: dict, path: Path):
+    write_bytes_atomic(path, json.dumps(build_index(data), separators=(",", ":")).encode("utf-8"))
+
+
+class SearchIndex:
+    """Query side of the search index."""
+
+    def __init__(self, index: dict):
+        if index.get("format") != FORMAT or index.get("formatVersion") != FORMAT_VERSION:
+            raise ValueError("not a playbooks-search v1 document")
+        pbs = index["playbooks"]
+        self.playbook_ids = pbs["id"]
+        self.playbook_types = pbs["type"]
+        self.first_play = pbs["firstPlay"]
+        self.names = index["names"]
+        self.name_plays = [list(accumulate(d)) for d in index["namePlays"]]
+        self.grams = {gram: list(accumulate(d)) for gram, d in index["grams"].items()}
+
+        # Playbook index of every ordinal, for the side/playbook filters
+        total = sum(len(ordinals) for ordinals in self.name_plays)
+        bounds = self.first_play[1:] + [total]
+        self.play_playbook = [
+            i for i, (start, end) in enumerate(zip(self.first_play, bounds)) for _ in range(start, end)
+        ]
+
+    @classmethod
+    def load(cls, path: Path) -> "SearchIndex":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def matching_names(self, query: str) -> list[int]:
+        """Indexes of the distinct names containing query (already lowercased)."""
+        if len(query) < 2:
+            candidates = range(len(self.names))
+        else:
+            keys = [query[i:i + 3] for i in range(len(query) - 2)] or [query]
+            lists = sorted((self.grams.get(key, []) for key in keys), key=len)
+            candidates = set(lists[0])
+            for other in lists[1:]:
+                candidates.intersection_update(other)
+                if not candidates:
+                    break
+            candidates = sorted(candidates)
+        return [i for i in candidates if query in self.names[i]]
+
+    def search(
+        self,
+        query: str,
+        type: Optional[str] = None,
+        playbook_id: Optional[str] = None,
+        limit: Optional[int] = 50,
+    ) -> list[int]:
+        """Ordinals of matching plays, in playbooks.json order."""
+        if not query:
+            return []
+        query = query.lower()
+
+        allowed = None
+        if type or playbook_id:
+            allowed = {
+                i for i, (pb_id, pb_type) in enumerate(zip(self.playbook_ids, self.playbook_types))
+                if (not type or pb_type == type) and (not playbook_id or pb_id == playbook_id)
+            }
+
+        merged = heapq.merge(*(self.name_plays[i] for i in self.matching_names(query)))
+        if allowed is not None:
+            merged = (o for o in merged if self.play_playbook[o] in allowed)
+        return list(islice(merged, limit))
+
+
+def search_results(data: dict, ordinals: list[int]) -> list[dict]:
+    """Materialize ordinals into the result objects searchPlays() returns."""
+    wanted = set(ordinals)
+    results = {}
+    for ordinal, (pb, group, formation, play) in enumerate(iter_plays(data)):
+        if ordinal in wanted:
+            results[ordinal] = {
+                **play,
+                "playbook": pb["name"],
+                "playbookId": pb["id"],
+                "formationGroup": group["name"],
+                "formation": formation["name"],
+                "formationSlug": formation["slug"],
+            }
+    return [results[o] for o in ordinals]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a play search index, optionally running a query")
+    parser.add_argument("input", type=Path, help="nested playbooks JSON")
+    parser.add_argument("-o", "--output", type=Path, help="default: <input dir>/search_index.json")
+    parser.add_argument("--query", help="print the results of a query against the new index")
+    parser.add_argument("--type", choices=("offense", "defense"))
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    output = args.output or args.input.parent / "search_index.json"
+    write_index(data, output)
+    print(f"Wrote {output} ({output.stat().st_size / 1024:.0f} KB)")
+
+    if args.query:
+        index = SearchIndex.load(output)
+        for result in search_results(data, index.search(args.query, type=args.type)):
+            print(f"  {result['playbook']:<12} {result['formationGroup']:<12} "
+                  f"{result['formation']:<20} {result['name']}")
+
+
+if __name__ == "__main__":
+    main()
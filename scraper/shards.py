@@ -0,0 +1,113 @@
+"""
+Sharded output: one JSON file per playbook plus a small manifest.
+
+Shards are minified JSON named ``{playbook id}.{content hash}.json``, so a
+shard's URL changes whenever its content does and can be served with
+long-lived immutable caching. manifest.json lists every playbook with its
+metadata, counts, hash and shard path. Only the manifest needs revalidating.
+
+Every file is written atomically, and the manifest is written last. A reader
+therefore never sees a manifest that points at a missing or partial shard.
+Shards that the new manifest no longer references are removed afterwards.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from fileutil import write_bytes_atomic, write_json_atomic
+
+SHARD_DIRNAME = "playbooks"
+MANIFEST_NAME = "manifest.json"
+
+
+def playbook_counts(playbook: dict) -> dict:
+    groups = playbook.get("formationGroups", [])
+    formations = [f for group in groups for f in group.get("formations", [])]
+    return {
+        "formationGroups": len(groups),
+        "formations": len(formations),
+        "plays": sum(len(f.get("plays", [])) for f in formations),
+    }
+
+
+class ShardWriter:
+    """Write playbook shards as they complete, then the manifest.
+
+    Usage::
+
+        writer = ShardWriter(OUTPUT_DIR)
+        for playbook in ...:
+            writer.add(playbook)
+        writer.finish(header)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.shard_dir = self.directory / SHARD_DIRNAME
+        self.entries: dict[str, dict] = {}
+
+    def add(self, playbook: dict) -> dict:
+        """Write one playbook's shard and return its manifest entry."""
+        body = json.dumps(playbook, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.shard_dir / f"{playbook['id']}.{digest[:12]}.json"
+        if not path.exists():
+            write_bytes_atomic(path, body)
+
+        entry = {
+            "id": playbook["id"],
+            "name": playbook["name"],
+            "type": playbook["type"],
+            "category": playbook["category"],
+            "counts": playbook_counts(playbook),
+            "hash": digest,
+            "bytes": len(body),
+            "file": f"{SHARD_DIRNAME}/{path.name}",
+        }
+        self.entries[playbook["id"]] = entry
+        return entry
+
+    def finish(self, header: dict, order: Optional[list[str]] = None) -> dict:
+        """Write manifest.json (playbooks in ``order`` of ids if given) and prune stale shards."""
+        ids = order if order is not None else list(self.entries)
+        manifest = {**header, "playbooks": [self.entries[i] for i in ids if i in self.entries]}
+        write_json_atomic(self.directory / MANIFEST_NAME, manifest)
+
+        referenced = {Path(entry["file"]).name for entry in manifest["playbooks"]}
+        for path in self.shard_dir.glob("*.json"):
+            if path.name not in referenced:
+                path.unlink()
+        return manifest
+
+
+def write_shards(data: dict, directory: Path) -> dict:
+    """Shard a complete playbooks document; returns the manifest."""
+    writer = ShardWriter(directory)
+    for playbook in data["playbooks"]:
+        writer.add(playbook)
+    header = {key: value for key, value in data.items() if key != "playbooks"}
+    return writer.finish(header)
+
+
+def load_playbook(directory: Path, entry: dict) -> dict:
+    """Load one shard, checking it against the manifest hash."""
+    with open(Path(directory) / entry["file"], "rb") as f:
+        body = f.read()
+    if hashlib.sha256(body).hexdigest() != entry["hash"]:
+        raise ValueError(f"shard {entry['file']} does not match its manifest hash")
+    return json.loads(body)
+
+
+def load_sharded(directory: Path) -> dict:
+    """Reassemble the full playbooks document from a manifest and its shards."""
+    directory = Path(directory)
+    with open(directory / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    return {
+        **{key: value for key, value in manifest.items() if key != "playbooks"},
+        "playbooks": [load_playbook(directory, entry) for entry in manifest["playbooks"]],
+    }
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Set queries over playbooks: which books have given plays, and which books are alike.
+
+Every distinct (formation group, formation, play name) in a scrape gets an
+integer id (names normalized: upper case, single spaces), or with
+level="group" every (formation group, play name), which compares books
+whose formations differ but whose plays are alike. Each playbook
+becomes one row of a bit matrix over those ids, packed eight keys to a
+byte (np.packbits). Queries are whole-matrix NumPy operations rather than
+walks of the formationGroups -> formations -> plays tree:
+
+    containing()   books with all (or any) of some plays, optionally within
+                   one formation group or formation: a packed mask per play,
+                   tested against every row at once
+    jaccard()      all pairs, |A & B| / |A | B|, from one matrix product
+    containment()  all pairs, |A & B| / |B|: how much of book B book A has
+    similar()      the k books most like one book, by Jaccard
+
+write_similarity() exports the all-pairs matrix (also
+``python -m scraper export similarity``):
+
+    {
+      "format": "playbook-similarity", "formatVersion": 1,
+      "version": ..., "scrapedAt": ..., "source": ...,
+      "level": "formation" | "group",
+      "keys": <distinct keys>,
+      "playbooks": {"id": [...], "keyCount": [...]},
+      "jaccard": [[...], ...]      row and column order of playbooks.id, 4 decimals
+    }
+
+    python similarity.py output/playbooks.json --all "PA BOOT" MESH "HB STRETCH" --group Gun
+    python similarity.py output/playbooks.json --similar air-raid-off
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from fileutil import write_json_atomic
+
+FORMAT = "playbook-similarity"
+FORMAT_VERSION = 1
+
+HEADER_FIELDS = ("version", "scrapedAt", "source")
+LEVELS = ("formation", "group")
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.upper().split())
+
+
+class PlaybookSets:
+    """Playbooks as packed bitsets over their (group, formation, play) keys."""
+
+    def __init__(self, data: dict, level: str = "formation"):
+        """Build from a nested playbooks document; ``data["playbooks"]`` is read once."""
+        if level not in LEVELS:
+            raise ValueError(f"level must be one of {LEVELS}")
+        self.level = level
+        self.ids: list[str] = []
+        self.types: list[str] = []
+        key_ids: dict[tuple[str, str, str], int] = {}
+        rows: list[np.ndarray] = []
+        for pb in data["playbooks"]:
+            self.ids.append(pb["id"])
+            self.types.append(pb["type"])
+            row = {
+                key_ids.setdefault((
+                    normalize(group["name"]),
+                    normalize(formation["name"]) if level == "formation" else "",
+                    normalize(play["name"]),
+                ), len(key_ids))
+                for group in pb["formationGroups"]
+                for formation in group["formations"]
+                for play in formation["plays"]
+            }
+            rows.append(np.fromiter(row, dtype=np.int64, count=len(row)))
+
+        self.keys = list(key_ids)
+        matrix = np.zeros((len(rows), len(self.keys)), dtype=bool)
+        for i, columns in enumerate(rows):
+            matrix[i, columns] = True
+        self.bits = np.packbits(matrix, axis=1)
+        self.sizes = matrix.sum(axis=1)
+
+        # Per-key codes, so a query's columns are found with array comparisons
+        self._names = {}
+        codes = np.array(
+            [[self._names.setdefault(part, len(self._names)) for part in key] for key in self.keys],
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        self._group, self._formation, self._play = codes.T
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def matrix(self) -> np.ndarray:
+        """The unpacked playbooks x keys boolean matrix."""
+        return np.unpackbits(self.bits, axis=1, count=len(self.keys)).astype(bool)
+
+    def _code(self, name: Optional[str]) -> Optional[int]:
+        return None if name is None else self._names.get(normalize(name), -1)
+
+    def mask(self, play: str, group: Optional[str] = None, formation: Optional[str] = None) -> np.ndarray:
+        """Packed mask of the keys for a play name, within a group and/or formation if given."""
+        columns = self._play == self._code(play)
+        if group is not None:
+            columns &= self._group == self._code(group)
+        if formation is not None:
+            if self.level != "formation":
+                raise ValueError("formation scopes need level='formation'")
+            columns &= self._formation == self._code(formation)
+        return np.packbits(columns)
+
+    def has(self, play: str, group: Optional[str] = None, formation: Optional[str] = None) -> np.ndarray:
+        """Boolean per playbook: does it have the play (in that group/formation)?"""
+        return (self.bits & self.mask(play, group, formation)).any(axis=1)
+
+    def containing(
+        self,
+        plays: Iterable[str],
+        mode: str = "all",
+        group: Optional[str] = None,
+        formation: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> list[str]:
+        """Ids of the playbooks with all (or any) of ``plays``, in document order."""
+        hits = [self.has(play, group, formation) for play in plays]
+        if not hits:
+            return []
+        found = np.logical_and.reduce(hits) if mode == "all" else np.logical_or.reduce(hits)
+        if type is not None:
+            found &= np.array(self.types) == type
+        return [self.ids[i] for i in np.flatnonzero(found)]
+
+    def intersections(self) -> np.ndarray:
+        """|A & B| for every pair, as one product of the unpacked matrix with its transpose."""
+        # float32 goes through BLAS and is exact for counts below 2**24
+        matrix = self.matrix().astype(np.float32)
+        return matrix @ matrix.T
+
+    def jaccard(self) -> np.ndarray:
+        """All-pairs Jaccard similarity, playbooks x playbooks."""
+        inter = self.intersections()
+        union = self.sizes[:, None] + self.sizes[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+    def containment(self) -> np.ndarray:
+        """containment()[a, b]: the share of playbook b's keys that playbook a has too."""
+        inter = self.intersections()
+        sizes = np.broadcast_to(self.sizes[None, :], inter.shape)
+        return np.divide(inter, sizes, out=np.zeros_like(inter), where=sizes > 0)
+
+    def similar(self, playbook_id: str, k: int = 5, same_type: bool = True) -> list[tuple[str, float]]:
+        """The k playbooks most like ``playbook_id`` by Jaccard, best first."""
+        i = self.ids.index(playbook_id)
+        # One row only: popcounts of the packed rows, no full matrix
+        inter = np.unpackbits(self.bits & self.bits[i], axis=1).sum(axis=1)
+        union = self.sizes + self.sizes[i] - inter
+        scores = np.divide(inter, union, out=np.zeros(len(self), dtype=np.float64), where=union > 0)
+        candidates = np.ones(len(self), dtype=bool)
+        candidates[i] = False
+        if same_type:
+            candidates &= np.array(self.types) == self.types[i]
+        order = np.flatnonzero(candidates)
+        k = min(k, len(order))
+        if k == 0:
+            return []
+        best = order[np.argpartition(-scores[order], k - 1)[:k]]
+        # Ties keep document order
+        best = best[np.lexsort((best, -scores[best]))]
+        return [(self.ids[j], float(scores[j])) for j in best]
+
+
+def similarity_document(data: dict, sets: Optional[PlaybookSets] = None) -> dict:
+    sets = sets or PlaybookSets(data)
+    return {
+        "format": FORMAT,
+        "formatVersion": FORMAT_VERSION,
+        **{key: data[key] for key in HEADER_FIELDS if key in data},
+        "level": sets.level,
+        "keys": len(sets.keys),
+        "playbooks": {"id": sets.ids, "keyCount": sets.sizes.tolist()},
+        "jaccard": np.round(sets.jaccard(), 4).tolist(),
+    }
+
+
+def write_similarity(data: dict, path: Path, level: str = "formation"):
+    write_json_atomic(path, similarity_document(data, PlaybookSets(data, level)), indent=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Playbook set queries and the all-pairs similarity export")
+    parser.add_argument("input", type=Path, help="nested playbooks JSON (e.g. output/playbooks.json)")
+    parser.add_argument("-o", "--output", type=Path, help="write the similarity matrix here")
+    parser.add_argument("--all", nargs="+", metavar="PLAY", help="books with every one of these plays")
+    parser.add_argument("--any", nargs="+", metavar="PLAY", help="books with at least one of these plays")
+    parser.add_argument("--group", help="only count plays in this formation group, e.g. Gun")
+    parser.add_argument("--formation", help="only count plays in this formation, e.g. 'Bunch Quads'")
+    parser.add_argument("--type", choices=("offense", "defense"))
+    parser.add_argument("--similar", metavar="ID", help="the books most like this one")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--level", choices=LEVELS, default="formation",
+                        help="compare plays per formation, or per formation group")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        data = json.load(f)
+    sets = PlaybookSets(data, args.level)
+    print(f"{len(sets)} playbooks, {len(sets.keys)} distinct keys by {args.level}")
+
+    for mode in ("all", "any"):
+        plays = getattr(args, mode)
+        if plays:
+            found = sets.containing(plays, mode, args.group, args.formation, args.type)
+            where = " in ".join(filter(None, [", ".join(plays), args.formation, args.group]))
+            print(f"\n{len(found)} playbook(s) with {mode} of {where}:")
+            for playbook_id in found:
+                print(f"  {playbook_id}")
+
+    if args.similar:
+        print(f"\nMost like {args.similar}:")
+        for playbook_id, score in sets.similar(args.similar, args.k):
+            print(f"  {playbook_id:<24} {score:.3f}")
+
+    if args.output:
+        write_json_atomic(args.output, similarity_document(data, sets), indent=None)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
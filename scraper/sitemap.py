@@ -0,0 +1,233 @@
+"""
+Sitemap-driven page discovery (--sitemap).
+
+Link-following discovery fetches every playbook page just to find its
+formation links. When the site publishes a sitemap, the sitemap index at
+/sitemap.xml and its sitemaps list every /26/playbooks/... page directly,
+each with a <lastmod>; they are parsed incrementally, one <url> at a time,
+so a sitemap's size costs parse time but not a tree in memory. Gzipped
+sitemaps (*.xml.gz) are decompressed as they are parsed.
+
+A playbook is then scraped against its previous version, as of the time
+the schedule recorded it current (schedule.Schedule.fresh_as_of):
+
+- playbook page and formation list unchanged: the page isn't fetched; its
+  formation index comes from the previous output, and only formations
+  whose page (or one of their plays' pages) has a newer <lastmod> are
+  fetched again;
+- playbook page newer, or formations added or gone: the page is fetched
+  and the formations with unchanged pages are reused.
+
+A playbook without a usable previous version is scraped as usual. The
+playbook index page is still read for names and order (one request).
+Without a sitemap the crawl falls back to following links.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter, deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Callable, Iterator, Optional
+from urllib.parse import urljoin, urlsplit
+
+import scrape_huddle
+from scrape_huddle import MADDEN_VERSION, assemble_playbook, failed_urls, fetch_raw, scrape_formations, scrape_playbook
+
+SITEMAP_PATH = "/sitemap.xml"
+# Allowance for clock skew between the site's <lastmod> and our clock
+LASTMOD_SLACK = 300.0
+MAX_SITEMAPS = 1000
+
+# /26/playbooks/{playbook}/[{formation}/[{play}/]]
+_PAGE_PATH = re.compile(rf"/{MADDEN_VERSION}/playbooks/([\w-]+-(?:off|def))/(?:([\w-]+)/(?:([\w-]+)/)?)?$")
+
+
+def parse_lastmod(text: Optional[str]) -> Optional[float]:
+    """A W3C datetime as epoch seconds, rounded up to the latest instant it can mean.
+
+    A bare date counts as the end of that day, so a page changed later on
+    the day of a scrape is not taken as unchanged. None if missing or bad.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        if len(text) == 10:
+            day = date.fromisoformat(text)
+            return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() + 24 * 3600
+        moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    # Minute precision (W3C allows it) means up to the end of that minute
+    return moment.timestamp() + (60 if moment.second == 0 and moment.microsecond == 0 else 0)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap(data: bytes) -> Iterator[tuple[str, str, Optional[float]]]:
+    """(kind, loc, lastmod) for each entry of a sitemap or sitemap index.
+
+    kind is "sitemap" for an index entry, "url" for a page. Elements are
+    dropped as soon as they are read, so memory doesn't grow with the file.
+    """
+    stream = io.BytesIO(data)
+    if data[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        kind = _local(elem.tag)
+        if kind in ("url", "sitemap"):
+            loc = lastmod = None
+            for child in elem:
+                name = _local(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            if loc:
+                yield kind, loc, lastmod
+            root.clear()
+
+
+def _newest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    """The later of two lastmods; unknown if either is."""
+    return None if a is None or b is None else max(a, b)
+
+
+@dataclass
+class SitemapPlaybook:
+    # Of the playbook page; None if unknown (or the page isn't listed)
+    lastmod: Optional[float] = None
+    # formation slug -> newest lastmod of its page and its plays' pages
+    formations: dict[str, Optional[float]] = field(default_factory=dict)
+
+
+@dataclass
+class Sitemap:
+    read_at: float  # epoch seconds, before the first sitemap was fetched
+    files: int  # sitemap files fetched
+    playbooks: dict[str, SitemapPlaybook] = field(default_factory=dict)
+
+    def add(self, loc: str, lastmod: Optional[float]):
+        """Record a page, if it is a playbook, formation or play page."""
+        path = urlsplit(loc).path
+        match = _PAGE_PATH.match(path)
+        if not match:
+            return
+        # Pages are matched by path and fetched from BASE_URL, whatever host the sitemap names
+        playbook_slug, formation_slug, _ = match.groups()
+        entry = self.playbooks.setdefault(playbook_slug, SitemapPlaybook())
+        if formation_slug is None:
+            entry.lastmod = lastmod
+        elif formation_slug in entry.formations:
+            entry.formations[formation_slug] = _newest(entry.formations[formation_slug], lastmod)
+        else:
+            entry.formations[formation_slug] = lastmod
+
+
+def read_sitemap(url: Optional[str] = None) -> Optional[Sitemap]:
+    """Read the sitemap index (or single sitemap) at ``url`` and every sitemap it lists.
+
+    None if the site has no sitemap, or any part of it can't be read: a
+    sitemap with pages missing can't vouch for what is unchanged.
+    """
+    url = url or scrape_huddle.BASE_URL + SITEMAP_PATH
+    site = Sitemap(read_at=time.time(), files=0)
+    queue, seen = deque([url]), {url}
+    while queue:
+        if site.files == MAX_SITEMAPS:
+            print(f"  Sitemap lists more than {MAX_SITEMAPS} sitemaps")
+            return None
+        sitemap_url = queue.popleft()
+        page = fetch_raw(sitemap_url)
+        site.files += 1
+        if page is None:
+            # A missing sitemap is a reason to follow links, not a failed page
+            failed_urls.discard(sitemap_url)
+            return None
+        try:
+            for kind, loc, lastmod in iter_sitemap(page.content):
+                if kind == "url":
+                    site.add(loc, lastmod)
+                elif loc not in seen:
+                    seen.add(loc)
+                    queue.append(loc)
+        except (ET.ParseError, EOFError, OSError) as e:
+            print(f"  Unreadable sitemap {sitemap_url}: {e}")
+            return None
+    return site
+
+
+def scrape_playbook_sitemap(
+    playbook: dict,
+    listed: SitemapPlaybook,
+    previous: dict,
+    since: float,
+    executor: Optional[Executor] = None,
+    stats: Optional[Counter] = None,
+    resume: Optional[dict[str, list[dict]]] = None,
+    on_formation: Optional[Callable[[dict, str], None]] = None,
+) -> dict:
+    """Scrape a playbook, fetching only pages the sitemap shows modified after ``since``.
+
+    ``previous`` is the playbook as it was at ``since``. ``stats`` (if given)
+    counts the pages not fetched under ``skipped``. ``resume`` and
+    ``on_formation`` are as for scrape_playbook().
+    """
+    stats = stats if stats is not None else Counter()
+    since -= LASTMOD_SLACK
+
+    def changed(lastmod: Optional[float]) -> bool:
+        return lastmod is None or lastmod > since
+
+    known = {
+        formation["slug"]: formation
+        for group in previous.get("formationGroups", [])
+        for formation in group["formations"]
+    }
+    unchanged = {
+        urljoin(playbook["url"], f"{slug}/"): known[slug]["plays"]
+        for slug, lastmod in listed.formations.items()
+        if slug in known and not changed(lastmod)
+    }
+
+    if changed(listed.lastmod) or set(listed.formations) != set(known):
+        # The formation index may have changed, so it is read from the page
+        stats["skipped"] += len(unchanged)
+        return scrape_playbook(playbook, executor, {**unchanged, **(resume or {})}, on_formation)
+
+    print(f"\nUpdating playbook: {playbook['name']} ({playbook['type']}), page unchanged since last run")
+    formation_groups = {}
+    todo = []
+    for group in previous["formationGroups"]:
+        entries = formation_groups[group["name"]] = []
+        for formation in group["formations"]:
+            url = urljoin(playbook["url"], f"{formation['slug']}/")
+            formation = dict(formation)
+            if url not in unchanged:
+                if resume and url in resume:
+                    formation["plays"] = resume[url]
+                else:
+                    formation["plays"] = []
+                    todo.append((formation, url))
+            entries.append((formation, url))
+
+    stats["skipped"] += 1 + len(unchanged)
+    print(f"  Fetching {len(todo)} changed formations, reusing {len(unchanged)}")
+    scrape_formations(todo, playbook["slug"], executor, on_formation)
+    return assemble_playbook(playbook, formation_groups)
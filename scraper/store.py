@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+SQLite playbook store.
+
+Normalized tables, one row per playbook, formation group, formation and
+play, each child keeping its position so playbooks.json can be rebuilt in
+the original order:
+
+    meta            (key, value)                 header fields: version, scrapedAt, source
+    playbook        (id, position, name, type, category, content_hash)
+    formation_group (id, playbook_id, position, name)
+    formation       (id, group_id, position, name, slug)
+    play            (id, formation_id, position, play_id, name, slug, type)
+    play_fts        FTS5 over play.name, trigram tokenizer
+
+Foreign keys cascade, so deleting a playbook removes everything under it.
+play_fts is an external-content index kept in sync by triggers. Its
+trigram tokenizer gives the same case-insensitive substring match as
+searchPlays() in the app, from an index instead of a scan.
+
+upsert_playbooks() replaces whole playbooks in one transaction. A playbook
+whose content hash matches the stored one is skipped, so re-importing a
+full scrape only rewrites what changed, and merging a partial re-scrape is
+just upserting the playbooks it produced. export() rebuilds the
+playbooks.json schema.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from fileutil import write_json_atomic
+
+DEFAULT_DB = Path(__file__).parent / "output" / "playbooks.db"
+HEADER_FIELDS = ("version", "scrapedAt", "source")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS playbook (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS playbook_type ON playbook (type, position);
+
+CREATE TABLE IF NOT EXISTS formation_group (
+    id INTEGER PRIMARY KEY,
+    playbook_id TEXT NOT NULL REFERENCES playbook (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (playbook_id, position)
+);
+CREATE INDEX IF NOT EXISTS formation_group_name ON formation_group (name);
+
+CREATE TABLE IF NOT EXISTS formation (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES formation_group (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    UNIQUE (group_id, position)
+);
+CREATE INDEX IF NOT EXISTS formation_slug ON formation (slug);
+
+CREATE TABLE IF NOT EXISTS play (
+    id INTEGER PRIMARY KEY,
+    formation_id INTEGER NOT NULL REFERENCES formation (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    play_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    type TEXT NOT NULL,
+    UNIQUE (formation_id, position)
+);
+CREATE INDEX IF NOT EXISTS play_formation_type ON play (formation_id, type);
+CREATE INDEX IF NOT EXISTS play_play_id ON play (play_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS play_fts USING fts5 (
+    name, content = 'play', content_rowid = 'id', tokenize = 'trigram'
+);
+CREATE TRIGGER IF NOT EXISTS play_fts_insert AFTER INSERT ON play BEGIN
+    INSERT INTO play_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS play_fts_delete AFTER DELETE ON play BEGIN
+    INSERT INTO play_fts (play_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS play_fts_update AFTER UPDATE OF name ON play BEGIN
+    INSERT INTO play_fts (play_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO play_fts (rowid, name) VALUES (new.id, new.name);
+END;
+"""
+
+# Plays in playbooks.json order, with the context a search result needs
+_PLAY_ROWS = """
+SELECT pb.id, pb.name, g.name, f.name, f.slug, p.play_id, p.name, p.slug, p.type
+FROM play p
+JOIN formation f ON f.id = p.formation_id
+JOIN formation_group g ON g.id = f.group_id
+JOIN playbook pb ON pb.id = g.playbook_id
+"""
+_PLAY_ORDER = "ORDER BY pb.position, g.position, f.position, p.position"
+
+
+def content_hash(playbook: dict) -> str:
+    return hashlib.sha256(json.dumps(playbook, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def _name_match(query: str) -> tuple[str, str]:
+    """SQL condition on play p whose name contains query, and its parameter."""
+    if len(query) >= 3:
+        # Quoted as one FTS5 phrase, so operators in the query are literal
+        return "p.id IN (SELECT rowid FROM play_fts WHERE play_fts MATCH ?)", '"' + query.replace('"', '""') + '"'
+    # Too short for a trigram; scan
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "p.name LIKE ? ESCAPE '\\'", f"%{escaped}%"
+
+
+class PlaybookStore:
+    """A playbooks database; one connection, used from one thread."""
+
+    def __init__(self, path: Path = DEFAULT_DB):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "PlaybookStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Refreshes planner statistics when they have drifted; cheap otherwise
+        self.conn.execute("PRAGMA optimize")
+        self.conn.close()
+
+    # Writes
+
+    def set_header(self, header: dict):
+        with self.conn:
+            self._write_header(header)
+
+    def _write_header(self, header: dict):
+        self.conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(key, header[key]) for key in HEADER_FIELDS if key in header],
+        )
+
+    def upsert_playbooks(
+        self, playbooks: Iterable[dict], header: Optional[dict] = None, order: Optional[Sequence[str]] = None
+    ) -> Counter:
+        """Insert or replace playbooks in one transaction.
+
+        ``order`` is the site's playbook ids in order (parse_playbook_list());
+        a playbook in it takes its index there as position, so a crawl in
+        priority order still exports in site order. Otherwise new playbooks
+        go after the existing ones and replaced playbooks keep their
+        position. Returns counts of inserted, updated and unchanged.
+        """
+        stats = Counter()
+        rank = {pb_id: i for i, pb_id in enumerate(order or ())}
+        with self.conn:
+            if header:
+                self._write_header(header)
+            for playbook in playbooks:
+                digest = content_hash(playbook)
+                row = self.conn.execute(
+                    "SELECT content_hash FROM playbook WHERE id = ?", (playbook["id"],)
+                ).fetchone()
+                if playbook["id"] in rank:
+                    position = rank[playbook["id"]]
+                    if row:
+                        self.conn.execute("UPDATE playbook SET position = ? WHERE id = ?", (position, playbook["id"]))
+                else:
+                    position = None
+                if row and row[0] == digest:
+                    stats["unchanged"] += 1
+                    continue
+                if row:
+                    self.conn.execute("DELETE FROM formation_group WHERE playbook_id = ?", (playbook["id"],))
+                    self.conn.execute(
+                        "UPDATE playbook SET name = ?, type = ?, category = ?, content_hash = ? WHERE id = ?",
+                        (playbook["name"], playbook["type"], playbook["category"], digest, playbook["id"]),
+                    )
+                    stats["updated"] += 1
+                else:
+                    self.conn.execute(
+                        "INSERT INTO playbook (id, position, name, type, category, content_hash) "
+                        "VALUES (?, COALESCE(?, (SELECT MAX(position) + 1 FROM playbook), 0), ?, ?, ?, ?)",
+                        (playbook["id"], position, playbook["name"], playbook["type"], playbook["category"], digest),
+                    )
+                    stats["inserted"] += 1
+                self._insert_groups(playbook)
+        return stats
+
+    def _insert_groups(self, playbook: dict):
+        execute = self.conn.execute
+        for g_pos, group in enumerate(playbook.get("formationGroups", [])):
+            group_id = execute(
+                "INSERT INTO formation_group (playbook_id, position, name) VALUES (?, ?, ?)",
+                (playbook["id"], g_pos, group["name"]),
+            ).lastrowid
+            for f_pos, formation in enumerate(group.get("formations", [])):
+                formation_id = execute(
+                    "INSERT INTO formation (group_id, position, name, slug) VALUES (?, ?, ?, ?)",
+                    (group_id, f_pos, formation["name"], formation["slug"]),
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO play (formation_id, position, play_id, name, slug, type) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (formation_id, p_pos, play["id"], play["name"], play["slug"], play["type"])
+                        for p_pos, play in enumerate(formation.get("plays", []))
+                    ],
+                )
+
+    def delete_playbooks(self, ids: Iterable[str]) -> int:
+        with self.conn:
+            return self.conn.executemany("DELETE FROM playbook WHERE id = ?", [(i,) for i in ids]).rowcount
+
+    # Reads
+
+    def header(self) -> dict:
+        values = dict(self.conn.execute("SELECT key, value FROM meta"))
+        return {key: values[key] for key in HEADER_FIELDS if key in values}
+
+    def export(self, ids: Optional[list[str]] = None) -> dict:
+        """The store as a playbooks.json document, optionally only some playbooks."""
+        query = "SELECT id, name, type, category FROM playbook"
+        params: list = []
+        if ids is not None:
+            query += f" WHERE id IN ({','.join('?' * len(ids))})"
+            params = list(ids)
+        playbooks = {}
+        for pb_id, name, pb_type, category in self.conn.execute(query + " ORDER BY position", params):
+            playbooks[pb_id] = {"id": pb_id, "name": name, "type": pb_type, "category": category,
+                                "formationGroups": []}
+
+        # One ordered pass per table; parents are always seen before children
+        groups, formations = {}, {}
+        for group_id, pb_id, name in self.conn.execute(
+            "SELECT id, playbook_id, name FROM formation_group ORDER BY playbook_id, position"
+        ):
+            if pb_id in playbooks:
+                groups[group_id] = {"name": name, "formations": []}
+                playbooks[pb_id]["formationGroups"].append(groups[group_id])
+        for formation_id, group_id, name, slug in self.conn.execute(
+            "SELECT id, group_id, name, slug FROM formation ORDER BY group_id, position"
+        ):
+            if group_id in groups:
+                formations[formation_id] = {"name": name, "slug": slug, "plays": []}
+                groups[group_id]["formations"].append(formations[formation_id])
+        for formation_id, play_id, name, slug, play_type in self.conn.execute(
+            "SELECT formation_id, play_id, name, slug, type FROM play ORDER BY formation_id, position"
+        ):
+            if formation_id in formations:
+                formations[formation_id]["plays"].append(
+                    {"id": play_id, "name": name, "slug": slug, "type": play_type}
+                )
+
+        return {**self.header(), "playbooks": list(playbooks.values())}
+
+    def search_plays(
+        self, query: str, side: Optional[str] = None, playbook: Optional[str] = None, limit: Optional[int] = 50
+    ) -> list[dict]:
+        """Plays whose name contains query (case insensitive), in playbooks.json order.
+
+        Each play has "playbook" (the display name) and "playbookId", as searchPlays() in the app.
+        """
+        condition, param = _name_match(query)
+        sql = _PLAY_ROWS + "WHERE " + condition
+        params: list = [param]
+        if side:
+            sql += " AND pb.type = ?"
+            params.append(side)
+        if playbook:
+            sql += " AND pb.id = ?"
+            params.append(playbook)
+        sql += " " + _PLAY_ORDER
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [
+            {"playbook": pb_name, "playbookId": pb_id, "formationGroup": group, "formation": f_name,
+             "formationSlug": f_slug, "id": play_id, "name": name, "slug": slug, "type": play_type}
+            for pb_id, pb_name, group, f_name, f_slug, play_id, name, slug, play_type
+            in self.conn.execute(sql, params)
+        ]
+
+    def playbooks_with_play(self, query: str) -> list[str]:
+        """Ids of playbooks with a play whose name contains query, in playbook order."""
+        condition, param = _name_match(query)
+        rows = self.conn.execute(
+            "SELECT pb.id FROM play p"
+            " JOIN formation f ON f.id = p.formation_id"
+            " JOIN formation_group g ON g.id = f.group_id"
+            " JOIN playbook pb ON pb.id = g.playbook_id"
+            f" WHERE {condition} GROUP BY pb.id ORDER BY pb.position",
+            (param,),
+        )
+        return [pb_id for pb_id, in rows]
+
+    def count_plays(
+        self, play_type: Optional[str] = None, group: Optional[str] = None, playbook: Optional[str] = None
+    ) -> int:
+        """Number of plays, optionally of one type, formation group or playbook."""
+        sql = (
+            "SELECT COUNT(*) FROM play p"
+            " JOIN formation f ON f.id = p.formation_id"
+            " JOIN formation_group g ON g.id = f.group_id"
+            " WHERE 1"
+        )
+        params = []
+        for clause, value in (("p.type = ?", play_type), ("g.name = ?", group), ("g.playbook_id = ?", playbook)):
+            if value is not None:
+                sql += f" AND {clause}"
+                params.append(value)
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def stats(self) -> dict:
+        return {
+            table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("playbook", "formation_group", "formation", "play")
+        }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Load, query and export the SQLite playbook store")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help=f"database file (default: {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="upsert the playbooks of a playbooks JSON file")
+    load.add_argument("input", type=Path)
+
+    export = commands.add_parser("export", help="write the store as playbooks.json")
+    export.add_argument("output", type=Path)
+    export.add_argument("--only", nargs="+", metavar="ID", help="only these playbook ids")
+
+    search = commands.add_parser("search", help="plays whose name contains a string")
+    search.add_argument("query")
+    search.add_argument("--side", choices=("offense", "defense"))
+    search.add_argument("--playbook", metavar="ID")
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--playbooks", action="store_true", help="list the playbooks containing a match instead")
+
+    count = commands.add_parser("count", help="count plays")
+    count.add_argument("--type", dest="play_type")
+    count.add_argument("--group", help="formation group, e.g. Gun")
+    count.add_argument("--playbook", metavar="ID")
+
+    args = parser.parse_args(argv)
+    with PlaybookStore(args.db) as store:
+        if args.command == "import":
+            with open(args.input) as f:
+                data = json.load(f)
+            stats = store.upsert_playbooks(data["playbooks"], data)
+            print(f"{args.input} -> {args.db}: {stats['inserted']} inserted, "
+                  f"{stats['updated']} updated, {stats['unchanged']} unchanged")
+            print(", ".join(f"{n} {table}" for table, n in store.stats().items()))
+        elif args.command == "export":
+            data = store.export(args.only)
+            write_json_atomic(args.output, data)
+            print(f"Wrote {args.output} ({len(data['playbooks'])} playbooks)")
+        elif args.command == "search":
+            if args.playbooks:
+                for pb_id in store.playbooks_with_play(args.query):
+                    print(pb_id)
+            else:
+                for play in store.search_plays(args.query, args.side, args.playbook, args.limit):
+                    print(f"{play['playbook']:<16} {play['formationGroup']} / {play['formation']:<24} "
+                          f"{play['name']} ({play['type']})")
+        elif args.command == "count":
+            print(store.count_plays(args.play_type, args.group, args.playbook))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Durable lease-based work queue in SQLite, shared by crawl worker processes.
+
+Items move pending -> leased -> done (or failed). A worker claims one item
+at a time and holds a lease on it until ``lease_expires``. While working
+it heartbeats to extend the lease. If the worker dies, the lease expires
+and the next claim() hands the item to someone else. complete() only
+succeeds while the caller still holds the lease, so a worker that stalled
+past its lease can't overwrite the item's new owner. Finishing an item can
+enqueue follow-up items (a playbook's formations) in the same transaction.
+An item claimed ``max_attempts`` times without completing is marked
+failed.
+
+Every write is a short BEGIN IMMEDIATE transaction, so any number of
+processes can share the file. On one machine or a filesystem with working
+POSIX locks, that is; SQLite over NFS is not safe.
+
+SharedRateLimiter is a drop-in for scrape_huddle's TokenBucket whose state
+lives in the same database, so the request rate budget is global across
+workers rather than per process. It uses wall-clock time, so workers on
+different machines need synchronized clocks.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS item (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS item_state ON item (state, lease_expires);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rate_budget (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    rate REAL NOT NULL,
+    next_at REAL NOT NULL DEFAULT 0,
+    resume_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class Item:
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    attempts: int
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    # Autocommit; transactions are explicit BEGIN IMMEDIATE
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, taking the write lock up front so claims never race."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+class WorkQueue:
+    """One process's handle on the queue; safe to share between its threads."""
+
+    def __init__(self, path: Path, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = connect(self.path)
+        self._lock = threading.Lock()
+
+    def transaction(self) -> _Transaction:
+        return _Transaction(self.conn, self._lock)
+
+    def close(self):
+        self.conn.close()
+
+    def set_meta(self, values: dict):
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value)) for key, value in values.items()],
+            )
+
+    def meta(self) -> dict:
+        with self._lock:
+            return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+
+    def add(self, items: Iterable[tuple[str, str, dict]], conn: Optional[sqlite3.Connection] = None) -> int:
+        """Enqueue (kind, key, payload) items; keys already queued are ignored. Returns the number added."""
+        rows = [(kind, key, json.dumps(payload)) for kind, key, payload in items]
+        sql = "INSERT OR IGNORE INTO item (kind, key, payload) VALUES (?, ?, ?)"
+        if conn is not None:
+            return conn.executemany(sql, rows).rowcount
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def claim(self, owner: str) -> Optional[Item]:
+        """Lease the next pending or expired item, formations before playbooks."""
+        now = time.time()
+        with self.transaction() as conn:
+            # Items whose lease expired max_attempts times are given up on
+            conn.execute(
+                "UPDATE item SET state = 'failed', owner = NULL, error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, kind, key, payload, attempts FROM item "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY kind = 'playbook', id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE item SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (owner, now + self.lease_seconds, row[0]),
+            )
+        return Item(row[0], row[1], row[2], json.loads(row[3]), row[4] + 1)
+
+    def heartbeat(self, item: Item, owner: str) -> bool:
+        """Extend the lease. False if the lease was lost to another worker."""
+        with self.transaction() as conn:
+            return conn.execute(
+                "UPDATE item SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, item.id, owner),
+            ).rowcount == 1
+
+    def complete(self, item: Item, owner: str, result, children: Iterable[tuple[str, str, dict]] = ()) -> bool:
+        """Store the result and enqueue follow-up items, if the lease is still ours."""
+        with self.transaction() as conn:
+            updated = conn.execute(
+                "UPDATE item SET state = 'done', result = ?, lease_expires = NULL, error = NULL "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (json.dumps(result), item.id, owner),
+            ).rowcount
+            if updated:
+                self.add(children, conn)
+        return bool(updated)
+
+    def fail(self, item: Item, owner: str, error: str):
+        """Give the item back for a retry, or mark it failed after max_attempts."""
+        state = "failed" if item.attempts >= self.max_attempts else "pending"
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE item SET state = ?, owner = NULL, lease_expires = NULL, error = ? "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (state, error, item.id, owner),
+            )
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM item GROUP BY state"))
+
+    def drained(self) -> bool:
+        """Nothing pending and nothing leased, so no more work can appear."""
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("leased")
+
+    def results(self, kind: str) -> dict[str, tuple[str, Optional[dict], dict]]:
+        """key -> (state, result, payload) for every item of a kind, in queue order."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, state, result, payload FROM item WHERE kind = ? ORDER BY id", (kind,)
+            ).fetchall()
+        return {key: (state, result and json.loads(result), json.loads(payload))
+                for key, state, result, payload in rows}
+
+
+class Heartbeat:
+    """Extends an item's lease from a background thread while the block runs.
+
+    ``lost`` is set if a heartbeat finds the lease taken over; the worker
+    should then drop its result (complete() would refuse it anyway).
+    """
+
+    def __init__(self, queue: WorkQueue, item: Item, owner: str):
+        self.queue = queue
+        self.item = item
+        self.owner = owner
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(self.item, self.owner):
+                self.lost = True
+                return
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class SharedRateLimiter:
+    """TokenBucket interface (capacity 1) over the queue database's rate_budget row.
+
+    Each acquire() reserves the next free slot, ``1 / rate`` seconds after
+    the previous one across every process, and sleeps until it. pause()
+    pushes every process's next slot past a Retry-After.
+    """
+
+    def __init__(self, queue: WorkQueue, rate: Optional[float] = None):
+        self.queue = queue
+        with queue.transaction() as conn:
+            if rate is not None:
+                conn.execute(
+                    "INSERT INTO rate_budget (id, rate) VALUES (1, ?) ON CONFLICT (id) DO UPDATE SET rate = excluded.rate",
+                    (rate,),
+                )
+            row = conn.execute("SELECT rate FROM rate_budget WHERE id = 1").fetchone()
+        self.rate = row[0] if row else 0.0
+
+    def acquire(self) -> float:
+        now = time.time()
+        with self.queue.transaction() as conn:
+            next_at, resume_at = conn.execute("SELECT next_at, resume_at FROM rate_budget WHERE id = 1").fetchone()
+            slot = max(now, resume_at, next_at if self.rate > 0 else 0.0)
+            if self.rate > 0:
+                conn.execute("UPDATE rate_budget SET next_at = ? WHERE id = 1", (slot + 1 / self.rate,))
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        with self.queue.transaction() as conn:
+            conn.execute("UPDATE rate_budget SET resume_at = MAX(resume_at, ?) WHERE id = 1", (time.time() + seconds,))
+
+    def refund(self):
+        if self.rate <= 0:
+            return
+        with self.queue.transaction() as conn:
+            conn.execute(
+                "UPDATE rate_budget SET next_at = MAX(?, next_at - ?) WHERE id = 1", (time.time(), 1 / self.rate)
+            )
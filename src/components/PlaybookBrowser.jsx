@@ -1,15 +1,16 @@
 import { useState, useEffect } from 'react'
 import { useLiveQuery } from 'dexie-react-hooks'
 import { db, addToMyPlays } from '../lib/db'
-import { playbooks, loadPlaybookData, getPlaybook, nameToSlug, searchPlays } from '../data/playbooks'
+import { playbooks, loadPlaybookData, loadPlaybookManifest, loadPlaybook, nameToSlug, searchPlays } from '../data/playbooks'
 
 function PlaybookBrowser({ side }) {
   const [selectedCategory, setSelectedCategory] = useState('team')
   const [selectedPlaybookName, setSelectedPlaybookName] = useState(null)
   const [selectedFormationGroup, setSelectedFormationGroup] = useState(null)
   const [selectedFormation, setSelectedFormation] = useState(null)
-  const [playbookData, setPlaybookData] = useState(null)
+  const [currentPlaybook, setCurrentPlaybook] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingPlaybook, setLoadingPlaybook] = useState(false)
   const [error, setError] = useState(null)
   const [searchQuery, setSearchQuery] = useState('')
   const [searchResults, setSearchResults] = useState([])
@@ -21,34 +22,48 @@ function PlaybookBrowser({ side }) {
     []
   )
 
-  // Load playbook data on mount
+  // Load the playbook manifest on mount; without sharded output, the full playbook data
   useEffect(() => {
-    loadPlaybookData()
+    loadPlaybookManifest()
+      .then(manifest => manifest || loadPlaybookData())
       .then(data => {
-        setPlaybookData(data)
-        setLoading(false)
-      })
-      .catch(err => {
-        setError('Failed to load playbook data')
+        if (!data) setError('Failed to load playbook data')
         setLoading(false)
       })
   }, [])
 
-  // Handle search
+  const availablePlaybooks = playbooks[side][selectedCategory]
+
+  // Load the selected playbook's shard
+  const currentPlaybookId = selectedPlaybookName ? nameToSlug(selectedPlaybookName, side) : null
+
+  useEffect(() => {
+    setCurrentPlaybook(null)
+    if (!currentPlaybookId) return
+
+    let cancelled = false
+    setLoadingPlaybook(true)
+    loadPlaybook(currentPlaybookId).then(playbook => {
+      if (cancelled) return
+      setCurrentPlaybook(playbook)
+      setLoadingPlaybook(false)
+    })
+    return () => { cancelled = true }
+  }, [currentPlaybookId])
+
+  // Handle search; only search needs every playbook, so the full data is fetched on first use
   useEffect(() => {
-    if (searchQuery.length >= 2 && playbookData) {
-      const results = searchPlays(searchQuery, { type: side, limit: 30 })
-      setSearchResults(results)
-    } else {
+    if (searchQuery.length < 2) {
       setSearchResults([])
+      return
     }
-  }, [searchQuery, side, playbookData])
 
-  const availablePlaybooks = playbooks[side][selectedCategory]
-
-  // Get current playbook data
-  const currentPlaybookId = selectedPlaybookName ? nameToSlug(selectedPlaybookName, side) : null
-  const currentPlaybook = currentPlaybookId ? getPlaybook(currentPlaybookId) : null
+    let cancelled = false
+    loadPlaybookData().then(() => {
+      if (!cancelled) setSearchResults(searchPlays(searchQuery, { type: side, limit: 30 }))
+    })
+    return () => { cancelled = true }
+  }, [searchQuery, side])
 
   // Get formation groups for selected playbook
   const formationGroups = currentPlaybook?.formationGroups || []
@@ -264,7 +279,7 @@ function PlaybookBrowser({ side }) {
       {error && (
         <div className="bg-red-900/30 border border-red-700 rounded-lg p-8 text-center text-red-400">
           <p className="mb-2">{error}</p>
-          <p className="text-sm">Make sure playbooks.json is in the public/data folder</p>
+          <p className="text-sm">Make sure manifest.json or playbooks.json is in the public/data folder</p>
         </div>
       )}
 
@@ -295,7 +310,11 @@ function PlaybookBrowser({ side }) {
               <h2 className="text-lg font-semibold mb-4">
                 {selectedPlaybookName} - Formation Groups
               </h2>
-              {formationGroups.length === 0 ? (
+              {loadingPlaybook ? (
+                <div className="bg-gray-800 rounded-lg p-8 text-center text-gray-400">
+                  Loading playbook...
+                </div>
+              ) : formationGroups.length === 0 ? (
                 <div className="bg-gray-800 rounded-lg p-8 text-center text-gray-400">
                   <p className="mb-2">No formation data available</p>
                   <p className="text-sm">This playbook may not have been scraped yet</p>
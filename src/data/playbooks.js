@@ -71,9 +71,64 @@ export async function loadPlaybookData() {
   }
 }
 
+// Sharded data (written by `scrape_huddle.py --shard`): a small manifest plus
+// one content-hashed file per playbook, so a view only downloads what it shows
+// The manifest is fetched once: a failure resolves to null for good, so every
+// later load goes straight to the full document instead of retrying
+let playbookManifest = null;
+const loadedShards = {};
+
+// Load the manifest listing every playbook with its counts and shard file
+export function loadPlaybookManifest() {
+  if (!playbookManifest) {
+    playbookManifest = fetchPlaybookManifest();
+  }
+  return playbookManifest;
+}
+
+async function fetchPlaybookManifest() {
+  try {
+    const response = await fetch('/data/manifest.json');
+    if (!response.ok) {
+      throw new Error('Failed to load playbook manifest');
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error loading playbook manifest:', error);
+    return null;
+  }
+}
+
+// Load a single playbook from its shard
+export async function loadPlaybook(playbookId) {
+  const cached = getPlaybook(playbookId);
+  if (cached) return cached;
+
+  const manifest = await loadPlaybookManifest();
+  if (!manifest) {
+    // No sharded output: fall back to the full document
+    const data = await loadPlaybookData();
+    return data?.[playbookId] || null;
+  }
+  const entry = manifest.playbooks.find(p => p.id === playbookId);
+  if (!entry) return null;
+
+  try {
+    const response = await fetch(`/data/${entry.file}`);
+    if (!response.ok) {
+      throw new Error(`Failed to load playbook ${playbookId}`);
+    }
+    loadedShards[playbookId] = await response.json();
+    return loadedShards[playbookId];
+  } catch (error) {
+    console.error('Error loading playbook shard:', error);
+    return null;
+  }
+}
+
 // Get a specific playbook by ID
 export function getPlaybook(playbookId) {
-  return playbookData?.[playbookId] || null;
+  return playbookData?.[playbookId] || loadedShards[playbookId] || null;
 }
 
 // Get all playbooks